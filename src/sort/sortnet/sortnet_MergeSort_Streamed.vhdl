@@ -8,7 +8,37 @@
 --
 -- Description:
 -- -------------------------------------
--- .. TODO:: No documentation available.
+-- Merges pairs of sorted frames into sorted frames of double length.
+--
+-- The input frames, each from ``In_SOF`` to ``In_EOF``, are written alternately
+-- into two FIFOs. If the first words of two frames are available, the frames
+-- are merged: the next output word is taken from the second FIFO, if the key
+-- (the lower ``KEY_BITS`` of the data) of the first FIFO is greater than the
+-- key of the second FIFO, XOR ``Inverse``. ``Out_SOF`` and ``Out_EOF`` mark
+-- the merged frame. Words outside of a frame are discarded.
+--
+-- The FIFO is selected anew only if the head of the first FIFO is a key
+-- (``IsKey = '1'``), otherwise the next word is taken from the same FIFO as
+-- the last one. ``Out_IsKey`` is the ``IsKey`` mark of the head of the first
+-- FIFO.
+--
+-- A frame must not be longer than ``FIFO_DEPTH`` words. Both interfaces use a
+-- Valid/Ack handshake. ``Out_Sync`` is not driven.
+--
+-- .. WARNING::
+--
+--    Known defects. The merge is only correct, if ``Out_Ack`` is always
+--    high, if no end-of-frame word waits for ``In_Ack``, and if the keys of
+--    the two frames of a pair do not overlap:
+--
+--    * The FSM switches to emptying FIFO 1 as soon as the head of FIFO 0 is
+--      an end-of-frame word, even if the word of FIFO 1 is taken in this
+--      clock cycle, and vice versa. The end-of-frame word is then discarded
+--      instead of appended.
+--    * The state changes without ``Out_Ack``, so that, start-of-frame and
+--      end-of-frame are lost under back-pressure.
+--    * The input FIFO is toggled by ``In_EOF`` even if ``In_Ack`` is low.
+--    * ``Out_IsKey`` is undefined while FIFO 0 is empty.
 --
 -- License:
 -- =============================================================================
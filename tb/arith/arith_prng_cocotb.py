@@ -0,0 +1,118 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Cocotb Testbench:		Pseudo-Random Number Generator (PRNG)
+#
+# Description:
+# ------------------------------------
+#	Automated testbench for PoC.arith_prng
+#
+# Test run_test checks the output in each clock cycle against the reference
+# model in arith_prng_model.py for random resets and requests.
+#
+# Test run_windows spot-checks windows of the sequence at random positions up
+# to the full period 2^BITS-1. The register value at the start of each window
+# is computed by the jump-ahead of the model and deposited into the register
+# val_r, then the window is clocked and checked.
+#
+# All supported widths are checked by a parameter sweep, e.g.:
+#   python tb/common/cocotb_sweep.py PoC.arith.prng -g BITS=3..168
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import random
+
+import cocotb
+from cocotb.regression import TestFactory
+from cocotb.result import TestFailure, TestSuccess
+from cocotb.triggers import FallingEdge, RisingEdge
+
+from arith_prng_model import PrngModel
+from clock_source import start_clock
+from cocotb_testbench import ModelTestbench, transaction_count
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from utils import vector_generic
+
+def create_model(dut):
+	return PrngModel(dut.BITS.value, vector_generic(dut.SEED.value))
+
+# ==============================================================================
+class Testbench(ModelTestbench):
+	def __init__(self, dut):
+		model = create_model(dut)
+		self.reference_model = model
+		ModelTestbench.__init__(self, dut, model.input_layout, model.output_layout, model.init_val, clock="clk", reset=None)
+
+
+# ==============================================================================
+def random_input_gen(n=10000):
+	"""
+	Generate random input data to be applied by InputDriver.
+	Returns up to n input transactions as tuples in the order of PrngModel.input_layout.
+	"""
+	for _ in range(n):
+		command = random.randint(1,100)
+		# 1% reset, 80% got, 19% idle
+		rst = 1 if command == 1 else 0
+		got = 1 if command > 20 else 0
+		if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", rst=rst, got=got)
+		yield (rst, got)
+
+@cocotb.coroutine
+def run_test(dut):
+	tb = Testbench(dut)
+	yield tb.run(random_input_gen(transaction_count(10000)))
+
+@cocotb.coroutine
+def run_windows(dut, windows=16, length=64):
+	"""Check windows of length values at random positions of the sequence, see above."""
+	model = create_model(dut)
+	lfsr = model.lfsr
+	clock = start_clock(dut.clk)
+	dut.rst <= 0
+	dut.got <= 0
+
+	for _ in range(windows):
+		# deposit away from the rising edge, when the register is stable
+		position = random.randrange(lfsr.period)
+		expected = model.value_at(position)
+		yield FallingEdge(dut.clk)
+		dut.val_r <= expected
+		dut.got <= 1
+		for i in range(length):
+			yield RisingEdge(dut.clk)
+			received = int(dut.val.value)
+			if received != expected:
+				raise TestFailure("Value {0} of the sequence: expected 0x{1:x}, received 0x{2:x}.".format(position + i, expected, received))
+			expected = lfsr.step(expected)
+		dut.got <= 0
+
+	clock.report()
+	clock.stop()
+	raise TestSuccess("Checked {0} windows of {1} values of the sequence.".format(windows, length))
+
+factory = TestFactory(run_test)
+factory.generate_tests()
+
+factory = TestFactory(run_windows)
+factory.generate_tests()
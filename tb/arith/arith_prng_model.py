@@ -0,0 +1,348 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Jump-ahead reference model of PoC.arith_prng
+#
+# Description:
+# ------------------------------------
+#	Reference model of PoC.arith_prng used by the Cocotb testbench. The tap
+#	positions are parsed from the polynomial table C_TAPPOSITION_LIST in
+#	arith_prng.vhdl, which is searched next to this module and in the PoC
+#	source tree.
+#
+#	The LFSR register is held in one integer, bit i-1 holds val(i). One step
+#	is affine over GF(2) because of the XNOR feedback. Thus, n steps are
+#	computed by the n-th power of the (BITS+1) x (BITS+1) transition matrix,
+#	which is built from the cached powers of two of the matrix by at most
+#	BITS+1 matrix-vector products. Any value of the sequence is computed
+#	without stepping through the sequence.
+#
+#	The jump-ahead does not reduce n modulo 2^BITS-1, because the period equals
+#	2^BITS-1 only for a maximal-length polynomial. Lfsr.is_maximal proves this
+#	by the unreduced powers of the transition matrix A: A^(2^BITS-1) = I and
+#	A^((2^BITS-1)/p) /= I for each prime factor p of 2^BITS-1. The factors are
+#	found by trial division and Pollard's rho method, applied to the
+#	cyclotomic factors of 2^BITS-1. If a composite cofactor remains
+#	unfactored within the iteration limit, the maximality is not decided.
+#
+#	Run this module as script to check the jump-ahead against the single steps
+#	and the period of each polynomial, e.g.:
+#	  python arith_prng_model.py -b 3..168
+#	The shared modules are then imported from tb/common next to this directory.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import os
+import re
+
+if __name__ == "__main__":
+	import sys
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+
+from bus_layout import BusLayout
+from func_coverage import CoverageGroup
+from model_trace import TRACE_LEVEL, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+
+SOURCE = "arith_prng.vhdl"
+
+def find_source():
+	"""Return the path of arith_prng.vhdl, either next to this module or in the PoC source tree."""
+	directory = os.path.dirname(os.path.abspath(__file__))
+	for filename in (os.path.join(directory, SOURCE), os.path.join(directory, "..", "..", "src", "arith", SOURCE)):
+		if os.path.exists(filename): return os.path.normpath(filename)
+	raise IOError("Cannot find {0} next to {1} or in the PoC source tree.".format(SOURCE, directory))
+
+def parse_tap_positions(filename):
+	"""Return the polynomial table of filename as dictionary {BITS: tuple of tap positions}."""
+	with open(filename) as f:
+		text = re.sub(r"--[^\n]*", "", f.read())
+	start = text.index("C_TAPPOSITION_LIST")
+	table = text[start:text.index(");", start)]
+	taps = {}
+	for bits, positions in re.findall(r"(\d+)\s*=>\s*\(([^)]*)\)", table):
+		taps[int(bits)] = tuple([int(position) for position in re.findall(r"\d+\s*=>\s*(\d+)", positions) if int(position) > 0])
+	if not taps: raise ValueError("No polynomial table found in {0}.".format(filename))
+	return taps
+
+_tap_positions = None
+
+def tap_positions():
+	"""Return the polynomial table of arith_prng.vhdl, parsed once."""
+	global _tap_positions
+	if _tap_positions is None: _tap_positions = parse_tap_positions(find_source())
+	return _tap_positions
+
+
+def parity(value):
+	return bin(value).count("1") & 1
+
+def mat_vec(columns, vector):
+	"""Multiply the GF(2) matrix given by its columns with the bit vector vector."""
+	result, j = 0, 0
+	while vector:
+		if vector & 1: result ^= columns[j]
+		vector >>= 1
+		j += 1
+	return result
+
+
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71)
+
+def is_prime(n):
+	"""Miller-Rabin test with the bases SMALL_PRIMES, deterministic below 3.3*10^24."""
+	if n < 2: return False
+	for p in SMALL_PRIMES:
+		if n % p == 0: return n == p
+	d, s = n - 1, 0
+	while d % 2 == 0:
+		d, s = d // 2, s + 1
+	for a in SMALL_PRIMES:
+		x = pow(a, d, n)
+		if x in (1, n - 1): continue
+		for _ in range(s - 1):
+			x = pow(x, 2, n)
+			if x == n - 1: break
+		else:
+			return False
+	return True
+
+def gcd(a, b):
+	while b: a, b = b, a % b
+	return a
+
+def pollard_rho(n, limit, c=1):
+	"""Return a non-trivial factor of the composite n by Brent's variant of Pollard's rho, or None after limit iterations."""
+	y, r, q, g = 2, 1, 1, 1
+	iterations = 0
+	while g == 1:
+		x = y
+		for _ in range(r): y = (y * y + c) % n
+		k = 0
+		while (k < r) and (g == 1):
+			ys = y
+			for _ in range(min(128, r - k)):
+				y = (y * y + c) % n
+				q = q * abs(x - y) % n
+			g = gcd(q, n)
+			k += 128
+		r *= 2
+		iterations += r
+		if iterations > limit: return None
+	if g == n:
+		# backtrack from the last saved value
+		while True:
+			ys = (ys * ys + c) % n
+			g = gcd(abs(x - ys), n)
+			if g > 1: break
+	return g if g != n else None
+
+def factorize(n, limit):
+	"""Return (primes, cofactor): the prime factors of n found within limit rho iterations per factor and the unfactored rest."""
+	primes, cofactor = set(), 1
+	for p in SMALL_PRIMES:
+		while n % p == 0: primes.add(p); n //= p
+	pending = [n] if n > 1 else []
+	while pending:
+		m = pending.pop()
+		if is_prime(m):
+			primes.add(m)
+			continue
+		factor = None
+		for c in (1, 3, 5):
+			factor = pollard_rho(m, limit, c)
+			if factor: break
+		if factor is None:
+			cofactor *= m
+		else:
+			pending.extend([factor, m // factor])
+	return primes, cofactor
+
+def mersenne_factors(bits, limit=1 << 18):
+	"""Return (primes, cofactor) of 2^bits-1, see factorize. The cyclotomic factors Phi_d(2), d | bits, are factorized separately."""
+	cyclotomic = {}
+	for d in range(1, bits + 1):
+		if bits % d == 0:
+			value = (1 << d) - 1
+			for e in cyclotomic:
+				if d % e == 0: value //= cyclotomic[e]
+			cyclotomic[d] = value
+	primes, cofactor = set(), 1
+	for value in cyclotomic.values():
+		found, rest = factorize(value, limit)
+		primes |= found
+		cofactor *= rest
+	return sorted(primes), cofactor
+
+
+class Lfsr(object):
+	"""The XNOR LFSR of PoC.arith_prng with bits register bits and the given tap positions."""
+
+	def __init__(self, bits, taps):
+		self.bits = bits
+		self.taps = taps
+		self.mask = (1 << bits) - 1
+		# feedback: XNOR of val(BITS) and val(tap) for each tap
+		self.feedback_mask = (1 << (bits-1)) | sum([1 << (tap-1) for tap in taps])
+		self.invert = len(taps) & 1
+		# the period of a maximal-length polynomial: all values except the all-ones lock-up value, see is_maximal
+		self.period = (1 << bits) - 1
+		# powers A^(2^k) of the transition matrix, the constant is bit BITS of the extended vector
+		one = 1 << bits
+		self._powers = [[self.step(1 << j) ^ self.step(0) for j in range(bits)] + [self.step(0) | one]]
+
+	def step(self, value):
+		"""Return the next value."""
+		return ((value << 1) & self.mask) | (parity(value & self.feedback_mask) ^ self.invert)
+
+	def _power(self, k):
+		"""Return the columns of the transition matrix to the power of 2^k."""
+		powers = self._powers
+		while len(powers) <= k:
+			last = powers[-1]
+			powers.append([mat_vec(last, column) for column in last])
+		return powers[k]
+
+	def jump(self, value, n):
+		"""Return the value after n steps."""
+		vector, k = value | (1 << self.bits), 0
+		while n:
+			if n & 1: vector = mat_vec(self._power(k), vector)
+			n >>= 1
+			k += 1
+		return vector & self.mask
+
+	def is_identity(self, n):
+		"""Return True, if the n-th power of the transition matrix is the identity."""
+		# the extended vectors (0, 1) and (2^j, 1) span the extended space
+		return all([self.jump(value, n) == value for value in [0] + [1 << j for j in range(self.bits)]])
+
+	def is_maximal(self, limit=1 << 18):
+		"""
+		Return True, if the period is 2^BITS-1, False, if not, and None, if
+		2^BITS-1 could not be factorized within limit iterations, see above.
+		"""
+		if not self.is_identity(self.period): return False
+		primes, cofactor = mersenne_factors(self.bits, limit)
+		if any([self.is_identity(self.period // p) for p in primes]): return False
+		return True if cofactor == 1 else None
+
+
+class PrngModel(ReferenceModel):
+	"""Reference model of PoC.arith_prng."""
+
+	def __init__(self, bits, seed=0):
+		ReferenceModel.__init__(self, bits=bits, seed=seed)
+		taps = tap_positions()
+		if bits not in taps: raise ValueError("Unsupported configuration: BITS={0}".format(bits))
+		self.lfsr = Lfsr(bits, taps[bits])
+		self.seed = seed & self.lfsr.mask
+		self.val = self.seed
+		# number of steps since the last reset
+		self.position = 0
+
+		self.input_layout = BusLayout([("rst", 1), ("got", 1)])
+		self.output_layout = BusLayout([("val", bits)])
+		self.init_val = (self.seed,)
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("prng")
+		self.cover_command = self.coverage.point("command", ("idle", "got", "rst", "rst_and_got"))
+
+	def value_at(self, position):
+		"""Return the value after position steps from the seed."""
+		return self.lfsr.jump(self.seed, position)
+
+	def predict(self, transaction):
+		'''Update the LFSR and return the expected output.'''
+		rst, got = transaction
+		if rst == 1:
+			self.val, self.position = self.seed, 0
+		elif got == 1:
+			self.val = self.lfsr.step(self.val)
+			self.position += 1
+		self.cover_command.sample(2*rst + got)
+
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("predict", rst=rst, got=got, position=self.position, val=self.val)
+		return self.output_layout.expected((self.val,))
+
+	def describe_model(self, transaction):
+		return "value {0} of the sequence = 0x{1:0{2}x}".format(self.position, self.val, (self.lfsr.bits + 3) // 4)
+
+
+def parse_widths(text):
+	"""Parse a comma-separated list of widths and ranges FIRST..LAST."""
+	widths = []
+	for part in text.split(","):
+		first, sep, last = part.partition("..")
+		widths.extend(range(int(first), int(last) + 1) if sep else [int(first)])
+	return widths
+
+
+if __name__ == "__main__":
+	import argparse
+	import random
+	import sys
+	import time
+
+	parser = argparse.ArgumentParser(description="Check the jump-ahead and the period of the polynomials of PoC.arith_prng.")
+	parser.add_argument("-b", "--bits", type=parse_widths, default=None, help="widths, e.g. 3..32,64 (default: all of the table)")
+	parser.add_argument("-s", "--source", default=None, help="path of arith_prng.vhdl (default: searched)")
+	parser.add_argument("-n", "--samples", type=int, default=8, help="random positions checked per width (default: %(default)s)")
+	parser.add_argument("--seed", type=int, default=None, help="seed of the random positions")
+	parser.add_argument("--limit", type=int, default=1 << 18, help="rho iterations per factor of 2^BITS-1 (default: %(default)s)")
+	args = parser.parse_args()
+
+	rand = random.Random(args.seed)
+	taps = parse_tap_positions(args.source or find_source())
+	failed, undecided = [], []
+	start = time.time()
+	for bits in (args.bits or sorted(taps)):
+		if bits not in taps:
+			print("BITS={0}: not in the polynomial table".format(bits))
+			failed.append(bits)
+			continue
+		lfsr = Lfsr(bits, taps[bits])
+		errors = []
+		if lfsr.step(lfsr.mask) != lfsr.mask: errors.append("all-ones is not the lock-up value")
+		maximal = lfsr.is_maximal(args.limit)
+		if maximal is False: errors.append("period is not 2^{0}-1".format(bits))
+		elif maximal is None: undecided.append(bits)
+		for _ in range(args.samples):
+			value = rand.randrange(lfsr.mask)  # any value except all-ones
+			position, window = rand.randrange(lfsr.period), rand.randint(1, 64)
+			expected = lfsr.jump(value, position)
+			for _ in range(window): expected = lfsr.step(expected)
+			if lfsr.jump(value, position + window) != expected: errors.append("jump-ahead differs from single steps")
+		if errors:
+			print("BITS={0}: FAILED: {1}".format(bits, "; ".join(sorted(set(errors)))))
+			failed.append(bits)
+	elapsed = time.time() - start
+
+	if undecided:
+		print("Period not proven for {0} widths, 2^BITS-1 not factorized: {1}".format(len(undecided), ",".join(map(str, undecided))))
+	if failed:
+		print("FAILED: {0} widths: {1}".format(len(failed), ",".join(map(str, failed))))
+		sys.exit(1)
+	print("PASSED: {0} widths in {1:.2f} s.".format(len(args.bits or taps), elapsed))
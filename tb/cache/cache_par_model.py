@@ -0,0 +1,128 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Reference models of PoC.cache_par and PoC.cache_par2
+#
+# Description:
+# ------------------------------------
+#	Reference models used by the Cocotb testbenches and the offline checker.
+#	PoC.cache_par2 executes a replace in two steps: step 1 (ReadWrite = 0)
+#	reads the old cache line, step 2 (ReadWrite = 1) writes the new one.
+#
+#	The trace event "cache_set" lists the valid cache lines of the accessed
+#	cache set in replacement order, i.e., the least-recently used first for LRU.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from bus_layout import BusLayout
+from cache_coverage import CacheCoverage
+from cache_model import CacheModel
+from model_trace import TRACE_LEVEL, TRACE_STATE, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+
+
+class CacheParModel(ReferenceModel):
+	"""Reference model of PoC.cache_par."""
+
+	def __init__(self, cache_lines, associativity, address_bits, data_bits, replacement_policy):
+		ReferenceModel.__init__(self, cache_lines=cache_lines, associativity=associativity, address_bits=address_bits,
+														data_bits=data_bits, replacement_policy=replacement_policy)
+		self.address_bits = address_bits
+		self.data_bits = data_bits
+		self.cache_lines = cache_lines      # total number of cache lines
+		self.associativity = associativity
+		self.replacement_policy = replacement_policy
+
+		# cache content, one array for all cache sets
+		self.cache = CacheModel(cache_lines, associativity, address_bits, replacement_policy)
+		self.cache_sets = self.cache.cache_sets       # number of cache sets
+		self.index_bits = self.cache.index_bits
+		self.index_mask = self.cache.index_mask
+		self.tag_mask = self.cache.tag_mask
+		# functional coverage, sampled by predict
+		self.coverage = CacheCoverage(self.cache)
+
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("geometry", index_bits=self.index_bits, index_mask=self.index_mask, tag_mask=self.tag_mask)
+
+		# packed output transactions: CacheLineOut, CacheHit, CacheMiss, OldAddress
+		self.output_layout = BusLayout([("CacheLineOut", data_bits), ("CacheHit", 1), ("CacheMiss", 1), ("OldAddress", address_bits)])
+		self.input_layout = BusLayout([("Request", 1), ("ReadWrite", 1), ("Invalidate", 1), ("Replace", 1),
+																	 ("Address", address_bits), ("CacheLineIn", data_bits)])
+		self.init_val = (None, 0, 0, None)
+
+	def replace(self, readWrite, address, cacheLineIn):
+		"""Execute a replace command, return (oldAddress, cacheLineOut)."""
+		self.coverage.sample_replace(address)
+		# check if a valid cache line will be replaced
+		oldAddress, cacheLineOut = self.cache.victim(address)
+
+		# actual replace
+		self.cache.replace(address, cacheLineIn)
+		return oldAddress, cacheLineOut
+
+	def predict(self, transaction):
+		'''Update the cache model and return the expected output transaction.'''
+		request, readWrite, invalidate, replace, address, cacheLineIn = transaction
+
+		index = address & self.index_mask
+		#tag = (address >> self.index_bits) & self.tag_mask
+
+		# expected outputs, None means ignore
+		cacheLineOut, cacheHit, cacheMiss, oldAddress = None, 0, 0, None
+		if request == 1:
+			cacheHit, cacheLineOut = self.cache.access(address, readWrite, invalidate, cacheLineIn)
+			cacheMiss = 1 - cacheHit
+			self.coverage.sample_request(readWrite, invalidate, cacheHit)
+
+		elif replace == 1:
+			oldAddress, cacheLineOut = self.replace(readWrite, address, cacheLineIn)
+
+		else:
+			self.coverage.sample_idle()
+
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS:
+			trace("predict", set=index, request=request, readWrite=readWrite, invalidate=invalidate, replace=replace, address=address,
+						cacheLineIn=cacheLineIn, cacheLineOut=cacheLineOut, hit=cacheHit, oldAddress=oldAddress)
+			if TRACE_LEVEL >= TRACE_STATE: trace("cache_set", set=index, lines=self.cache.items(index))
+		# pack all values, None means don't care
+		return self.output_layout.expected((cacheLineOut, cacheHit, cacheMiss, oldAddress))
+
+	def describe_model(self, transaction):
+		index = transaction[4] & self.index_mask
+		return "cache set {0} = {1!s}".format(index, self.cache.items(index))
+
+
+class CachePar2Model(CacheParModel):
+	"""Reference model of PoC.cache_par2."""
+
+	def replace(self, readWrite, address, cacheLineIn):
+		oldAddress, cacheLineOut = None, None
+		if readWrite == 0: # step 1
+			self.coverage.sample_replace(address)
+			# check if a valid cache line will be replaced
+			oldAddress, cacheLineOut = self.cache.victim(address)
+
+		else: # step 2
+			# actual replace
+			self.cache.replace(address, cacheLineIn)
+		return oldAddress, cacheLineOut
@@ -0,0 +1,83 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Cocotb Testbench:		Cyclic Redundancy Check (CRC)
+#
+# Description:
+# ------------------------------------
+#	Automated testbench for PoC.comm_crc
+#
+# The remainder is checked in each clock cycle against the table-driven
+# reference model in comm_crc_model.py. Only OUTPUT_REGS = true is supported.
+#
+# The independence of the CRC from the processing width BITS is checked
+# outside of the simulator by running comm_crc_model.py as script.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import random
+
+import cocotb
+from cocotb.regression import TestFactory
+from cocotb.result import TestFailure
+
+from cocotb_testbench import ModelTestbench, transaction_count
+from comm_crc_model import CrcModel
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from utils import vector_generic
+
+# ==============================================================================
+class Testbench(ModelTestbench):
+	def __init__(self, dut):
+		if str(dut.OUTPUT_REGS.value).strip().upper() in ("0", "FALSE"):
+			raise TestFailure("Unsupported configuration: OUTPUT_REGS=false")
+
+		model = CrcModel(vector_generic(dut.GEN.value), dut.BITS.value, vector_generic(dut.STARTUP_RMD.value))
+		self.reference_model = model
+		ModelTestbench.__init__(self, dut, model.input_layout, model.output_layout, model.init_val, clock="clk", reset=None)
+
+
+# ==============================================================================
+def random_input_gen(model, n=10000):
+	"""
+	Generate random input data to be applied by InputDriver.
+	Returns up to n input transactions as tuples in the order of model.input_layout.
+	"""
+	for _ in range(n):
+		command = random.randint(1,100)
+		# 5% set, 1% set and step, 84% step, 10% idle
+		set_ = 1 if command <= 6 else 0
+		step = 1 if (command == 6) or (command > 16) else 0
+		# every 4th set clears the remainder, so that, zero is also asserted
+		init = random.getrandbits(model.degree) if random.randint(0, 3) > 0 else 0
+		din = random.getrandbits(model.bits)
+		if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", set=set_, init=init, step=step, din=din)
+		yield (set_, init, step, din)
+
+@cocotb.coroutine
+def run_test(dut):
+	tb = Testbench(dut)
+	yield tb.run(random_input_gen(tb.reference_model, transaction_count(10000)))
+
+factory = TestFactory(run_test)
+factory.generate_tests()
@@ -0,0 +1,252 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Table-driven reference model of PoC.comm_crc
+#
+# Description:
+# ------------------------------------
+#	Reference model of PoC.comm_crc used by the Cocotb testbench and the offline
+#	checker. The generator polynomial GEN is given as integer including its
+#	most significant (hidden) 1, e.g., 0x11021 for CRC-16-CCITT.
+#
+#	One step of the CRC register is linear in the register value and the BITS
+#	message bits. Thus, it is computed by XORing one table entry per byte of
+#	the register and per byte of the message bits (slice-by-N). The tables are
+#	precomputed from GEN by the bit-serial reference step crc_step, which
+#	follows the VHDL code.
+#
+#	The tables are also evaluated by NumPy over many packets at once. Run this
+#	module as script to check that the CRC of random packets is independent
+#	of the processing width BITS, as claimed by PoC.comm_crc. The widths are
+#	evaluated in parallel by multiple processes, e.g.:
+#	  python comm_crc_model.py -g 0x104c11db7 -n 4000000
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+
+from bus_layout import BusLayout
+from func_coverage import CoverageGroup
+from model_trace import TRACE_LEVEL, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+
+
+def crc_degree(gen):
+	"""Return the degree of the generator polynomial gen, i.e., the width of the remainder."""
+	degree = gen.bit_length() - 1
+	if degree < 1: raise ValueError("Cannot use absolute constant as generator.")
+	return degree
+
+def crc_step(gen, state, data, bits):
+	"""Process the bits message bits of data, MSB first, bit by bit as PoC.comm_crc does."""
+	degree = crc_degree(gen)
+	poly, mask = gen & ((1 << degree) - 1), (1 << degree) - 1
+	for i in range(bits-1, -1, -1):
+		feedback = ((data >> i) ^ (state >> (degree-1))) & 1
+		state = ((state << 1) & mask) ^ (poly if feedback else 0)
+	return state
+
+
+class CrcTables(object):
+	"""
+	Slice-by-N tables of one step over bits message bits of generator gen. The
+	next register value is the XOR of one entry of state_tables per byte of the
+	register value and one entry of data_tables per byte of the message bits.
+	"""
+
+	def __init__(self, gen, bits):
+		self.degree = crc_degree(gen)
+		self.bits = bits
+		mask = (1 << self.degree) - 1
+		self.state_tables = [[crc_step(gen, (byte << shift) & mask, 0, bits) for byte in range(256)]
+												 for shift in range(0, self.degree, 8)]
+		self.data_tables = [[crc_step(gen, 0, byte << shift, bits) for byte in range(256)]
+												for shift in range(0, bits, 8)]
+		self._arrays = None
+
+	def step(self, state, data):
+		"""Return the next register value after processing data."""
+		result = 0
+		for table in self.state_tables:
+			result ^= table[state & 0xff]
+			state >>= 8
+		for table in self.data_tables:
+			result ^= table[data & 0xff]
+			data >>= 8
+		return result
+
+	def arrays(self):
+		"""Return the tables as NumPy arrays, requires a degree and bits of at most 64."""
+		if self._arrays is None:
+			import numpy as np
+			if (self.degree > 64) or (self.bits > 64):
+				raise ValueError("NumPy evaluation is limited to 64 bit, got degree {0} and {1} bits.".format(self.degree, self.bits))
+			self._arrays = ([np.array(table, np.uint64) for table in self.state_tables],
+											[np.array(table, np.uint64) for table in self.data_tables])
+		return self._arrays
+
+	def step_batch(self, states, data):
+		"""Like step, but over NumPy arrays of register values and message bits."""
+		import numpy as np
+		state_tables, data_tables = self.arrays()
+		result = np.zeros_like(states)
+		for i, table in enumerate(state_tables):
+			result ^= table[(states >> np.uint64(8*i)) & np.uint64(0xff)]
+		for i, table in enumerate(data_tables):
+			result ^= table[(data >> np.uint64(8*i)) & np.uint64(0xff)]
+		return result
+
+
+def packet_chunks(words, length, width):
+	"""
+	Yield the message bits of the packets in words, width bits per step. Each
+	row of the NumPy array words holds one packet of length bits, MSB first,
+	in 64-bit words. The length must be a multiple of width.
+	"""
+	import numpy as np
+	if length % width != 0: raise ValueError("Packet length {0} is not a multiple of width {1}.".format(length, width))
+	mask = np.uint64((1 << width) - 1)
+	for offset in range(0, length, width):
+		word, bit = divmod(offset, 64)
+		if bit + width <= 64:
+			yield (words[:, word] >> np.uint64(64 - bit - width)) & mask
+		else:
+			low = bit + width - 64
+			high = words[:, word] & np.uint64((1 << (64 - bit)) - 1)
+			yield (high << np.uint64(low)) | (words[:, word+1] >> np.uint64(64 - low))
+
+def crc_batch(tables, init, words, length):
+	"""Return the remainders of the packets in words (see packet_chunks) starting from the register values init."""
+	states = init.copy()
+	for data in packet_chunks(words, length, tables.bits):
+		states = tables.step_batch(states, data)
+	return states
+
+
+class CrcModel(ReferenceModel):
+	"""Reference model of PoC.comm_crc with OUTPUT_REGS = true."""
+
+	def __init__(self, gen, bits, startup_rmd=0):
+		ReferenceModel.__init__(self, gen=gen, bits=bits, startup_rmd=startup_rmd)
+		self.gen = gen
+		self.bits = bits
+		self.tables = CrcTables(gen, bits)
+		self.degree = self.tables.degree
+		self.mask = (1 << self.degree) - 1
+		# register value
+		self.rmd = startup_rmd & self.mask
+
+		self.input_layout = BusLayout([("set", 1), ("init", self.degree), ("step", 1), ("din", bits)])
+		self.output_layout = BusLayout([("rmd", self.degree), ("zero", 1)])
+		self.init_val = (self.rmd, 1 if self.rmd == 0 else 0)
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("crc")
+		self.cover_command = self.coverage.point("command", ("idle", "step", "set", "set_and_step"))
+
+	def predict(self, transaction):
+		'''Update the CRC register and return the expected output.'''
+		set_, init, step, din = transaction
+		if set_ == 1:
+			self.rmd = init & self.mask
+		elif step == 1:
+			self.rmd = self.tables.step(self.rmd, din)
+		self.cover_command.sample(2*set_ + step)
+
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("predict", set=set_, init=init, step=step, din=din, rmd=self.rmd)
+		return self.output_layout.expected((self.rmd, 1 if self.rmd == 0 else 0))
+
+	def describe_model(self, transaction):
+		return "remainder = 0x{0:0{1}x}".format(self.rmd, (self.degree + 3) // 4)
+
+
+def _check_widths(args):
+	"""Compute the CRC of one block of random packets for each width, return (packets, first mismatch or None)."""
+	import numpy as np
+	gen, widths, length, packets, seed = args
+	rand = np.random.RandomState(seed)
+	degree = crc_degree(gen)
+	words = rand.randint(0, 1 << 32, (packets, 2 * ((length + 63) // 64) + 2)).astype(np.uint64)
+	words = (words[:, 0::2] << np.uint64(32)) | words[:, 1::2]
+	init, words = words[:, 0] & np.uint64((1 << degree) - 1), words[:, 1:]
+
+	reference = None
+	for width in widths:
+		rmd = crc_batch(CrcTables(gen, width), init, words, length)
+		if reference is None:
+			reference, reference_width = rmd, width
+			# cross-check a few packets against the bit-serial reference step
+			for i in range(min(packets, 16)):
+				packet = sum([int(word) << (64 * (words.shape[1] - 1 - j)) for j, word in enumerate(words[i])]) >> (64 * words.shape[1] - length)
+				if crc_step(gen, int(init[i]), packet, length) != int(rmd[i]):
+					return packets, (seed, i, width, "bit-serial")
+			continue
+		mismatch = np.flatnonzero(rmd != reference)
+		if len(mismatch) > 0:
+			return packets, (seed, int(mismatch[0]), width, reference_width)
+	return packets, None
+
+
+if __name__ == "__main__":
+	import argparse
+	import multiprocessing
+	import sys
+	import time
+
+	parser = argparse.ArgumentParser(description="Check that the CRC of random packets is independent of the processing width.")
+	parser.add_argument("-g", "--gen", type=lambda text: int(text, 0), default=0x104c11db7,
+		help="generator polynomial including the hidden MSB (default: CRC-32, 0x104c11db7)")
+	parser.add_argument("-w", "--widths", default="1,2,3,4,5,8,12,16,24,48,60",
+		help="comma-separated processing widths of at most 64 bits (default: %(default)s)")
+	parser.add_argument("-l", "--length", type=int, default=240, help="packet length in bits, a multiple of each width (default: %(default)s)")
+	parser.add_argument("-n", "--packets", type=int, default=1000000, help="number of packets (default: %(default)s)")
+	parser.add_argument("-b", "--block", type=int, default=1 << 16, help="packets per block and process (default: %(default)s)")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="number of processes (default: number of CPUs)")
+	parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first block (default: %(default)s)")
+	args = parser.parse_args()
+
+	widths = [int(width) for width in args.widths.split(",")]
+	invalid = [width for width in widths if (width > 64) or (args.length % width != 0)]
+	if invalid: parser.error("widths must be at most 64 and divide the packet length, got {0!s}".format(invalid))
+	if crc_degree(args.gen) > 64: parser.error("generator degree must be at most 64")
+
+	blocks = [(args.gen, widths, args.length, min(args.block, args.packets - start), args.seed + i)
+						for i, start in enumerate(range(0, args.packets, args.block))]
+	start = time.time()
+	checked, failure = 0, None
+	pool = multiprocessing.Pool(args.jobs)
+	try:
+		for packets, mismatch in pool.imap_unordered(_check_widths, blocks):
+			checked += packets
+			if mismatch is not None:
+				failure = mismatch
+				break
+	finally:
+		pool.terminate()
+	elapsed = time.time() - start
+
+	if failure is not None:
+		print("FAILED: packet {1} of block with seed {0}: width {2} differs from {3}.".format(*failure))
+		sys.exit(1)
+	print("PASSED: {0} packets of {1} bits, widths {2}: {3:.0f} packets/s ({4:.0f} packet widths/s).".format(
+		checked, args.length, ",".join(map(str, widths)), checked / elapsed, checked * len(widths) / elapsed))
@@ -0,0 +1,131 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Cocotb Testbench:		Scrambler Mask Generator
+#
+# Description:
+# ------------------------------------
+#	Automated testbench for PoC.comm_scramble
+#
+# Test run_test checks the mask in each clock cycle against the reference
+# model in comm_scramble_model.py for random sets and steps.
+#
+# Test run_stream sets the LFSR once and then steps in each clock cycle. The
+# received mask words are collected and compared in bulk against the words of
+# MaskGenerator. The length of the stream is given in mask words by
+# POC_COCOTB_TRANSACTIONS, e.g., 15625000 words of 64 bits for 10^9 bits.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import random
+
+import numpy as np
+
+import cocotb
+from cocotb.regression import TestFactory
+from cocotb.result import TestFailure, TestSuccess
+from cocotb.triggers import RisingEdge
+
+from clock_source import start_clock
+from cocotb_testbench import ModelTestbench, transaction_count
+from comm_scramble_model import MaskGenerator, ScrambleModel, from_vector, pack_words
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from stimulus_trace import to_bytes
+from utils import vector_generic
+
+def create_model(dut):
+	return ScrambleModel(vector_generic(dut.GEN.value), dut.BITS.value)
+
+# ==============================================================================
+class Testbench(ModelTestbench):
+	def __init__(self, dut):
+		model = create_model(dut)
+		self.reference_model = model
+		ModelTestbench.__init__(self, dut, model.input_layout, model.output_layout, model.init_val, clock="clk", reset=None)
+
+
+# ==============================================================================
+def random_input_gen(model, n=10000):
+	"""
+	Generate random input data to be applied by InputDriver.
+	Returns up to n input transactions as tuples in the order of model.input_layout.
+	"""
+	for i in range(n):
+		command = random.randint(1,100)
+		# 2% set, 1% set and step, 87% step, 10% idle, but set the LFSR first
+		set_ = 1 if (command <= 3) or (i == 0) else 0
+		step = 1 if (command == 3) or (command > 13) else 0
+		din = random.getrandbits(model.degree)
+		if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", set=set_, din=din, step=step)
+		yield (set_, din, step)
+
+@cocotb.coroutine
+def run_test(dut):
+	tb = Testbench(dut)
+	yield tb.run(random_input_gen(tb.reference_model, transaction_count(10000)))
+
+@cocotb.coroutine
+def run_stream(dut):
+	"""Compare a long stream of mask words in bulk, see above."""
+	model = create_model(dut)
+	words = transaction_count(100000)
+	word_bytes = (model.bits + 7) // 8
+	generator = MaskGenerator(model.gen, model.bits, blocks_per_group=16)
+	lfsr = random.getrandbits(model.degree) or 1
+
+	clock = start_clock(dut.clk)
+	clkedge = RisingEdge(dut.clk)
+	dut.set <= 1
+	dut.din <= lfsr
+	dut.step <= 0
+	yield clkedge
+	dut.set <= 0
+	dut.step <= 1
+	# the first mask word is sampled at the second rising edge from here
+	yield clkedge
+
+	checked = 0
+	for expected in generator.words(lfsr, words):
+		values = []
+		for _ in range(len(expected)):
+			yield clkedge
+			values.append(int(dut.mask.value))
+		received = np.frombuffer(b"".join([to_bytes(value, word_bytes) for value in values]), np.uint8).reshape(len(values), word_bytes)
+		mismatch = np.flatnonzero((received != pack_words(expected)).any(axis=1))
+		if len(mismatch) > 0:
+			i = int(mismatch[0])
+			raise TestFailure("Mask word {0} of the stream from LFSR 0x{1:x}: expected {2:0{4}b}, received {3:0{4}b}.".format(
+				checked + i, lfsr, from_vector(expected[i]), values[i], model.bits))
+		checked += len(expected)
+		dut._log.info("Checked {0} mask words.".format(checked))
+
+	dut.step <= 0
+	clock.report()
+	clock.stop()
+	raise TestSuccess("Checked {0} mask words of {1} bits.".format(checked, model.bits))
+
+factory = TestFactory(run_test)
+factory.generate_tests()
+
+factory = TestFactory(run_stream)
+factory.generate_tests()
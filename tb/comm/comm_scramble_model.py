@@ -0,0 +1,259 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Reference model and mask generator of PoC.comm_scramble
+#
+# Description:
+# ------------------------------------
+#	Reference model of PoC.comm_scramble used by the Cocotb testbench and the
+#	offline checker. The generator polynomial GEN is given as integer including
+#	its most significant (hidden) 1.
+#
+#	The LFSR is linear over GF(2). Thus, one step of BITS mask bits is given by
+#	two precomputed matrices: mask = O * lfsr and lfsr' = T * lfsr. The
+#	per-cycle model applies them to the LFSR value held in one integer.
+#
+#	MaskGenerator emits long mask sequences of any width as NumPy bit arrays,
+#	one row per mask word, bit 0 first (little endian). The mask bits of a
+#	block of words are the product of the stacked output rows with the LFSR
+#	value at the start of the block. The LFSR values at the start of a group of
+#	blocks are the product of the stacked powers of the block transition with
+#	the LFSR value at the start of the group. All products are evaluated by
+#	NumPy. Only MaskGenerator requires NumPy, the per-cycle model does not.
+#
+#	Run this module as script to check the generator against the bit-serial
+#	reference step, and to check that the mask sequence is independent of the
+#	width at up to billions of bits, e.g.:
+#	  python comm_scramble_model.py -g 0x8000000001000001 -w 8,20,64 -n 1e9
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from bus_layout import BusLayout
+from func_coverage import CoverageGroup
+from model_trace import TRACE_LEVEL, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+
+
+def scramble_degree(gen):
+	"""Return the degree of the generator polynomial gen, i.e., the width of the LFSR."""
+	degree = gen.bit_length() - 1
+	if degree < 1: raise ValueError("Cannot use absolute constant as generator.")
+	return degree
+
+def scramble_step(gen, lfsr, bits):
+	"""Compute bits mask bits bit by bit as PoC.comm_scramble does, return (mask, next LFSR value)."""
+	degree = scramble_degree(gen)
+	poly, mask = gen & ((1 << degree) - 1), (1 << degree) - 1
+	result = 0
+	for i in range(bits):
+		msb = (lfsr >> (degree-1)) & 1
+		result |= msb << i
+		lfsr = ((lfsr << 1) & mask) ^ (poly if msb else 0)
+	return result, lfsr
+
+def mat_vec(columns, vector):
+	"""Multiply the GF(2) matrix given by its columns with the bit vector vector."""
+	result, j = 0, 0
+	while vector:
+		if vector & 1: result ^= columns[j]
+		vector >>= 1
+		j += 1
+	return result
+
+
+def _gf2(matrix):
+	"""Reduce an integer matrix modulo 2 to uint8."""
+	return (matrix.astype(np.int64) & 1).astype(np.uint8)
+
+def _gf2_dot(a, b):
+	"""Product of two GF(2) matrices, summed by BLAS in single precision (exact for up to 2^24 terms)."""
+	return _gf2(np.dot(a.astype(np.float32), b.astype(np.float32)))
+
+def to_vector(value, degree):
+	return np.array([(value >> i) & 1 for i in range(degree)], np.uint8)
+
+def from_vector(vector):
+	return sum([int(bit) << i for i, bit in enumerate(vector)])
+
+
+class MaskGenerator(object):
+	"""
+	Generates the mask sequence of generator gen in words of width bits, see
+	above. A block holds words_per_block words, a group blocks_per_group blocks.
+	"""
+
+	def __init__(self, gen, width, words_per_block=None, blocks_per_group=64):
+		if np is None: raise ImportError("MaskGenerator requires NumPy.")
+		self.degree = degree = scramble_degree(gen)
+		self.width = width
+		self.words_per_block = words_per_block or max(1, (1 << 16) // width)
+		self.blocks_per_group = blocks_per_group
+		self.block_bits = self.words_per_block * width
+
+		# one-bit transition A, column j is the next LFSR value of bit j
+		step = np.zeros((degree, degree), np.uint8)
+		for j in range(degree):
+			step[:, j] = to_vector(scramble_step(gen, 1 << j, 1)[1], degree)
+
+		# output rows of a block, row k is the mask bit k as function of the LFSR value
+		rows = np.zeros((1, degree), np.uint8)
+		rows[0, degree-1] = 1
+		power = step
+		while len(rows) < self.block_bits:
+			rows = np.vstack([rows, _gf2_dot(rows, power)])
+			power = _gf2_dot(power, power)
+		self.output_rows = rows[:self.block_bits].T.astype(np.float32)
+
+		# transition of a block and its stacked powers for a group of blocks
+		block = np.eye(degree, dtype=np.uint8)
+		bits, power = self.block_bits, step
+		while bits:
+			if bits & 1: block = _gf2_dot(power, block)
+			power = _gf2_dot(power, power)
+			bits >>= 1
+		powers = [np.eye(degree, dtype=np.uint8)]
+		for _ in range(blocks_per_group):
+			powers.append(_gf2_dot(block, powers[-1]))
+		self.group_powers = np.vstack(powers[:blocks_per_group]).astype(np.float32)
+		self.group_transition = powers[blocks_per_group].astype(np.float32)
+
+	def generate(self, lfsr):
+		"""Yield the mask words after setting the LFSR to lfsr, one group at a time as (words, width) bit arrays."""
+		vector = to_vector(lfsr, self.degree).astype(np.float32)
+		while True:
+			starts = _gf2(np.dot(self.group_powers, vector)).reshape(self.blocks_per_group, self.degree)
+			bits = _gf2(np.dot(starts.astype(np.float32), self.output_rows))
+			yield bits.reshape(-1, self.width)
+			vector = _gf2(np.dot(self.group_transition, vector)).astype(np.float32)
+
+	def words(self, lfsr, count):
+		"""Yield the first count mask words after setting the LFSR to lfsr in chunks of (words, width) bit arrays."""
+		for bits in self.generate(lfsr):
+			if count <= 0: break
+			yield bits[:count]
+			count -= len(bits)
+
+
+def pack_words(bits):
+	"""Pack (words, width) bit arrays into (words, bytes) arrays, little endian, as stimulus_trace.to_bytes."""
+	return np.packbits(bits, axis=1, bitorder="little")
+
+
+class ScrambleModel(ReferenceModel):
+	"""Reference model of PoC.comm_scramble."""
+
+	def __init__(self, gen, bits):
+		ReferenceModel.__init__(self, gen=gen, bits=bits)
+		self.gen = gen
+		self.bits = bits
+		self.degree = scramble_degree(gen)
+		# columns of the matrices O and T, see above
+		self.output_columns, self.transition_columns = zip(*[scramble_step(gen, 1 << j, bits) for j in range(self.degree)])
+		# LFSR value and mask register, unknown until the first set and step
+		self.lfsr = None
+		self.mask = None
+
+		self.input_layout = BusLayout([("set", 1), ("din", self.degree), ("step", 1)])
+		self.output_layout = BusLayout([("mask", bits)])
+		self.init_val = (None,)
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("scramble")
+		self.cover_command = self.coverage.point("command", ("idle", "step", "set", "set_and_step"))
+
+	def predict(self, transaction):
+		'''Update the LFSR and return the expected output.'''
+		set_, din, step = transaction
+		if set_ == 1:
+			self.lfsr = din
+		elif (step == 1) and (self.lfsr is not None):
+			self.mask = mat_vec(self.output_columns, self.lfsr)
+			self.lfsr = mat_vec(self.transition_columns, self.lfsr)
+		self.cover_command.sample(2*set_ + step)
+
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("predict", set=set_, din=din, step=step, lfsr=self.lfsr, mask=self.mask)
+		return self.output_layout.expected((self.mask,))
+
+	def describe_model(self, transaction):
+		if self.lfsr is None: return "LFSR = unknown"
+		return "LFSR = 0x{0:0{1}x}".format(self.lfsr, (self.degree + 3) // 4)
+
+
+if __name__ == "__main__":
+	import argparse
+	import random
+	import sys
+	import time
+	from stimulus_trace import to_bytes
+
+	parser = argparse.ArgumentParser(description="Check the mask generator and the width independence of PoC.comm_scramble.")
+	parser.add_argument("-g", "--gen", type=lambda text: int(text, 0), default=0x8000000001000001,
+		help="generator polynomial including the hidden MSB (default: x^63+x^24+1, %(default)#x)")
+	parser.add_argument("-w", "--widths", default="1,8,20,64,66", help="comma-separated mask widths (default: %(default)s)")
+	parser.add_argument("-n", "--bits", type=lambda text: int(float(text)), default=10**8, help="mask bits per width (default: %(default)s)")
+	parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the random LFSR value")
+	args = parser.parse_args()
+
+	widths = [int(width) for width in args.widths.split(",")]
+	degree = scramble_degree(args.gen)
+	lfsr = random.Random(args.seed).getrandbits(degree) or 1
+
+	# the bit-serial reference of a prefix, packed like the generator output
+	prefix = 1 << 12
+	serial = scramble_step(args.gen, lfsr, prefix)[0]
+	serial = np.unpackbits(np.frombuffer(to_bytes(serial, prefix // 8), np.uint8), bitorder="little")
+
+	failed = False
+	streams = [MaskGenerator(args.gen, width).words(lfsr, -(-args.bits // width)) for width in widths]
+	start, checked = time.time(), 0
+	pending = [np.zeros(0, np.uint8) for _ in widths]
+	while True:
+		chunks = [next(stream, None) for stream in streams]
+		for i, chunk in enumerate(chunks):
+			if chunk is not None: pending[i] = np.concatenate([pending[i], chunk.reshape(-1)])
+		size = min([len(bits) for bits in pending])
+		if size == 0: break
+		if (checked == 0) and not np.array_equal(pending[0][:min(prefix, size)], serial[:min(prefix, size)]):
+			print("FAILED: width {0} differs from the bit-serial reference.".format(widths[0]))
+			failed = True
+			break
+		for i in range(1, len(widths)):
+			mismatch = np.flatnonzero(pending[i][:size] != pending[0][:size])
+			if len(mismatch) > 0:
+				print("FAILED: bit {0} of width {1} differs from width {2}.".format(checked + int(mismatch[0]), widths[i], widths[0]))
+				failed = True
+		if failed: break
+		checked += size
+		pending = [bits[size:] for bits in pending]
+	elapsed = time.time() - start
+
+	if failed: sys.exit(1)
+	print("PASSED: {0} mask bits of widths {1} from LFSR 0x{2:x}: {3:.3g} bits/s per width.".format(
+		checked, ",".join(map(str, widths)), lfsr, checked * len(widths) / elapsed))
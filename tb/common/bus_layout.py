@@ -0,0 +1,89 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Signal layout of packed bus transactions
+#
+# Description:
+# ------------------------------------
+#	A BusLayout lists the signals of a bus together with their widths. The first
+#	signal is packed into the least significant bits of an integer. The shift
+#	and mask of each signal is precomputed.
+#
+#	This module does not depend on Cocotb, so that, it can also be used by
+#	offline tools, see packed_bus.py for the Cocotb drivers and monitors.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+class BusLayout(object):
+	"""Shift and mask table of the signals of a bus."""
+
+	def __init__(self, fields):
+		"""fields is a list of (signal name, width) pairs, least significant signal first."""
+		self.names = tuple([name for name, _ in fields])
+		self.widths = tuple([width for _, width in fields])
+		self.masks = tuple([2**width-1 for width in self.widths])
+		shifts, shift = [], 0
+		for width in self.widths:
+			shifts.append(shift)
+			shift += width
+		self.shifts = tuple(shifts)
+		self.width = shift
+		self._fields = tuple(zip(self.shifts, self.masks))
+
+	def pack(self, values):
+		"""Pack a sequence of integers in signal order into one integer."""
+		word = 0
+		for (shift, mask), value in zip(self._fields, values):
+			word |= (value & mask) << shift
+		return word
+
+	def unpack(self, word):
+		"""Return a tuple of the signal values in word."""
+		return tuple([(word >> shift) & mask for shift, mask in self._fields])
+
+	def expected(self, values):
+		"""Return an expected transaction (word, care). A value None means don't care."""
+		word, care = 0, 0
+		for (shift, mask), value in zip(self._fields, values):
+			if value is not None:
+				word |= (value & mask) << shift
+				care |= mask << shift
+		return word, care
+
+	def format(self, word, mask, wildcard):
+		"""Format the signals of word, signals not fully covered by mask are printed as wildcard."""
+		fields = []
+		for name, (shift, fieldMask) in zip(self.names, self._fields):
+			if (mask >> shift) & fieldMask == fieldMask:
+				fields.append("{0}={1:#x}".format(name, (word >> shift) & fieldMask))
+			else:
+				fields.append("{0}={1}".format(name, wildcard))
+		return ", ".join(fields)
+
+	def format_expected(self, transaction):
+		word, care = transaction
+		return self.format(word, care, "-")
+
+	def format_received(self, transaction):
+		word, unknown = transaction
+		return self.format(word, ~unknown, "X")
@@ -0,0 +1,85 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Batched bus sampling for Cocotb monitors
+#
+# Description:
+# ------------------------------------
+#	Samples all signals of a bus as integers with as few simulator accesses as
+#	possible.
+#
+#	The simulator handles of the signals are resolved once. Each signal is read
+#	by a single call into the simulator interface, which returns the binary
+#	string of the signal. This avoids the creation of a BinaryValue object per
+#	signal and clock cycle.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+try:
+	from cocotb import simulator
+except ImportError:
+	simulator = None
+
+def binstr_reader(handle):
+	"""
+	Return (read, raw) so that read(raw) returns the binary string of the signal
+	handle with a single simulator access. Falls back to handle.value.binstr if
+	the simulator interface of this Cocotb version is unknown.
+	"""
+	raw = getattr(handle, "_handle", None)
+	if raw is not None:
+		if hasattr(raw, "get_signal_val_binstr"):
+			return type(raw).get_signal_val_binstr, raw
+		if hasattr(simulator, "get_signal_val_binstr"):
+			return simulator.get_signal_val_binstr, raw
+	return (lambda h: h.value.binstr), handle
+
+
+class BusSampler(object):
+	"""
+	Samples the signals of a Cocotb Bus. signals is the list of signal names,
+	e.g. the _signals of a monitor. layout is the BusLayout of these signals,
+	which is required by sample_packed only.
+	"""
+
+	def __init__(self, bus, signals, layout=None):
+		handles = [getattr(bus, signal) for signal in signals]
+		self._signals = tuple([binstr_reader(handle) for handle in handles])
+		self.layout = layout
+		if layout is not None:
+			self._fields = tuple([(read, raw, shift, mask) for (read, raw), shift, mask in
+														zip(self._signals, layout.shifts, layout.masks)])
+
+	def sample(self):
+		"""Return the integer values of all signals as tuple. Raises ValueError if a signal is unresolvable."""
+		return tuple([int(read(raw), 2) for read, raw in self._signals])
+
+	def sample_packed(self):
+		"""Return the bus as tuple (word, unknown), see BusLayout."""
+		word, unknown = 0, 0
+		for read, raw, shift, mask in self._fields:
+			try:
+				word |= int(read(raw), 2) << shift
+			except ValueError:
+				unknown |= mask << shift
+		return word, unknown
@@ -0,0 +1,76 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Functional coverage of the cache testbenches
+#
+# Description:
+# ------------------------------------
+#	Cover points of PoC.cache_par and PoC.cache_par2, sampled by the reference
+#	model:
+#
+#	* command: each command of the cache,
+#	* request_hit: each request command crossed with hit and miss, e.g., an
+#	  invalidate on hit,
+#	* replace_way: each way crossed with a replace into a free cache line or an
+#	  eviction of a valid cache line,
+#	* replace_fill: the number of valid cache lines in the cache set before a
+#	  replace, i.e., from empty to full cache sets.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from func_coverage import CoverageGroup
+
+# bin index of a command: NOP, then the requests by 1 + readWrite + 2*invalidate, then replace
+COMMAND_BINS = ("NOP", "R", "W", "RI", "WI", "P")
+REPLACE = 5
+
+class CacheCoverage(CoverageGroup):
+	"""Functional coverage of a CacheModel."""
+
+	def __init__(self, cache, target=None):
+		CoverageGroup.__init__(self, "cache", target)
+		self.cache = cache
+		ways = cache.associativity
+		self.command = self.point("command", COMMAND_BINS)
+		self.request_hit = self.cross("request_hit", [COMMAND_BINS[1:REPLACE], ("miss", "hit")])
+		self.replace_way = self.cross("replace_way", [["way{0}".format(way) for way in range(ways)], ("free", "evict")])
+		self.replace_fill = self.point("replace_fill", range(ways + 1))
+
+	def sample_idle(self):
+		self.command.sample(0)
+
+	def sample_request(self, readWrite, invalidate, hit):
+		"""Sample a request, call it with the result of CacheModel.access."""
+		command = readWrite + 2 * invalidate
+		self.command.sample(1 + command)
+		self.request_hit.sample(command, hit)
+
+	def sample_replace(self, address):
+		"""Sample a replace, call it before CacheModel.replace."""
+		cache = self.cache
+		index = address & cache.index_mask
+		way = cache.policy.victim(index)
+		base = index * cache.associativity
+		self.command.sample(REPLACE)
+		self.replace_way.sample(way, cache.valid[base + way])
+		self.replace_fill.sample(sum(cache.valid[base:base + cache.associativity]))
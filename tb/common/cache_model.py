@@ -0,0 +1,248 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Set-associative cache model used by the Cocotb Testbenches
+#                     of PoC.cache_par and PoC.cache_par2
+#
+# Description:
+# ------------------------------------
+#	Provides a compact reference model of a set-associative cache.
+#
+#	All cache lines are stored in flat arrays of tags, valid bits and data
+#	words. The cache line of way w in cache set s has the number
+#	s*associativity + w. The cache set is selected by `address & index_mask`.
+#	The way to replace is selected by a replacement policy model from
+#	cache_policy.py.
+#
+#	`hit_rate` replays an address trace through the model, e.g., to compare
+#	replacement policies before synthesis. It can be called from command line:
+#
+#	  python cache_model.py [--policy=LRU] <lines> <ways> <address_bits> <tracefile>
+#
+#	The script can be started from any directory, e.g., as
+#	"python tb/common/cache_model.py", because Python imports the shared
+#	modules from the directory of the script. Other scripts importing this
+#	module need tb/common in PYTHONPATH. The trace file lists one address per
+#	line, decimal or hexadecimal with prefix 0x.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+from array import array
+
+from utils import log2ceil
+from cache_policy import create_policy
+
+class CacheGeometry(object):
+	"""Split of an address into cache-set index and tag."""
+
+	def __init__(self, cache_lines, associativity, address_bits):
+		self.cache_lines = cache_lines
+		self.associativity = associativity
+		self.address_bits = address_bits
+		self.cache_sets = cache_lines // associativity
+
+		self.index_bits = log2ceil(self.cache_sets)
+		self.tag_bits = address_bits - self.index_bits
+		self.index_mask = 2**self.index_bits-1
+		self.tag_mask = 2**self.tag_bits-1
+
+	def split(self, address):
+		"""Return (index, tag) of address."""
+		return address & self.index_mask, (address >> self.index_bits) & self.tag_mask
+
+
+def _tag_array(tag_bits, value, length):
+	"""
+	Return a flat array of length tags initialized to value, which has tag_bits+1
+	bits. Tags wider than the unsigned integer arrays are stored in a list.
+	"""
+	for typecode in ("L", "Q"):
+		try:
+			if array(typecode).itemsize * 8 > tag_bits: return array(typecode, [value]) * length
+		except ValueError:      # typecode Q requires Python 3.3
+			pass
+	return [value] * length
+
+
+class CacheModel(CacheGeometry):
+	"""
+	Set-associative cache with a selectable replacement policy.
+
+	With policy LRU, the model behaves like one LeastRecentlyUsedDict per cache
+	set which maps addresses to cache line contents, but uses only a few flat
+	arrays. The seed is passed to the policy model.
+	"""
+
+	def __init__(self, cache_lines, associativity, address_bits, policy="LRU", seed=None):
+		CacheGeometry.__init__(self, cache_lines, associativity, address_bits)
+		if self.tag_bits < 0:
+			raise ValueError("Unsupported configuration: {0} address bits cannot index {1} cache sets.".format(
+				address_bits, self.cache_sets))
+
+		# tag of an invalid cache line, never equal to a valid tag
+		self._no_tag = self.tag_mask + 1
+		self.tags = _tag_array(self.tag_bits, self._no_tag, cache_lines)
+		self.valid = bytearray(cache_lines)
+		self.data = [None] * cache_lines
+		self.policy = create_policy(policy, self.cache_sets, associativity, seed)
+
+	def lookup(self, address):
+		"""Return the cache line number holding address, or -1 if address is not cached."""
+		base = (address & self.index_mask) * self.associativity
+		try:
+			return base + self.tags[base:base + self.associativity].index((address >> self.index_bits) & self.tag_mask)
+		except ValueError:
+			return -1
+
+	def __contains__(self, address):
+		return self.lookup(address) >= 0
+
+	def _victim_line(self, index):
+		"""Return the cache line of cache set index selected by the replacement policy."""
+		return index * self.associativity + self.policy.victim(index)
+
+	def _line_address(self, line):
+		return (int(self.tags[line]) << self.index_bits) | (line // self.associativity)
+
+	def access(self, address, readWrite, invalidate, cacheLineIn=None):
+		"""
+		Execute a request to the cache.
+		Returns (1, cache line content) on a read hit, (1, None) on a write hit, and
+		(0, None) on a miss. A hit is reported to the replacement policy, or frees
+		the cache line if invalidate is 1.
+		"""
+		line = self.lookup(address)
+		if line < 0: return 0, None
+		index = address & self.index_mask
+
+		cacheLineOut = None
+		if readWrite == 1:
+			self.data[line] = cacheLineIn
+		else:
+			cacheLineOut = self.data[line]
+
+		if invalidate == 1:
+			self.tags[line] = self._no_tag
+			self.valid[line] = 0
+			self.data[line] = None
+			self.policy.invalidate(index, line - index * self.associativity)
+		else:
+			self.policy.access(index, line - index * self.associativity)
+		return 1, cacheLineOut
+
+	def victim(self, address):
+		"""
+		Return (address, content) of the cache line which will be replaced when
+		address is inserted, or (None, None) if the replacement policy selects an
+		unused cache line. All policies select an unused cache line first, if the
+		cache set has one, see cache_policy.py.
+		"""
+		line = self._victim_line(address & self.index_mask)
+		if not self.valid[line]: return None, None
+		return self._line_address(line), self.data[line]
+
+	def replace(self, address, cacheLineIn=None):
+		"""
+		Insert address into the cache by replacing the cache line selected by the
+		replacement policy. If address is already cached, only the content is updated.
+		"""
+		index, tag = self.split(address)
+		line = self.lookup(address)
+		if line < 0:
+			line = self._victim_line(index)
+			self.tags[line] = tag
+			self.valid[line] = 1
+			self.policy.insert(index, line - index * self.associativity)
+		else:
+			self.policy.access(index, line - index * self.associativity)
+		self.data[line] = cacheLineIn
+
+	def items(self, index):
+		"""
+		Return the (address, content) pairs of the valid cache lines of cache set
+		index in replacement order, e.g., least-recently used first for LRU.
+		"""
+		base = index * self.associativity
+		lines = [base + way for way in self.policy.order(index)]
+		return [(self._line_address(line), self.data[line]) for line in lines if self.valid[line]]
+
+
+def hit_rate(addresses, cache_lines, associativity, address_bits, policy="LRU", seed=None):
+	"""
+	Replay an iterable of addresses through a cache which allocates a cache line
+	on every miss. Returns a tuple (hits, misses, evictions).
+	"""
+	cache = CacheModel(cache_lines, associativity, address_bits, policy, seed)
+	policy = cache.policy
+	tags, valid = cache.tags, cache.valid
+	index_bits, index_mask, tag_mask = cache.index_bits, cache.index_mask, cache.tag_mask
+
+	hits, misses, evictions = 0, 0, 0
+	for address in addresses:
+		index = address & index_mask
+		tag = (address >> index_bits) & tag_mask
+		base = index * associativity
+		try:
+			way = tags[base:base + associativity].index(tag)
+			policy.access(index, way)
+			hits += 1
+		except ValueError:
+			way = policy.victim(index)
+			if valid[base + way]: evictions += 1
+			tags[base + way] = tag
+			valid[base + way] = 1
+			policy.insert(index, way)
+			misses += 1
+	return hits, misses, evictions
+
+def read_trace(filename):
+	"""Yield the addresses of a trace file, one decimal or hexadecimal (0x) address per line."""
+	with open(filename) as trace:
+		for line in trace:
+			line = line.strip()
+			if line and not line.startswith("#"):
+				yield int(line, 0)
+
+
+if __name__ == "__main__":
+	import argparse
+	from timeit import default_timer as timer
+	from cache_policy import POLICIES
+
+	parser = argparse.ArgumentParser(description="Replay an address trace through a set-associative cache model.")
+	parser.add_argument("--policy", default="LRU", help="replacement policy: {0}, or ALL".format(", ".join(sorted(POLICIES))))
+	parser.add_argument("--seed", type=int, default=None, help="seed of policy RAND")
+	parser.add_argument("cache_lines", type=int)
+	parser.add_argument("associativity", type=int)
+	parser.add_argument("address_bits", type=int)
+	parser.add_argument("trace")
+	args = parser.parse_args()
+
+	addresses = list(read_trace(args.trace))
+	policies = sorted(POLICIES) if args.policy.upper() == "ALL" else [args.policy]
+	for name in policies:
+		start = timer()
+		hits, misses, evictions = hit_rate(addresses, args.cache_lines, args.associativity, args.address_bits, name, args.seed)
+		print("{0:>5}: hit rate {1:7.3%}, {2} hits, {3} misses, {4} evictions ({5:.2f} s)".format(
+			name, float(hits) / max(1, hits + misses), hits, misses, evictions, timer() - start))
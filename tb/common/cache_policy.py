@@ -0,0 +1,272 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Cache replacement policy models
+#
+# Description:
+# ------------------------------------
+#	Provides one model class for each replacement policy of
+#	PoC.cache.replacement_policy:
+#
+#	* RR    - round robin
+#	* RAND  - random
+#	* CLOCK - clock algorithm
+#	* LRU   - least recently used
+#	* LFU   - least frequently used
+#
+#	All models keep the state of all cache sets in flat arrays and share the
+#	same interface. A cache set is identified by its index, a cache line within
+#	this set by its way:
+#
+#	* access(index, way)      tag hit without invalidate (read or write)
+#	* invalidate(index, way)  tag hit with invalidate, the cache line is freed
+#	* insert(index, way)      a new cache line was stored by a replace command
+#	* victim(index)           the way which will be replaced next (ReplaceWay)
+#	* order(index)            all ways in replacement order, e.g., LRU order
+#
+#	All policies replace an invalid way first, if the cache set has one. The
+#	victim is stable until the next insert into or invalidate of the same cache
+#	set. Use `create_policy` to select the model by the value of the VHDL
+#	generic REPLACEMENT_POLICY.
+#
+#	PoC.cache_replacement_policy implements only LRU yet, see RTL_POLICIES.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import random
+from array import array
+
+class ReplacementPolicy(object):
+	"""Base class of all replacement policy models."""
+	NAME = None
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		self.cache_sets = cache_sets
+		self.associativity = associativity
+
+	def _invalid_way(self, index):
+		"""Return the lowest invalid way of cache set index, or -1. Requires the array valid."""
+		base = index * self.associativity
+		way = self.valid.find(0, base, base + self.associativity)
+		return way - base if way >= 0 else -1
+
+	def access(self, index, way):
+		pass
+
+	def invalidate(self, index, way):
+		pass
+
+	def insert(self, index, way):
+		pass
+
+	def victim(self, index):
+		raise NotImplementedError()
+
+	def order(self, index):
+		"""Return the ways of cache set index in replacement order, i.e., the next victim of the valid ways first."""
+		return list(range(self.associativity))
+
+	def _rotated(self, first):
+		return [(first + i) % self.associativity for i in range(self.associativity)]
+
+
+class RoundRobinPolicy(ReplacementPolicy):
+	"""Replace the ways of a cache set one after another, after the invalid ways are filled."""
+	NAME = "RR"
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		ReplacementPolicy.__init__(self, cache_sets, associativity)
+		self.pointer = array("L", [0]) * cache_sets
+		self.valid = bytearray(cache_sets * associativity)
+
+	def invalidate(self, index, way):
+		self.valid[index * self.associativity + way] = 0
+
+	def insert(self, index, way):
+		self.valid[index * self.associativity + way] = 1
+		if way == self.pointer[index]:
+			self.pointer[index] = (way + 1) % self.associativity
+
+	def victim(self, index):
+		way = self._invalid_way(index)
+		return way if way >= 0 else self.pointer[index]
+
+	def order(self, index):
+		return self._rotated(self.pointer[index])
+
+
+class RandomPolicy(ReplacementPolicy):
+	"""
+	Replace a random way, if no way is invalid. The random sequence is
+	reproducible by seed, so that, two instances with the same seed and the
+	same commands select the same victims.
+	"""
+	NAME = "RAND"
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		ReplacementPolicy.__init__(self, cache_sets, associativity)
+		self._random = random.Random(0 if seed is None else seed)
+		self.next_victim = array("L", [self._random.randrange(associativity) for _ in range(cache_sets)])
+		self.valid = bytearray(cache_sets * associativity)
+
+	def invalidate(self, index, way):
+		self.valid[index * self.associativity + way] = 0
+
+	def insert(self, index, way):
+		self.valid[index * self.associativity + way] = 1
+		self.next_victim[index] = self._random.randrange(self.associativity)
+
+	def victim(self, index):
+		way = self._invalid_way(index)
+		return way if way >= 0 else self.next_victim[index]
+
+	def order(self, index):
+		return self._rotated(self.next_victim[index])
+
+
+class ClockPolicy(ReplacementPolicy):
+	"""
+	Second-chance algorithm: Each cache line has a reference bit, which is set
+	on access. The clock hand of a cache set skips referenced cache lines while
+	clearing their reference bits. Invalid ways are replaced first without
+	moving the clock hand.
+	"""
+	NAME = "CLOCK"
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		ReplacementPolicy.__init__(self, cache_sets, associativity)
+		self.referenced = bytearray(cache_sets * associativity)
+		self.hand = array("L", [0]) * cache_sets
+		self.valid = bytearray(cache_sets * associativity)
+
+	def access(self, index, way):
+		self.referenced[index * self.associativity + way] = 1
+
+	def invalidate(self, index, way):
+		self.referenced[index * self.associativity + way] = 0
+		self.valid[index * self.associativity + way] = 0
+
+	def insert(self, index, way):
+		self.referenced[index * self.associativity + way] = 1
+		self.valid[index * self.associativity + way] = 1
+		self.hand[index] = (way + 1) % self.associativity
+
+	def victim(self, index):
+		way = self._invalid_way(index)
+		if way >= 0: return way
+		base = index * self.associativity
+		way = self.hand[index]
+		while self.referenced[base + way]:
+			self.referenced[base + way] = 0
+			way = (way + 1) % self.associativity
+		self.hand[index] = way
+		return way
+
+	def order(self, index):
+		"""Clock order from the hand, the unreferenced ways first. Does not move the hand."""
+		base = index * self.associativity
+		return sorted(self._rotated(self.hand[index]), key=lambda way: self.referenced[base + way])
+
+
+class LeastRecentlyUsedPolicy(ReplacementPolicy):
+	"""
+	A per-set age counter stamps each access, the way with the smallest age is
+	the least-recently used one. Invalid ways have age 0, so that, they are
+	replaced first. This matches PoC.sort.lru_cache, which moves freed keys to
+	the least-recently used position.
+	"""
+	NAME = "LRU"
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		ReplacementPolicy.__init__(self, cache_sets, associativity)
+		self.ages = array("d", [0]) * (cache_sets * associativity)      # exact integers up to 2**53
+		self.set_age = array("d", [0]) * cache_sets
+
+	def access(self, index, way):
+		age = self.set_age[index] + 1
+		self.set_age[index] = age
+		self.ages[index * self.associativity + way] = age
+
+	insert = access
+
+	def invalidate(self, index, way):
+		self.ages[index * self.associativity + way] = 0
+
+	def victim(self, index):
+		base = index * self.associativity
+		ages = self.ages[base:base + self.associativity]
+		return ages.index(min(ages))
+
+	def order(self, index):
+		"""LRU order, the least-recently used way first."""
+		base = index * self.associativity
+		return sorted(range(self.associativity), key=lambda way: self.ages[base + way])
+
+
+class LeastFrequentlyUsedPolicy(ReplacementPolicy):
+	"""
+	Each cache line counts its accesses since it was inserted. The way with the
+	lowest count is replaced, ties are broken by the lowest way. Invalid ways
+	have count 0.
+	"""
+	NAME = "LFU"
+
+	def __init__(self, cache_sets, associativity, seed=None):
+		ReplacementPolicy.__init__(self, cache_sets, associativity)
+		self.counts = array("d", [0]) * (cache_sets * associativity)
+
+	def access(self, index, way):
+		self.counts[index * self.associativity + way] += 1
+
+	def invalidate(self, index, way):
+		self.counts[index * self.associativity + way] = 0
+
+	def insert(self, index, way):
+		self.counts[index * self.associativity + way] = 1
+
+	def victim(self, index):
+		base = index * self.associativity
+		counts = self.counts[base:base + self.associativity]
+		return counts.index(min(counts))
+
+	def order(self, index):
+		base = index * self.associativity
+		return sorted(range(self.associativity), key=lambda way: self.counts[base + way])
+
+
+POLICIES = dict((policy.NAME, policy) for policy in
+								(RoundRobinPolicy, RandomPolicy, ClockPolicy, LeastRecentlyUsedPolicy, LeastFrequentlyUsedPolicy))
+
+# policies implemented by PoC.cache_replacement_policy
+RTL_POLICIES = ("LRU",)
+
+def create_policy(name, cache_sets, associativity, seed=None):
+	"""
+	Create the model for replacement policy name, e.g. the value of generic
+	REPLACEMENT_POLICY. Raises ValueError for an unknown policy.
+	"""
+	try:
+		policy = POLICIES[name.strip().upper()]
+	except KeyError:
+		raise ValueError("Unknown replacement policy: {0}".format(name))
+	return policy(cache_sets, associativity, seed)
@@ -0,0 +1,223 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Random stimulus for the cache testbenches
+#
+# Description:
+# ------------------------------------
+#	Generates random requests and replace commands for PoC.cache_par and
+#	PoC.cache_par2.
+#
+#	It is forbidden to replace a cache line when the new address is already
+#	within the cache. Thus, the generator tracks the tags of each cache set
+#	with a CacheModel. The address of a replace command is drawn from the pool
+#	of free tags of the cache set, i.e., the tags which are not resident. One
+#	random number is drawn from the size of the pool and then mapped to the
+#	free tag of this rank by skipping over the (sorted) resident tags. Thus, a
+#	legal replace address is found in one step independent of the tag space.
+#	If the pool is empty, then no operation is issued instead.
+#
+#	All random numbers are drawn from a private random generator, so that, the
+#	stimulus is reproducible from the seed only.
+#
+#	The coverage-directed stimulus samples a CacheCoverage on the tracked
+#	cache content, which counts the same as the coverage of the testbench, but
+#	without the delay of the input monitor. The command mix is re-weighted by a
+#	CoverageDirector towards the holes. Additional alternatives are requests
+#	to a resident address, which hit, and replace commands into one focus
+#	cache set, which fill up the set and then evict each way.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import random
+
+from cache_coverage import CacheCoverage, REPLACE
+from cache_model import CacheModel
+from func_coverage import CoverageDirector
+
+# (request, readWrite, invalidate, replace) of the commands, 1/6 each
+COMMANDS = (
+	(0, 0, 0, 0),		# no operation
+	(0, 0, 0, 1),		# replace
+	(1, 1, 1, 0),		# write and invalidate
+	(1, 0, 1, 0),		# read and invalidate
+	(1, 1, 0, 0),		# write
+	(1, 0, 0, 0)		# read
+)
+
+class CacheStimulus(object):
+	"""
+	Random transactions (request, readWrite, invalidate, replace, address,
+	cacheLineIn) for a cache with the given geometry and replacement policy.
+	"""
+
+	def __init__(self, cache_lines, associativity, address_bits, data_bits, policy="LRU", seed=None):
+		self.cache = CacheModel(cache_lines, associativity, address_bits, policy)
+		self.data_bits = data_bits
+		self.seed = seed
+		self.random = random.Random(seed)
+
+	def free_address(self, index):
+		"""
+		Return a random address of cache set index, which is not within the cache,
+		or None if all tags of the cache set are resident.
+		"""
+		cache = self.cache
+		base = index * cache.associativity
+		resident = sorted(cache.tags[base:base + cache.associativity])
+		# Invalid cache lines hold the tag tag_mask+1, which is greater than every rank.
+		free = cache.tag_mask + 1 - sum(1 for tag in resident if tag <= cache.tag_mask)
+		if free == 0: return None
+		rank = int(self.random.random() * free)
+		for tag in resident:
+			if tag > rank: break
+			rank += 1
+		return (rank << cache.index_bits) | index
+
+	def transactions(self, n):
+		"""Yield n random transactions and update the tracked cache content."""
+		cache = self.cache
+		access, replace = cache.access, cache.replace
+		index_mask = cache.index_mask
+		free_address = self.free_address
+		rand = self.random.random
+		getrandbits = self.random.getrandbits
+		address_bits, data_bits = cache.address_bits, self.data_bits
+
+		for _ in range(n):
+			command = COMMANDS[int(rand() * 6)]
+			request, readWrite, invalidate, isReplace = command
+			address = getrandbits(address_bits)
+			if isReplace == 1:
+				address = free_address(address & index_mask)
+				if address is None:
+					# the tag space is exhausted, no replace possible
+					command, address = COMMANDS[0], 0
+				else:
+					replace(address)
+			elif request == 1:
+				access(address, readWrite, invalidate)
+			yield command + (address, getrandbits(data_bits))
+
+	def directed_transactions(self, n, boost=None):
+		"""
+		Yield n transactions like transactions, but directed towards the holes of
+		the functional coverage self.coverage.
+		"""
+		cache = self.cache
+		coverage = self.coverage = CacheCoverage(cache)
+		access, replace = cache.access, cache.replace
+		tags, valid = cache.tags, cache.valid
+		associativity, index_bits, index_mask = cache.associativity, cache.index_bits, cache.index_mask
+		free_address = self.free_address
+		rand = self.random.random
+		getrandbits = self.random.getrandbits
+		address_bits, data_bits = cache.address_bits, self.data_bits
+		focus = int(rand() * cache.cache_sets)
+
+		# alternatives: no operation, replace into a random / the focus cache set,
+		# then the requests (1 + readWrite + 2*invalidate) to a random / resident address
+		requests = range(len(coverage.request_hit.bins) // 2)
+		director = CoverageDirector(coverage,
+			[1, 1, 0] + [1 for request in requests] + [0 for request in requests],
+			[[(coverage.command, 0)], [(coverage.command, REPLACE)],
+			 [(coverage.replace_way, way) for way in range(len(coverage.replace_way.bins))] +
+			 [(coverage.replace_fill, fill) for fill in range(len(coverage.replace_fill.bins))]] +
+			[[(coverage.command, 1 + request), (coverage.request_hit, 2 * request)] for request in requests] +
+			[[(coverage.request_hit, 2 * request + 1)] for request in requests],
+			boost, rand)
+
+		for _ in range(n):
+			alternative = director.choose()
+			address = getrandbits(address_bits)
+			if alternative < 3:
+				command = COMMANDS[0]
+				if alternative > 0:
+					address = free_address(focus if alternative == 2 else address & index_mask)
+					if address is None:
+						# the tag space is exhausted, no replace possible
+						address = 0
+					else:
+						command = COMMANDS[1]
+						coverage.sample_replace(address)
+						replace(address)
+				if command[3] == 0: coverage.sample_idle()
+			else:
+				request = alternative - 3
+				if request >= len(requests):
+					request -= len(requests)
+					# a few tries to find a valid cache line, the random address is used otherwise
+					for _ in range(associativity):
+						line = int(rand() * len(valid))
+						if valid[line]:
+							address = (int(tags[line]) << index_bits) | (line // associativity)
+							break
+				readWrite, invalidate = request & 1, request >> 1
+				command = (1, readWrite, invalidate, 0)
+				coverage.sample_request(readWrite, invalidate, access(address, readWrite, invalidate)[0])
+			yield command + (address, getrandbits(data_bits))
+
+
+if __name__ == "__main__":
+	import argparse
+	from timeit import default_timer as timer
+
+	parser = argparse.ArgumentParser(description="Measure the throughput and the coverage closure of the random cache stimulus.")
+	parser.add_argument("--policy", default="LRU")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("-n", type=int, default=10**6, help="number of transactions")
+	parser.add_argument("--directed", action="store_true", help="coverage-directed stimulus")
+	parser.add_argument("--coverage", action="store_true",
+		help="apply the stimulus to a cache model like the testbench and report when all bins are covered")
+	parser.add_argument("cache_lines", type=int)
+	parser.add_argument("associativity", type=int)
+	parser.add_argument("address_bits", type=int)
+	parser.add_argument("data_bits", type=int)
+	args = parser.parse_args()
+
+	stimulus = CacheStimulus(args.cache_lines, args.associativity, args.address_bits, args.data_bits, args.policy, args.seed)
+	transactions = stimulus.directed_transactions(args.n) if args.directed else stimulus.transactions(args.n)
+	if args.coverage:
+		cache = CacheModel(args.cache_lines, args.associativity, args.address_bits, args.policy)
+		coverage = CacheCoverage(cache)
+		closure = None
+	start = timer()
+	replaces = 0
+	for i, (request, readWrite, invalidate, replace, address, _) in enumerate(transactions):
+		replaces += replace
+		if args.coverage:
+			if request == 1:
+				coverage.sample_request(readWrite, invalidate, cache.access(address, readWrite, invalidate)[0])
+			elif replace == 1:
+				coverage.sample_replace(address)
+				cache.replace(address)
+			else:
+				coverage.sample_idle()
+			if (closure is None) and coverage.done: closure = i + 1
+	elapsed = timer() - start
+	print("{0} transactions with {1} replace commands in {2:.2f} s ({3:.0f} transactions/s)".format(
+		args.n, replaces, elapsed, args.n / elapsed))
+	if args.coverage:
+		print("All bins covered after {0} transactions.".format(closure) if closure else
+			"Not covered: " + ", ".join(["{0}.{1}".format(point.name, bin) for point in coverage.points for bin in point.holes()]))
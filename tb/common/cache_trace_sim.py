@@ -0,0 +1,394 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Vectorized offline simulator of PoC.cache_par
+#
+# Description:
+# ------------------------------------
+#	Replays an address/command trace through a set-associative cache without
+#	an HDL simulation. The simulator computes per-set hit, miss and eviction
+#	statistics and the exact sequence of OldAddress values which PoC.cache_par
+#	outputs for the replace commands in the trace.
+#
+#	The trace is processed in chunks, so that, memory usage is bounded. Within
+#	a chunk, the n-th accesses to all cache sets are applied together as NumPy
+#	vector operations. Thus, the throughput scales with the number of cache sets.
+#
+#	Commands use the encoding of TraceSimulator.COMMANDS:
+#
+#	  R (read), W (write), RI / WI (read / write with invalidate), P (replace)
+#
+#	A trace is either a text file with lines "<command> <address>" or just
+#	"<address>" for reads, or a NumPy .npy file. A .npy file holds either
+#	addresses only or records with the fields 'command' and 'address'.
+#
+#	Like the models in cache_policy.py, all policies replace the lowest invalid
+#	way of a cache set first. RAND uses a different random number generator,
+#	the other policies select the same victims as cache_policy.py. Option
+#	--check=N compares these policies against CacheModel on a random trace of
+#	N commands. This module requires NumPy.
+#
+#	Usage:
+#	  python cache_trace_sim.py [--policy=LRU] [--allocate] [--chunk=N]
+#	                            [--old-address=<file>] [--per-set=<csv>]
+#	                            <lines> <ways> <address_bits> <trace>
+#	  python cache_trace_sim.py --check=N <lines> <ways> <address_bits>
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+
+import numpy as np
+
+from cache_model import CacheGeometry, CacheModel
+
+
+class _VectorPolicy(object):
+	"""
+	Replacement policy state of all cache sets. Each method gets arrays of
+	distinct cache sets. victim is only called for cache sets without an
+	invalid way.
+	"""
+	def __init__(self, cache_sets, associativity, seed):
+		self.associativity = associativity
+
+	def access(self, sets, ways):
+		pass
+
+	def invalidate(self, sets, ways):
+		pass
+
+	def insert(self, sets, ways):
+		pass
+
+
+class _RoundRobin(_VectorPolicy):
+	def __init__(self, cache_sets, associativity, seed):
+		_VectorPolicy.__init__(self, cache_sets, associativity, seed)
+		self.pointer = np.zeros(cache_sets, dtype=np.int64)
+
+	def insert(self, sets, ways):
+		advance = ways == self.pointer[sets]
+		self.pointer[sets[advance]] = (ways[advance] + 1) % self.associativity
+
+	def victim(self, sets):
+		return self.pointer[sets]
+
+
+class _Random(_VectorPolicy):
+	def __init__(self, cache_sets, associativity, seed):
+		_VectorPolicy.__init__(self, cache_sets, associativity, seed)
+		self._random = np.random.RandomState(0 if seed is None else seed)
+		self.next_victim = self._random.randint(0, associativity, cache_sets)
+
+	def insert(self, sets, ways):
+		self.next_victim[sets] = self._random.randint(0, self.associativity, len(sets))
+
+	def victim(self, sets):
+		return self.next_victim[sets]
+
+
+class _Clock(_VectorPolicy):
+	def __init__(self, cache_sets, associativity, seed):
+		_VectorPolicy.__init__(self, cache_sets, associativity, seed)
+		self.referenced = np.zeros((cache_sets, associativity), dtype=np.bool_)
+		self.hand = np.zeros(cache_sets, dtype=np.int64)
+
+	def access(self, sets, ways):
+		self.referenced[sets, ways] = True
+
+	def invalidate(self, sets, ways):
+		self.referenced[sets, ways] = False
+
+	def insert(self, sets, ways):
+		self.referenced[sets, ways] = True
+		self.hand[sets] = (ways + 1) % self.associativity
+
+	def victim(self, sets):
+		hand = self.hand[sets]
+		searching = self.referenced[sets, hand]
+		while searching.any():
+			s, h = sets[searching], hand[searching]
+			self.referenced[s, h] = False
+			hand[searching] = (h + 1) % self.associativity
+			searching[searching] = self.referenced[s, hand[searching]]
+		self.hand[sets] = hand
+		return hand
+
+
+class _LeastRecentlyUsed(_VectorPolicy):
+	def __init__(self, cache_sets, associativity, seed):
+		_VectorPolicy.__init__(self, cache_sets, associativity, seed)
+		self.ages = np.zeros((cache_sets, associativity), dtype=np.int64)
+		self.set_age = np.zeros(cache_sets, dtype=np.int64)
+
+	def access(self, sets, ways):
+		self.set_age[sets] += 1
+		self.ages[sets, ways] = self.set_age[sets]
+
+	insert = access
+
+	def invalidate(self, sets, ways):
+		self.ages[sets, ways] = 0
+
+	def victim(self, sets):
+		return self.ages[sets].argmin(axis=1)
+
+
+class _LeastFrequentlyUsed(_VectorPolicy):
+	def __init__(self, cache_sets, associativity, seed):
+		_VectorPolicy.__init__(self, cache_sets, associativity, seed)
+		self.counts = np.zeros((cache_sets, associativity), dtype=np.int64)
+
+	def access(self, sets, ways):
+		self.counts[sets, ways] += 1
+
+	def invalidate(self, sets, ways):
+		self.counts[sets, ways] = 0
+
+	def insert(self, sets, ways):
+		self.counts[sets, ways] = 1
+
+	def victim(self, sets):
+		return self.counts[sets].argmin(axis=1)
+
+
+VECTOR_POLICIES = {
+	"RR":    _RoundRobin,
+	"RAND":  _Random,
+	"CLOCK": _Clock,
+	"LRU":   _LeastRecentlyUsed,
+	"LFU":   _LeastFrequentlyUsed
+}
+
+
+class TraceSimulator(object):
+	"""
+	Offline simulator of a set-associative cache. geometry is a CacheGeometry,
+	e.g., the CacheModel of the cache testbenches.
+
+	If allocate is True, each read or write miss is followed by a replace of
+	the same address, like in a CPU cache.
+	"""
+	NOP, READ, WRITE, READ_INVALIDATE, WRITE_INVALIDATE, REPLACE = range(6)
+	COMMANDS = {"N": NOP, "R": READ, "W": WRITE, "RI": READ_INVALIDATE, "WI": WRITE_INVALIDATE, "P": REPLACE}
+
+	def __init__(self, geometry, policy="LRU", allocate=False, seed=None):
+		self.geometry = geometry
+		self.allocate = allocate
+		try:
+			self.policy = VECTOR_POLICIES[policy.strip().upper()](geometry.cache_sets, geometry.associativity, seed)
+		except KeyError:
+			raise ValueError("Unknown replacement policy: {0}".format(policy))
+
+		# tag of each cache line, -1 means invalid
+		self.tags = np.full((geometry.cache_sets, geometry.associativity), -1, dtype=np.int64)
+		self.hits = np.zeros(geometry.cache_sets, dtype=np.int64)
+		self.misses = np.zeros(geometry.cache_sets, dtype=np.int64)
+		self.evictions = np.zeros(geometry.cache_sets, dtype=np.int64)
+
+	def run(self, commands, addresses):
+		"""
+		Apply one chunk of the trace. Returns the OldAddress of each replace
+		command (including allocations) in trace order, -1 means no valid cache
+		line was replaced.
+		"""
+		commands = np.asarray(commands, dtype=np.int8)
+		addresses = np.asarray(addresses, dtype=np.int64)
+		if self.allocate:
+			replaces = (commands == self.REPLACE) | ((commands >= self.READ) & (commands <= self.WRITE_INVALIDATE))
+		else:
+			replaces = commands == self.REPLACE
+		oldAddress = np.full(len(addresses), -2, dtype=np.int64)     # -2: no replace
+
+		active = np.flatnonzero(commands != self.NOP)
+		indices = addresses[active] & self.geometry.index_mask
+
+		# rank of each access within its cache set, accesses with the same rank are independent
+		order = np.argsort(indices, kind="mergesort")
+		sorted_indices = indices[order]
+		first = np.flatnonzero(np.r_[True, sorted_indices[1:] != sorted_indices[:-1]])
+		counts = np.diff(np.r_[first, len(order)])
+		rank = np.empty(len(order), dtype=np.int64)
+		rank[order] = np.arange(len(order)) - np.repeat(first, counts)
+
+		by_rank = active[np.argsort(rank, kind="mergesort")]
+		bounds = np.r_[0, np.cumsum(np.bincount(rank))] if len(rank) else np.zeros(1, dtype=np.int64)
+		for step in range(len(bounds) - 1):
+			self._step(by_rank[bounds[step]:bounds[step+1]], commands, addresses, replaces, oldAddress)
+
+		return oldAddress[oldAddress != -2]
+
+	def _step(self, positions, commands, addresses, replaces, oldAddress):
+		geometry, policy = self.geometry, self.policy
+		command = commands[positions]
+		address = addresses[positions]
+		sets = address & geometry.index_mask
+		tags = (address >> geometry.index_bits) & geometry.tag_mask
+
+		match = self.tags[sets] == tags[:, np.newaxis]
+		hit = match.any(axis=1)
+		ways = match.argmax(axis=1)
+
+		request = command != self.REPLACE
+		requestHit = request & hit
+		self.hits[sets[requestHit]] += 1
+		self.misses[sets[request & ~hit]] += 1
+
+		invalidate = requestHit & ((command == self.READ_INVALIDATE) | (command == self.WRITE_INVALIDATE))
+		access = requestHit & ~invalidate
+		policy.access(sets[access], ways[access])
+		self.tags[sets[invalidate], ways[invalidate]] = -1
+		policy.invalidate(sets[invalidate], ways[invalidate])
+
+		replace = replaces[positions] & ~requestHit
+		if replace.any():
+			sets, tags, hit, ways = sets[replace], tags[replace], hit[replace], ways[replace]
+			victims = self._victims(sets)
+			old = self.tags[sets, victims]
+			oldAddress[positions[replace]] = np.where(old >= 0, (old << geometry.index_bits) | sets, -1)
+
+			# replace of an already cached address only updates the cache line
+			policy.access(sets[hit], ways[hit])
+			insert = ~hit
+			sets, victims = sets[insert], victims[insert]
+			self.evictions[sets[old[insert] >= 0]] += 1
+			self.tags[sets, victims] = tags[insert]
+			policy.insert(sets, victims)
+
+	def _victims(self, sets):
+		"""Return the lowest invalid way of each cache set, or the victim selected by the policy."""
+		invalid = self.tags[sets] == -1
+		victims = invalid.argmax(axis=1)
+		full = ~invalid.any(axis=1)
+		if full.any():
+			victims[full] = self.policy.victim(sets[full])
+		return victims
+
+
+def compare_with_model(cache_lines, associativity, address_bits, policy, commands, addresses):
+	"""
+	Replay a trace through TraceSimulator and through CacheModel. Returns the
+	number of replace commands with a different OldAddress plus the difference
+	in the hit count. Policy RAND does not match, see above.
+	"""
+	sim = TraceSimulator(CacheGeometry(cache_lines, associativity, address_bits), policy)
+	oldAddress = sim.run(commands, addresses)
+
+	model = CacheModel(cache_lines, associativity, address_bits, policy)
+	expected, hits = [], 0
+	for command, address in zip(commands, addresses):
+		if command == TraceSimulator.REPLACE:
+			old, _ = model.victim(address)
+			expected.append(-1 if old is None else old)
+			model.replace(address)
+		elif command != TraceSimulator.NOP:
+			readWrite = int(command in (TraceSimulator.WRITE, TraceSimulator.WRITE_INVALIDATE))
+			invalidate = int(command in (TraceSimulator.READ_INVALIDATE, TraceSimulator.WRITE_INVALIDATE))
+			hit, _ = model.access(address, readWrite, invalidate)
+			hits += hit
+
+	return int((oldAddress != np.asarray(expected, dtype=np.int64)).sum()) + abs(int(sim.hits.sum()) - hits)
+
+
+def read_trace(filename, chunk_size=1 << 20):
+	"""Yield (commands, addresses) arrays of up to chunk_size accesses from a trace file."""
+	if filename.endswith(".npy"):
+		trace = np.load(filename, mmap_mode="r")
+		for start in range(0, len(trace), chunk_size):
+			chunk = trace[start:start + chunk_size]
+			if chunk.dtype.names:
+				yield np.asarray(chunk["command"]), np.asarray(chunk["address"])
+			else:
+				yield np.full(len(chunk), TraceSimulator.READ, dtype=np.int8), np.asarray(chunk)
+		return
+
+	commands, addresses = [], []
+	with open(filename) as trace:
+		for line in trace:
+			fields = line.split()
+			if not fields or fields[0].startswith("#"): continue
+			if len(fields) == 1:
+				commands.append(TraceSimulator.READ)
+			else:
+				commands.append(TraceSimulator.COMMANDS[fields[0].upper()])
+			addresses.append(int(fields[-1], 0))
+			if len(addresses) == chunk_size:
+				yield commands, addresses
+				commands, addresses = [], []
+	if addresses:
+		yield commands, addresses
+
+
+if __name__ == "__main__":
+	import argparse
+	import sys
+	from timeit import default_timer as timer
+
+	parser = argparse.ArgumentParser(description="Replay an address/command trace through a set-associative cache.")
+	parser.add_argument("--policy", default="LRU", help="replacement policy: {0}".format(", ".join(sorted(VECTOR_POLICIES))))
+	parser.add_argument("--seed", type=int, default=None, help="seed of policy RAND")
+	parser.add_argument("--allocate", action="store_true", help="replace the cache line on each read or write miss")
+	parser.add_argument("--chunk", type=int, default=1 << 20, help="accesses per chunk")
+	parser.add_argument("--old-address", help="write the OldAddress sequence to this file (int64, -1 = none)")
+	parser.add_argument("--per-set", help="write per-set statistics to this CSV file")
+	parser.add_argument("--check", type=int, metavar="N", help="compare the policies against CacheModel on N random commands")
+	parser.add_argument("cache_lines", type=int)
+	parser.add_argument("associativity", type=int)
+	parser.add_argument("address_bits", type=int)
+	parser.add_argument("trace", nargs="?")
+	args = parser.parse_args()
+
+	if args.check:
+		random = np.random.RandomState(0 if args.seed is None else args.seed)
+		commands = random.choice([TraceSimulator.READ, TraceSimulator.WRITE, TraceSimulator.READ_INVALIDATE,
+															TraceSimulator.REPLACE, TraceSimulator.REPLACE], args.check).astype(np.int8)
+		addresses = random.randint(0, 2**args.address_bits, args.check)
+		failed = False
+		for policy in sorted(VECTOR_POLICIES):
+			if policy == "RAND": continue
+			mismatches = compare_with_model(args.cache_lines, args.associativity, args.address_bits, policy, commands, addresses)
+			print("{0:5}: {1} mismatches".format(policy, mismatches))
+			failed |= mismatches > 0
+		sys.exit(1 if failed else 0)
+	if args.trace is None:
+		parser.error("argument trace is required")
+
+	sim = TraceSimulator(CacheGeometry(args.cache_lines, args.associativity, args.address_bits),
+											 args.policy, args.allocate, args.seed)
+	oldAddressFile = open(args.old_address, "wb") if args.old_address else None
+	start = timer()
+	for commands, addresses in read_trace(args.trace, args.chunk):
+		oldAddress = sim.run(commands, addresses)
+		if oldAddressFile: oldAddress.tofile(oldAddressFile)
+	duration = timer() - start
+	if oldAddressFile: oldAddressFile.close()
+
+	hits, misses, evictions = sim.hits.sum(), sim.misses.sum(), sim.evictions.sum()
+	print("hit rate {0:7.3%}, {1} hits, {2} misses, {3} evictions ({4:.2f} s)".format(
+		float(hits) / max(1, hits + misses), hits, misses, evictions, duration))
+	if args.per_set:
+		with open(args.per_set, "w") as csv:
+			csv.write("set,hits,misses,evictions\n")
+			for index in range(sim.geometry.cache_sets):
+				csv.write("{0},{1},{2},{3}\n".format(index, sim.hits[index], sim.misses[index], sim.evictions[index]))
@@ -0,0 +1,138 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Clock source for Cocotb Testbenches
+#
+# Description:
+# ------------------------------------
+#	Generates the clock of a Cocotb testbench with as few switches between the
+#	simulator and Python as possible. The first available implementation is
+#	used:
+#
+#	* "hdl": the clock is generated by the HDL side, e.g., by a clock process in
+#	  a thin wrapper around the DUT. Selected by the environment variable
+#	  POC_HDL_CLOCK=1. The clock signal is not driven from Python. The clock
+#	  process must initialize the clock signal to '0' or '1'. A clock signal
+#	  without a valid value is an undriven input of the toplevel, which is
+#	  refused with a ValueError.
+#	* "gpi": the clock is toggled by the simulator interface of Cocotb (C-level
+#	  clock), if provided by the installed Cocotb version.
+#	* "coroutine": the clock is toggled by a Python coroutine with two timer
+#	  callbacks per clock cycle.
+#
+#	ClockSource.report logs the simulated clock cycles per second of wall time
+#	and the implementation used, and appends them to the report file given by
+#	POC_COCOTB_REPORT. Comparing the reports of runs with different
+#	implementations shows the gain.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from timeit import default_timer as timer
+
+import cocotb
+from cocotb.decorators import coroutine
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_steps, get_sim_time
+
+from utils import append_report, getenv_flag
+
+try:
+	from cocotb import simulator
+except ImportError:
+	simulator = None
+
+
+class ClockSource(object):
+	"""
+	Clock of the given period in ps for signal, starting with the low phase.
+	"""
+
+	def __init__(self, signal, period=10000):
+		self.signal = signal
+		self.period = period
+		self.implementation = None
+		self._gpi_clock = None
+		self._start_time = None
+		self._start_ps = 0
+
+	def start(self):
+		"""Start the clock and return the name of the implementation used."""
+		self._start_time = timer()
+		self._start_ps = get_sim_time("ps")
+		if getenv_flag("POC_HDL_CLOCK"):
+			if not self.signal.value.is_resolvable:
+				raise ValueError("POC_HDL_CLOCK=1, but {0} is not driven by a clock generator of the toplevel.".format(
+					self.signal._name))
+			self.implementation = "hdl"
+		elif self._start_gpi():
+			self.implementation = "gpi"
+		else:
+			cocotb.fork(self._toggle())
+			self.implementation = "coroutine"
+		self.signal._log.info("Clock source: {0}".format(self.implementation))
+		return self.implementation
+
+	def _start_gpi(self):
+		clock_create = getattr(simulator, "clock_create", None)
+		if clock_create is None: return False
+		try:
+			period = get_sim_steps(self.period, "ps")
+			self._gpi_clock = clock_create(self.signal._handle)
+			self._gpi_clock.start(period, period // 2, False)
+		except Exception:
+			self._gpi_clock = None
+			return False
+		return True
+
+	@coroutine
+	def _toggle(self):
+		signal = self.signal
+		half_period = self.period // 2
+		while True:
+			signal <= 0
+			yield Timer(half_period) # ps
+			signal <= 1
+			yield Timer(half_period) # ps
+
+	def stop(self):
+		if self._gpi_clock is not None:
+			self._gpi_clock.stop()
+			self._gpi_clock = None
+
+	def report(self):
+		"""Log and report the simulated clock cycles per second of wall time, return the report record."""
+		wall_time = timer() - self._start_time
+		cycles = int(get_sim_time("ps") - self._start_ps) // self.period
+		rate = cycles / wall_time if wall_time > 0 else 0.0
+		self.signal._log.info("Simulated {0} clock cycles in {1:.2f} s ({2:.0f} cycles/s) with {3} clock.".format(
+			cycles, wall_time, rate, self.implementation))
+		record = {"clock": self.implementation, "cycles": cycles, "wall_time": wall_time, "cycles_per_second": rate}
+		append_report(record)
+		return record
+
+
+def start_clock(signal, period=10000):
+	"""Create and start a ClockSource for signal, period is given in ps."""
+	clock = ClockSource(signal, period)
+	clock.start()
+	return clock
@@ -0,0 +1,198 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Profiling of Cocotb Testbenches
+#
+# Description:
+# ------------------------------------
+#	Measures where the wall time of a Cocotb testbench goes. The Python time
+#	is accumulated per phase:
+#
+#	* drive: driving the input signals, including the BinaryValue conversions,
+#	* sample: sampling the signals by the monitors,
+#	* model: the reference model, i.e., the predict method of the testbench,
+#	* compare: the compares of the scoreboard.
+#
+#	The remaining wall time is spent in the simulator kernel and in the
+#	scheduler of Cocotb. Calls from other threads, e.g., the model run ahead
+#	of time by PreparedStream, overlap with the simulation. Their time is
+#	reported separately as background phases and is not subtracted from the
+#	wall time. The report also contains the simulated clock cycles
+#	per second of wall time and the peak resident set size of the process.
+#
+#	The environment variables are:
+#	* POC_PROFILE=<file>, enable the phase timers and write the report as JSON
+#	  to this file. The report is also appended to POC_COCOTB_REPORT.
+#	* POC_PROFILER=cprofile|pyinstrument, profile all Python code of the test
+#	  run with this profiler. The result is written to cocotb_profile.pstats
+#	  or cocotb_profile.html in the simulation directory, respectively.
+#
+#	The phase timers are installed by wrapping the functions of the phases with
+#	timed when a testbench is created. If POC_PROFILE is not set, timed returns
+#	the function itself, so that, there is no overhead.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import json
+import os
+import sys
+import threading
+from timeit import default_timer as timer
+
+from utils import append_report
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+PHASES = ("drive", "sample", "model", "compare")
+
+def peak_rss():
+	"""Return the peak resident set size of this process in KiB, or None if unknown."""
+	if resource is None: return None
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# bytes on Mac OS X, KiB elsewhere
+	return rss // 1024 if sys.platform == "darwin" else rss
+
+
+class PhaseTimers(object):
+	"""
+	Accumulates the number of calls and the wall time per phase. Calls from
+	other threads than the creating one are accumulated in background.
+	"""
+
+	def __init__(self):
+		self.phases = dict([(phase, [0, 0.0]) for phase in PHASES])
+		self.background = {}
+		self._thread = threading.current_thread()
+
+	def wrap(self, phase, function):
+		"""Return function wrapped by a timer of phase."""
+		record = self.phases.setdefault(phase, [0, 0.0])
+		background_record = self.background.setdefault(phase, [0, 0.0])
+		thread, current_thread = self._thread, threading.current_thread
+
+		def timed_function(*args, **kwargs):
+			start = timer()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				r = record if current_thread() is thread else background_record
+				r[1] += timer() - start
+				r[0] += 1
+		return timed_function
+
+	def to_dict(self, background=False):
+		"""Return the records of the phases, or of the background phases with at least one call."""
+		if background:
+			return dict([(phase, {"calls": calls, "seconds": seconds}) for phase, (calls, seconds) in self.background.items() if calls])
+		return dict([(phase, {"calls": calls, "seconds": seconds}) for phase, (calls, seconds) in self.phases.items()])
+
+
+# the phase timers of this process, if enabled by POC_PROFILE
+timers = PhaseTimers() if os.environ.get("POC_PROFILE") else None
+
+def timed(phase, function):
+	"""Return function wrapped by the timer of phase, or function itself if profiling is disabled."""
+	return timers.wrap(phase, function) if timers is not None else function
+
+
+class Profile(object):
+	"""
+	Profile of one test run. start and finish are called by ModelTestbench.run,
+	see the environment variables above.
+	"""
+
+	def __init__(self, log):
+		self.log = log
+		self.profiler = None
+		self._start_time = None
+
+	def start(self):
+		name = os.environ.get("POC_PROFILER", "").strip().lower()
+		if name == "cprofile":
+			import cProfile
+			self.profiler = cProfile.Profile()
+			self.profiler.enable()
+		elif name == "pyinstrument":
+			try:
+				import pyinstrument
+			except ImportError:
+				self.log.warning("POC_PROFILER=pyinstrument ignored, pyinstrument is not installed.")
+			else:
+				self.profiler = pyinstrument.Profiler()
+				self.profiler.start()
+		elif name:
+			self.log.warning("Unknown profiler POC_PROFILER={0}, use cprofile or pyinstrument.".format(name))
+		self.name = name
+		self._start_time = timer()
+
+	def finish(self, clock=None):
+		"""Stop the profiler and write the report. clock is the record of ClockSource.report."""
+		wall_time = timer() - self._start_time
+		if self.profiler is not None:
+			self._finish_profiler()
+
+		filename = os.environ.get("POC_PROFILE")
+		if timers is None or not filename: return
+		phases = timers.to_dict()
+		background = timers.to_dict(background=True)
+		python_time = sum([phase["seconds"] for phase in phases.values()])
+		report = {
+			"wall_time":         wall_time,
+			"phases":            phases,
+			"background_phases": background,
+			"other_seconds":     max(wall_time - python_time, 0.0),
+			"cycles":            clock["cycles"] if clock else None,
+			"cycles_per_second": clock["cycles_per_second"] if clock else None,
+			"peak_rss_kib":      peak_rss()
+		}
+		for phase in sorted(phases):
+			calls, seconds = phases[phase]["calls"], phases[phase]["seconds"]
+			self.log.info("Profile {0}: {1:.2f} s in {2} calls ({3:.1f} us/call, {4:.0%} of wall time)".format(
+				phase, seconds, calls, 1e6 * seconds / calls if calls else 0.0, seconds / wall_time if wall_time > 0 else 0.0))
+		for phase in sorted(background):
+			calls, seconds = background[phase]["calls"], background[phase]["seconds"]
+			self.log.info("Profile {0} (background thread): {1:.2f} s in {2} calls ({3:.1f} us/call), overlaps the simulation".format(
+				phase, seconds, calls, 1e6 * seconds / calls))
+		self.log.info("Profile simulator and scheduler: {0:.2f} s, peak RSS: {1} KiB".format(report["other_seconds"], report["peak_rss_kib"]))
+		with open(filename, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+		append_report({"profile": report})
+
+	def _finish_profiler(self):
+		if self.name == "cprofile":
+			import pstats
+			self.profiler.disable()
+			self.profiler.dump_stats("cocotb_profile.pstats")
+			stats = pstats.Stats(self.profiler)
+			stats.sort_stats("cumulative").print_stats(20)
+			self.log.info("cProfile statistics written to cocotb_profile.pstats")
+		else:
+			self.profiler.stop()
+			with open("cocotb_profile.html", "w") as f:
+				f.write(self.profiler.output_html())
+			self.log.info(self.profiler.output_text())
+			self.log.info("pyinstrument profile written to cocotb_profile.html")
+		self.profiler = None
@@ -0,0 +1,128 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Script:		  Multi-seed regression of Cocotb testbenches
+#
+# Description:
+# ------------------------------------
+#	Splits a budget of random transactions into independent shards, each with
+#	its own seed. Every shard is a separate simulator process starting from
+#	reset, the shards are run in parallel like the points of a parameter sweep,
+#	see cocotb_sweep.py. Thus, each worker runs its shards in its own copy of
+#	the PoC root directory, and a shard fails, if its report contains records of
+#	another shard.
+#
+#	Each shard gets the environment variables:
+#	* RANDOM_SEED, the seed of the random generator of Cocotb, and
+#	* POC_COCOTB_TRANSACTIONS, the number of random transactions.
+#
+#	The scoreboard results, the coverage counters and the failing seeds of all
+#	shards are merged into one JSON report. A failing shard is reproduced by
+#	running the testbench with its RANDOM_SEED and POC_COCOTB_TRANSACTIONS.
+#
+#	Example: 10^8 transactions in 256 shards on all cores
+#	  python tb/common/cocotb_shards.py PoC.cache.par -n 100000000 -s 256
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+from cocotb_sweep import DEFAULT_COMMAND, POC_ROOT, Sweep, parse_generic
+from func_coverage import merge_counts
+
+def shard_sizes(transactions, shards):
+	"""Split transactions into shards of (almost) equal size."""
+	return [transactions // shards + (1 if shard < transactions % shards else 0) for shard in range(shards)]
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run a Cocotb testbench as independent seeded shards.")
+	parser.add_argument("entity", help="PoC entity, e.g. PoC.cache.par")
+	parser.add_argument("-n", "--transactions", type=int, required=True, help="total number of random transactions")
+	parser.add_argument("-s", "--shards", type=int, default=None, help="number of shards (default: number of jobs)")
+	parser.add_argument("--seed", type=int, default=None, help="seed of the first shard, the following shards use seed+1, ... (default: random)")
+	parser.add_argument("-g", "--generic", dest="generics", type=parse_generic, action="append", default=[],
+		help="generic value NAME=value (repeatable)")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="number of parallel simulator processes (default: CPU cores)")
+	parser.add_argument("--command", default=DEFAULT_COMMAND, help="simulator command (default: '%(default)s')")
+	parser.add_argument("--work-dir", default=None, help="directory of logs and build directories (default: temp/shards/<entity>)")
+	parser.add_argument("--report", default=None, help="JSON report file (default: <work-dir>/report.json)")
+	args = parser.parse_args()
+
+	for name, values in args.generics:
+		if len(values) != 1: parser.error("Only one value per generic is allowed, use cocotb_sweep.py for a matrix.")
+	generics = [(name, values[0]) for name, values in args.generics]
+
+	work_dir = args.work_dir or os.path.join(POC_ROOT, "temp", "shards", args.entity)
+	seed = args.seed if args.seed is not None else random.randint(1, 2**31 - 1 - 2**16)
+	jobs = args.jobs or multiprocessing.cpu_count()
+	sizes = [size for size in shard_sizes(args.transactions, args.shards or jobs) if size > 0]
+	environments = [{"RANDOM_SEED": str(seed + shard), "POC_COCOTB_TRANSACTIONS": str(size)} for shard, size in enumerate(sizes)]
+	shards = Sweep(args.entity, [generics] * len(sizes), args.command, jobs, work_dir, point_environments=environments)
+
+	start = timer()
+	results = shards.run()
+	wall_time = timer() - start
+
+	coverage = {}
+	for result in results:
+		for counts in result["coverage"]:
+			merge_counts(coverage, counts)
+	failed = [result for result in results if not result["passed"]]
+	transactions = sum(sizes)
+	report = args.report or os.path.join(shards.work_dir, "report.json")
+	with open(report, "w") as f:
+		json.dump({
+			"entity":       args.entity,
+			"command":      shards.command,
+			"generics":     dict(generics),
+			"jobs":         shards.jobs,
+			"transactions": transactions,
+			"wall_time":    wall_time,
+			"errors":       sum([result["errors"] for result in results]),
+			"origin_errors": sum([len(result["origin_errors"]) for result in results]),
+			"passed":       len(results) - len(failed),
+			"failed":       len(failed),
+			"failed_seeds": [int(result["environment"]["RANDOM_SEED"]) for result in failed],
+			"coverage":     coverage,
+			"shards":       results
+		}, f, indent=2, sort_keys=True)
+
+	print("{0} of {1} shards passed, {2} transactions in {3:.1f} s ({4:.0f} transactions/s), report: {5}".format(
+		len(results) - len(failed), len(results), transactions, wall_time, transactions / max(wall_time, 1e-9), report))
+	for result in failed:
+		print("FAILED: RANDOM_SEED={0} POC_COCOTB_TRANSACTIONS={1}, see {2}".format(
+			result["environment"]["RANDOM_SEED"], result["environment"]["POC_COCOTB_TRANSACTIONS"], result["log"]))
+		for error in result["origin_errors"]:
+			print("  foreign report: {0}".format(error))
+	return 1 if failed else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
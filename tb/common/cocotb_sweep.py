@@ -0,0 +1,257 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Script:		  Parameter sweep of Cocotb testbenches
+#
+# Description:
+# ------------------------------------
+#	Runs a Cocotb testbench for every point of a matrix of generic values. Each
+#	point is an independent simulator process. The points are distributed over
+#	a pool of workers, one per CPU core by default.
+#
+#	pyIPCMI runs all Cocotb simulations in the same directory temp/cocotb below
+#	the PoC root directory. Thus, each worker gets its own copy of the PoC root
+#	directory: the scripts on the top level are copied, the other directories
+#	are linked, except for temp, which is created per worker. Only the
+#	precompiled vendor libraries in temp/precompiled are shared. The simulator
+#	command is executed in this copy.
+#
+#	Each worker uses its own simulation build directory (SIM_BUILD), thus, the
+#	compiled libraries are reused by all points of a worker, because only the
+#	generics change between points. The generics of a point are passed by the
+#	environment variables SIM_ARGS (-g<name>=<value>, accepted by QuestaSim and
+#	GHDL) and GENERICS (<name>=<value>, space separated).
+#
+#	The scoreboard result of each point is written by the testbench to the file
+#	given by POC_COCOTB_REPORT, see stream_scoreboard.py. All results together
+#	with the wall time per point are collected into one JSON report. Each point
+#	gets an identifier in POC_COCOTB_POINT, which is added to each record of the
+#	report. A point fails, if its report contains a record of another point, or
+#	if the generics read back from the DUT by the scoreboard differ from the
+#	generics of the point.
+#
+#	Example:
+#	  python tb/common/cocotb_sweep.py PoC.cache.par -g CACHE_LINES=32,1024 -g ASSOCIATIVITY=1,4,8
+#
+#	An integer range of values is given by FIRST..LAST, e.g., -g BITS=3..168.
+#
+#	The simulator command can be changed with --command. It is executed by the
+#	shell in the copy of the PoC root directory of the worker, {entity} is
+#	replaced by the entity name.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from timeit import default_timer as timer
+try:
+	from queue import Queue, Empty
+except ImportError:
+	from Queue import Queue, Empty
+
+POC_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+DEFAULT_COMMAND = "./poc.sh cocotb {entity}"
+
+def parse_generic(argument):
+	"""Split NAME=v1,v2,... into (NAME, [v1, v2, ...]), an integer range FIRST..LAST is expanded."""
+	name, sep, values = argument.partition("=")
+	if not sep or not name or not values:
+		raise argparse.ArgumentTypeError("Expected NAME=value[,value...], got '{0}'.".format(argument))
+	result = []
+	for value in values.split(","):
+		first, sep, last = value.strip().partition("..")
+		try:
+			result.extend([str(i) for i in range(int(first), int(last) + 1)] if sep else [first])
+		except ValueError:
+			raise argparse.ArgumentTypeError("Expected an integer range FIRST..LAST, got '{0}'.".format(value))
+	return name.strip(), result
+
+def sweep_points(generics):
+	"""Return the cartesian product of the generic values as list of (name, value) lists."""
+	names = [name for name, _ in generics]
+	return [list(zip(names, values)) for values in itertools.product(*[values for _, values in generics])]
+
+def normalize_generic(value):
+	"""Return the generic value as lower-case string, booleans as 0 or 1."""
+	value = str(value).strip().strip('"').lower()
+	return {"true": "1", "false": "0"}.get(value, value)
+
+def make_root(path):
+	"""Create a copy of the PoC root directory for one worker in path, see above."""
+	os.makedirs(os.path.join(path, "temp"))
+	for entry in os.listdir(POC_ROOT):
+		source = os.path.join(POC_ROOT, entry)
+		if entry == "temp":
+			continue
+		elif os.path.isfile(source):
+			# poc.sh resolves symbolic links to find the PoC root directory
+			shutil.copy2(source, path)
+		else:
+			os.symlink(source, os.path.join(path, entry))
+	precompiled = os.path.join(POC_ROOT, "temp", "precompiled")
+	if os.path.isdir(precompiled):
+		os.symlink(precompiled, os.path.join(path, "temp", "precompiled"))
+
+def read_results(filename):
+	"""Return the JSON records of a POC_COCOTB_REPORT file."""
+	if not os.path.exists(filename): return []
+	with open(filename) as report:
+		return [json.loads(line) for line in report if line.strip()]
+
+
+class Sweep(object):
+	"""
+	Runs the points of a sweep by a pool of worker threads, each waiting on one
+	simulator process. point_environments optionally gives additional environment
+	variables per point.
+	"""
+
+	def __init__(self, entity, points, command=DEFAULT_COMMAND, jobs=None, work_dir=None, environment=None, point_environments=None):
+		self.entity = entity
+		self.points = points
+		self.point_environments = point_environments or [{} for _ in points]
+		self.command = command.replace("{entity}", entity)
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.work_dir = os.path.abspath(work_dir or os.path.join(POC_ROOT, "temp", "sweep", entity))
+		self.environment = dict(environment or {})
+		self.results = [None] * len(points)
+		self._lock = threading.Lock()
+
+	def run(self):
+		if os.path.isdir(self.work_dir): shutil.rmtree(self.work_dir)
+		os.makedirs(self.work_dir)
+
+		queue = Queue()
+		for number in range(len(self.points)): queue.put(number)
+		workers = [threading.Thread(target=self._worker, args=(worker, queue)) for worker in range(min(self.jobs, len(self.points)))]
+		for worker in workers: worker.start()
+		for worker in workers: worker.join()
+		return self.results
+
+	def _worker(self, worker, queue):
+		root = os.path.join(self.work_dir, "root{0}".format(worker))
+		make_root(root)
+		sim_build = os.path.join(self.work_dir, "sim_build{0}".format(worker))
+		while True:
+			try:
+				number = queue.get_nowait()
+			except Empty:
+				return
+			result = self.run_point(number, root, sim_build)
+			with self._lock:
+				self.results[number] = result
+				print("[{0}/{1}] {2}: {3} ({4:.1f} s)".format(number + 1, len(self.points),
+					self.format_point(self.points[number] + sorted(self.point_environments[number].items())),
+					"PASS" if result["passed"] else "FAIL", result["wall_time"]))
+
+	@staticmethod
+	def format_point(point):
+		return ", ".join(["{0}={1}".format(name, value) for name, value in point])
+
+	def run_point(self, number, root, sim_build):
+		"""Run one point in the PoC root directory root and return its result record."""
+		point = self.points[number]
+		point_dir = os.path.join(self.work_dir, "point{0}".format(number))
+		os.makedirs(point_dir)
+		report = os.path.join(point_dir, "report.jsonl")
+
+		env = dict(os.environ)
+		env.update(self.environment)
+		env.update(self.point_environments[number])
+		env["SIM_BUILD"] = sim_build
+		env["GENERICS"] = " ".join(["{0}={1}".format(name, value) for name, value in point])
+		env["SIM_ARGS"] = " ".join([env.get("SIM_ARGS", "")] + ["-g{0}={1}".format(name, value) for name, value in point]).strip()
+		env["POC_COCOTB_REPORT"] = report
+		env["POC_COCOTB_POINT"] = str(number)
+
+		start = timer()
+		with open(os.path.join(point_dir, "output.log"), "w") as log:
+			returncode = subprocess.call(self.command, shell=True, cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT)
+		wall_time = timer() - start
+
+		records = read_results(report)
+		scoreboards = [record for record in records if "errors" in record]
+		# check that the report comes from this point
+		origin_errors = ["record of point {0}".format(record.get("point")) for record in records if record.get("point") != str(number)]
+		for scoreboard in scoreboards:
+			for name, value in point:
+				simulated = scoreboard.get("generics", {}).get(name)
+				if (simulated is not None) and (normalize_generic(simulated) != normalize_generic(value)):
+					origin_errors.append("{0}={1} simulated instead of {2}".format(name, simulated, value))
+		return {
+			"generics":    dict(point),
+			"environment": self.point_environments[number],
+			"returncode":  returncode,
+			"wall_time":   wall_time,
+			"scoreboards": scoreboards,
+			"clock":       [record for record in records if "clock" in record],
+			"coverage":    [record["coverage"] for record in records if "coverage" in record],
+			"profile":     [record["profile"] for record in records if "profile" in record],
+			"errors":      sum([scoreboard["errors"] for scoreboard in scoreboards]),
+			"origin_errors": origin_errors,
+			# a point without scoreboard result did not finish, e.g. failed to compile
+			"passed":      (returncode == 0) and bool(scoreboards) and all([scoreboard["passed"] for scoreboard in scoreboards]) and not origin_errors,
+			"log":         os.path.join(point_dir, "output.log")
+		}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run a Cocotb testbench for a matrix of generic values.")
+	parser.add_argument("entity", help="PoC entity, e.g. PoC.cache.par")
+	parser.add_argument("-g", "--generic", dest="generics", type=parse_generic, action="append", default=[],
+		help="generic and its values NAME=v1,v2,..., integer ranges FIRST..LAST are expanded (repeatable)")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="number of parallel simulator processes (default: CPU cores)")
+	parser.add_argument("--command", default=DEFAULT_COMMAND, help="simulator command (default: '%(default)s')")
+	parser.add_argument("--work-dir", default=None, help="directory of logs and build directories (default: temp/sweep/<entity>)")
+	parser.add_argument("--report", default=None, help="JSON report file (default: <work-dir>/report.json)")
+	args = parser.parse_args()
+
+	points = sweep_points(args.generics)
+	sweep = Sweep(args.entity, points, args.command, args.jobs, args.work_dir)
+	start = timer()
+	results = sweep.run()
+	wall_time = timer() - start
+
+	failed = [result for result in results if not result["passed"]]
+	report = args.report or os.path.join(sweep.work_dir, "report.json")
+	with open(report, "w") as f:
+		json.dump({"entity": args.entity, "command": sweep.command, "jobs": sweep.jobs, "wall_time": wall_time,
+							 "passed": len(results) - len(failed), "failed": len(failed), "points": results}, f, indent=2, sort_keys=True)
+
+	print("{0} of {1} points passed in {2:.1f} s, report: {3}".format(len(results) - len(failed), len(results), wall_time, report))
+	for result in failed:
+		print("FAILED: {0}, see {1}".format(Sweep.format_point(sorted(result["generics"].items())), result["log"]))
+		for error in result["origin_errors"]:
+			print("  foreign report: {0}".format(error))
+	return 1 if failed else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
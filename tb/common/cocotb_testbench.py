@@ -0,0 +1,319 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Generic model-based Cocotb testbench
+#
+# Description:
+# ------------------------------------
+#	Components shared by the model-based Cocotb testbenches of PoC:
+#
+#	* InputDriver, InputMonitor and OutputMonitor for the signals of a BusLayout.
+#	* ModelTestbench connects them with a reference model and a scoreboard. A
+#	  testbench derives from it and implements predict, which updates the model
+#	  with an input transaction and returns the expected output transaction.
+#	* ModelTestbench.run applies the stimulus and raises the result.
+#
+#	The ahead-of-time model (POC_AOT_MODEL), record and replay of the stimulus
+#	(POC_STIMULUS_RECORD, POC_STIMULUS_REPLAY), the bounded scoreboard
+#	(POC_SCOREBOARD_DEPTH) and the clock source (POC_HDL_CLOCK) are handled
+#	here for all testbenches. The number of random transactions of a testbench
+#	can be changed by POC_COCOTB_TRANSACTIONS.
+#
+#	The last POC_HISTORY_DEPTH (default: 16) input, expected and received
+#	transactions are kept in ring buffers and reported at the first mismatch,
+#	together with the model state given by describe_model. If POC_EARLY_FAIL=1
+#	is set, then the test fails at the first mismatch instead of collecting the
+#	errors of all transactions.
+#
+#	The Python time of driver, monitors, model and scoreboard is profiled if
+#	POC_PROFILE=<file> is set, and all Python code is profiled by cProfile or
+#	pyinstrument if POC_PROFILER is set, see cocotb_profile.py.
+#
+#	The reference model may be a separate object without dependencies on
+#	Cocotb, see reference_model.py, which is given by the attribute
+#	reference_model. Then, it provides predict, describe_model and coverage.
+#	Such a testbench also supports the offline check (POC_OFFLINE_CHECK): the
+#	monitors write the sampled inputs and outputs to trace files, and
+#	offline_check.py compares them against the reference model after the
+#	simulation.
+#
+#	A testbench may create a CoverageGroup as attribute coverage and sample it
+#	in predict. The coverage is reported at the end of run, and the stimulus
+#	is stopped early if POC_COVERAGE_STOP=1 is set and all bins are covered. In
+#	the ahead-of-time mode, the samples taken by predict are deferred and
+#	counted when the transaction is applied, so that, transactions which are
+#	planned but never reach the DUT are not counted.
+#
+#	Cocotb copies the Python files side-by-side into the simulation directory,
+#	thus, the shared modules are added by
+#	  include "tb/common/cocotb.files"
+#	within the Cocotb branch of the *.files file of a testbench.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import os
+from collections import deque
+
+from cocotb.decorators import coroutine
+from cocotb.triggers import RisingEdge
+from cocotb.monitors import BusMonitor
+from cocotb.result import TestFailure
+
+from bus_sampler import BusSampler
+from clock_source import start_clock
+from cocotb_profile import Profile, timed
+from offline_check import OfflineRecording
+from packed_bus import PackedBusDriver, PackedBusMonitor, PackedScoreboard
+from prepared_stream import PreparedStream
+from stimulus_trace import stimulus_source
+from stream_scoreboard import ExpectedQueue
+from utils import getenv_flag
+
+
+def transaction_count(default):
+	"""Return the number of transactions to generate, overridden by POC_COCOTB_TRANSACTIONS."""
+	return int(os.environ.get("POC_COCOTB_TRANSACTIONS", default))
+
+
+class InputDriver(PackedBusDriver):
+	"""Drives the signals of layout. Transactions are tuples of integers in the order of the layout."""
+
+	def __init__(self, entity, clock, layout):
+		self._signals = list(layout.names)
+		PackedBusDriver.__init__(self, entity, None, clock)
+
+
+class InputMonitor(BusMonitor):
+	"""Samples the signals of layout at each rising clock edge into a tuple of integers."""
+
+	def __init__(self, entity, clock, layout, reset=None, callback=None, event=None):
+		self._signals = list(layout.names)
+		BusMonitor.__init__(self, entity, None, clock, reset, callback=callback, event=event)
+		self.name = "in"
+
+	@coroutine
+	def _monitor_recv(self):
+		clkedge = RisingEdge(self.clock)
+		sample = timed("sample", BusSampler(self.bus, self._signals).sample)
+
+		while True:
+			# Capture signals at rising-edge of clock.
+			yield clkedge
+			self._recv(sample())
+
+
+class OutputMonitor(PackedBusMonitor):
+	"""Samples the signals of layout at each rising clock edge into a tuple (word, unknown)."""
+
+	def __init__(self, entity, clock, layout, reset=None, callback=None, event=None):
+		self._signals = list(layout.names)
+		PackedBusMonitor.__init__(self, entity, None, clock, layout, reset, callback=callback, event=event)
+		self.name = "out"
+
+
+class ModelTestbench(object):
+	"""
+	Checks the outputs of dut against a reference model. input_layout and
+	output_layout are the BusLayouts of the input and output signals, init_val
+	are the expected output values after reset (None means don't care).
+	clock and reset are the names of the clock and reset port of the DUT, reset
+	is None if the DUT has no reset port.
+	"""
+
+	# CoverageGroup sampled by predict, if any
+	coverage = None
+	# reference model independent of Cocotb, if any
+	reference_model = None
+
+	def __init__(self, dut, input_layout, output_layout, init_val, clock="Clock", reset="Reset"):
+		self.dut = dut
+		self.clock = getattr(dut, clock)
+		self.reset = getattr(dut, reset) if reset is not None else None
+		self.stopped = False
+		self.offline = os.environ.get("POC_OFFLINE_CHECK")
+		if self.offline and (self.reference_model is None):
+			raise TestFailure("POC_OFFLINE_CHECK requires a testbench with a separate reference model.")
+		self.ahead_of_time = getenv_flag("POC_AOT_MODEL") and not self.offline
+		self.early_fail = getenv_flag("POC_EARLY_FAIL")
+		history_depth = int(os.environ.get("POC_HISTORY_DEPTH", 16))
+		# pairs (input transaction, expected output) of the last transactions
+		self.input_history = deque(maxlen=history_depth)
+		self.input_layout = input_layout
+		self.output_layout = output_layout
+		if self.reference_model is not None:
+			self.predict = self.reference_model.predict
+			self.describe_model = self.reference_model.describe_model
+			self.coverage = self.reference_model.coverage
+		self.predict = timed("model", self.predict)
+
+		self.input_drv = InputDriver(dut, self.clock, input_layout)
+
+		# Create a scoreboard on the outputs
+		self.expected_output = ExpectedQueue([ output_layout.expected(init_val) ])
+		self.scoreboard = PackedScoreboard(dut, output_layout, history_depth, self.report_history, fail_immediately=self.early_fail)
+		self.scoreboard.compare = timed("compare", self.scoreboard.compare)
+
+		if self.offline:
+			# Only record the inputs and outputs, the scoreboard stays empty.
+			self.recording = OfflineRecording(self.offline, self.reference_model)
+			self.output_mon = OutputMonitor(dut, self.clock, output_layout, self.reset, callback=self.recording.outputs.write)
+			self.input_mon = InputMonitor(dut, self.clock, input_layout, self.reset, callback=self.recording.inputs.write)
+			return
+
+		self.output_mon = OutputMonitor(dut, self.clock, output_layout, self.reset)
+		self.scoreboard.add_interface(self.output_mon, self.expected_output)
+
+		# Reconstruct the input transactions from the pins
+		# and send them to our 'model', or check them against the plan.
+		if self.ahead_of_time:
+			self.planned_input = deque()
+			self.input_mon = InputMonitor(dut, self.clock, input_layout, self.reset, callback=self.check_input)
+		else:
+			self.input_mon = InputMonitor(dut, self.clock, input_layout, self.reset, callback=self.model)
+
+	def predict(self, transaction):
+		"""Update the model and return the expected output transaction, see BusLayout.expected."""
+		raise NotImplementedError
+
+	def describe_model(self, transaction):
+		"""Return a description of the model state related to the input transaction for the failure report, or None."""
+		return None
+
+	def model(self, transaction):
+		"""Model the DUT based on the input transaction."""
+		if not self.stopped:
+			expected = self.predict(transaction)
+			self.expected_output.append(expected)
+			self.input_history.append((transaction, expected))
+
+	def check_input(self, transaction):
+		"""Check the input transaction against the plan of the ahead-of-time model."""
+		if not self.stopped:
+			planned, samples = self.planned_input.popleft()
+			self.input_history.append(planned)
+			if samples: self.coverage.count(samples)
+			if transaction != planned[0]:
+				self.scoreboard.errors += 1
+				self.dut._log.error("Applied input transaction {0!s} differed from planned {1!s}.".format(transaction, planned[0]))
+				if self.early_fail:
+					raise TestFailure("Applied input transaction differed from planned transaction.")
+
+	def report_history(self, log):
+		"""Log the last transactions before a mismatch and the related model state."""
+		history = self.scoreboard.history
+		if not history: return
+		exp = history[-1][1]
+		log.info("Last {0} input transactions (oldest first), each with the expected output of the next clock cycle:".format(len(self.input_history)))
+		related = None
+		for transaction, expected in self.input_history:
+			if expected is exp: related = transaction
+			log.info("  {0!s} -> {1!s}{2}".format(transaction, self.output_layout.format_expected(expected),
+				"  <== mismatch" if expected is exp else ""))
+		log.info("Last {0} output transactions (oldest first), expected / received:".format(len(history)))
+		for received, expected in history:
+			log.info("  {0!s} / {1!s}".format(self.output_layout.format_expected(expected), self.output_layout.format_received(received)))
+		description = self.describe_model(related) if related is not None else None
+		if description is not None:
+			log.info("Model state{0}: {1}".format(" (ahead of the simulation)" if self.ahead_of_time else "", description))
+
+	def plan(self, input_gen):
+		"""
+		Yield tuples of input transaction, expected output and the deferred
+		coverage samples, called outside of the simulator.
+		"""
+		coverage = self.coverage
+		for transaction in input_gen:
+			expected = self.predict(transaction)
+			yield transaction, expected, coverage.take_deferred() if coverage is not None else None
+
+	def apply_plan(self, plan):
+		"""Register the expected output of each planned input transaction before it is applied."""
+		for transaction, expected, samples in plan:
+			self.planned_input.append(((transaction, expected), samples))
+			self.expected_output.append(expected)
+			yield transaction
+
+	def stop(self):
+		"""
+		Stop generation of expected output transactions.
+		One more clock cycle must be executed afterwards, so that, output of
+		D-FF can be checked.
+		"""
+		self.stopped = True
+
+	@coroutine
+	def run(self, input_gen, idle=None):
+		"""
+		Apply the input transactions of input_gen, one per clock cycle, followed by
+		the idle transaction (default: all signals 0), and raise the result of the
+		scoreboard.
+		"""
+		dut = self.dut
+		profile = Profile(dut._log)
+		profile.start()
+		clock = start_clock(self.clock) # 10 ns
+		if self.reset is not None: self.reset <= 0
+
+		input_gen = stimulus_source(self.input_layout, input_gen)
+		if self.ahead_of_time:
+			if self.coverage is not None: self.coverage.defer()
+			input_gen = self.apply_plan(PreparedStream(self.plan(input_gen)))
+
+		# The signals are driven directly instead of by the send queue of the
+		# driver, which forks a coroutine per transaction.
+		clkedge = RisingEdge(self.clock)
+		drive = timed("drive", self.input_drv.drive)
+		coverage = self.coverage
+		stop_early = (coverage is not None) and getenv_flag("POC_COVERAGE_STOP") and not self.offline
+
+		# Issue first transaction immediately.
+		drive(next(input_gen))
+
+		# Issue next transactions.
+		# The coverage counts only the transactions which have been applied, also in
+		# the ahead-of-time mode, see check_input.
+		for t in input_gen:
+			yield clkedge
+			drive(t)
+			if stop_early and coverage.done:
+				dut._log.info("All coverage bins reached their target, stopping stimulus.")
+				break
+
+		# Wait for rising-edge of clock to execute last transaction from above.
+		# Apply idle command in following clock cycle, but stop generation of expected output data.
+		# Finish clock cycle to capture the resulting output from the last transaction above.
+		yield clkedge
+		drive(idle or (0,) * len(self.input_layout.names))
+		self.stop()
+		yield clkedge
+
+		# Print coverage, simulation speed, profile and result of scoreboard.
+		if self.offline:
+			self.recording.close()
+			dut._log.info("Recorded {0} clock cycles, check them by: python offline_check.py {1}".format(
+				self.recording.outputs.count, self.offline))
+		elif coverage is not None:
+			coverage.finish(dut._log)
+		profile.finish(clock.report())
+		clock.stop()
+		raise self.scoreboard.result
@@ -0,0 +1,262 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Functional coverage for Cocotb Testbenches
+#
+# Description:
+# ------------------------------------
+#	Cover points and crosses of cover points. The bins of a cover point are
+#	counted in a preallocated integer array, a sample is just an index into
+#	this array. Crosses are flattened into one array, too.
+#
+#	A CoverageGroup keeps track of the number of bins, which have not reached
+#	their target count yet, so that, testing whether everything is covered
+#	costs constant time.
+#
+#	The samples of a group can be deferred: after defer, the samples are
+#	collected instead of counted, take_deferred returns the samples collected
+#	so far, and count counts them later. The ahead-of-time model uses this to
+#	count the samples of a transaction only when it is applied to the DUT.
+#
+#	Coverage databases are JSON files of nested dictionaries
+#	{group: {cover point: {bin: count}}}, which are merged by adding the counts.
+#	The environment variables are:
+#	* POC_COVERAGE_DB=<file>, dump the coverage database at the end of a run,
+#	* POC_COVERAGE_TARGET=<n>, the default target count of all bins,
+#	* POC_COVERAGE_STOP=1, stop the stimulus when all bins reached their target,
+#	* POC_COVERAGE_DIRECTED=1, select the coverage-directed stimulus of a
+#	  testbench, see CoverageDirector.
+#
+#	A CoverageDirector is a weighted random choice between the alternatives of
+#	a stimulus generator, e.g., the commands of a DUT. The weight of an
+#	alternative is raised while one of the bins it can hit is below its target,
+#	so that, the stimulus moves on to the holes of the coverage. After closure,
+#	the base weights apply again.
+#
+#	Run this module as script to merge coverage databases and to print the
+#	uncovered bins.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import json
+import os
+import random
+from array import array
+from bisect import bisect_right
+
+from utils import append_report
+
+def merge_counts(total, counts):
+	"""Add the counters of the (nested) dictionary counts to total."""
+	for key, value in counts.items():
+		if isinstance(value, dict):
+			merge_counts(total.setdefault(key, {}), value)
+		else:
+			total[key] = total.get(key, 0) + value
+	return total
+
+
+class CoverPoint(object):
+	"""Counts the samples of each bin. Use CoverageGroup.point to create a cover point."""
+
+	def __init__(self, group, name, bins, target):
+		self.group = group
+		self.name = name
+		self.bins = [str(bin) for bin in bins]
+		self.target = target
+		self.counts = array("l", [0]) * len(self.bins)
+
+	def sample(self, index):
+		"""Count a sample of bin index."""
+		deferred = self.group.deferred
+		if deferred is not None:
+			deferred.append((self, index))
+			return
+		counts = self.counts
+		counts[index] += 1
+		if counts[index] == self.target:
+			self.group.missing -= 1
+
+	def holes(self):
+		"""Return the names of the bins below their target."""
+		return [bin for bin, count in zip(self.bins, self.counts) if count < self.target]
+
+	def to_dict(self):
+		return dict(zip(self.bins, self.counts))
+
+
+class CoverCross(CoverPoint):
+	"""Counts the samples of each combination of bins of the crossed cover points."""
+
+	def __init__(self, group, name, points, target):
+		"""points are cover points or lists of bin names."""
+		axes = [point.bins if isinstance(point, CoverPoint) else [str(bin) for bin in point] for point in points]
+		bins = [""]
+		for axis in axes:
+			bins = [(prefix + "," if prefix else "") + bin for prefix in bins for bin in axis]
+		CoverPoint.__init__(self, group, name, bins, target)
+		strides, stride = [], 1
+		for axis in reversed(axes):
+			strides.insert(0, stride)
+			stride *= len(axis)
+		self._strides = tuple(strides)
+
+	def sample(self, *indices):
+		"""Count a sample of the bin combination given by one bin index per crossed cover point."""
+		index = 0
+		for bin, stride in zip(indices, self._strides):
+			index += bin * stride
+		deferred = self.group.deferred
+		if deferred is not None:
+			deferred.append((self, index))
+			return
+		counts = self.counts
+		counts[index] += 1
+		if counts[index] == self.target:
+			self.group.missing -= 1
+
+
+class CoverageGroup(object):
+	"""Cover points and crosses of a testbench."""
+
+	def __init__(self, name, target=None):
+		self.name = name
+		self.target = target or int(os.environ.get("POC_COVERAGE_TARGET", 1))
+		self.points = []
+		self.missing = 0
+		# list of the deferred samples (cover point, flat bin index), or None
+		self.deferred = None
+
+	def point(self, name, bins, target=None):
+		"""Create a cover point with the given bin names."""
+		return self._add(CoverPoint(self, name, bins, target or self.target))
+
+	def cross(self, name, points, target=None):
+		"""Create a cross of the given cover points or lists of bin names."""
+		return self._add(CoverCross(self, name, points, target or self.target))
+
+	def _add(self, point):
+		self.points.append(point)
+		self.missing += len(point.bins)
+		return point
+
+	def defer(self):
+		"""Collect the following samples instead of counting them, see above."""
+		self.deferred = []
+
+	def take_deferred(self):
+		"""Return the samples collected since the last call."""
+		samples, self.deferred = self.deferred, []
+		return samples
+
+	def count(self, samples):
+		"""Count the samples returned by take_deferred."""
+		for point, index in samples:
+			counts = point.counts
+			counts[index] += 1
+			if counts[index] == point.target:
+				self.missing -= 1
+
+	@property
+	def done(self):
+		"""True, if all bins reached their target."""
+		return self.missing <= 0
+
+	def to_dict(self):
+		return {self.name: dict([(point.name, point.to_dict()) for point in self.points])}
+
+	def finish(self, log):
+		"""Log the coverage, append it to the report file and dump it to POC_COVERAGE_DB."""
+		for point in self.points:
+			holes = point.holes()
+			log.info("Coverage {0}.{1}: {2} of {3} bins covered{4}".format(self.name, point.name, len(point.bins) - len(holes),
+				len(point.bins), (", missing: " + ", ".join(holes[:8]) + (", ..." if len(holes) > 8 else "")) if holes else ""))
+		counts = self.to_dict()
+		append_report({"coverage": counts})
+		filename = os.environ.get("POC_COVERAGE_DB")
+		if filename:
+			with open(filename, "w") as db:
+				json.dump(counts, db, indent=1, sort_keys=True)
+
+
+class CoverageDirector(object):
+	"""
+	Weighted random choice between alternatives, directed to the holes of group.
+	weights are the base weights of the alternatives, bins is a list of
+	(cover point, bin index) pairs per alternative, which the alternative can
+	hit. The weight of an alternative is increased by boost (default: sum of the
+	base weights) while one of its bins is below its target. The weights are
+	only recomputed when the number of missing bins of group changes.
+	"""
+
+	def __init__(self, group, weights, bins, boost=None, rand=None):
+		self.group = group
+		self.weights = list(weights)
+		self.bins = bins
+		self.boost = boost if boost is not None else sum(self.weights)
+		self._rand = rand or random.random
+		self._missing = None
+
+	def _update(self):
+		self._missing = self.group.missing
+		self._cumulative, total = [], 0
+		for weight, bins in zip(self.weights, self.bins):
+			for point, index in bins:
+				if point.counts[index] < point.target:
+					weight += self.boost
+					break
+			total += weight
+			self._cumulative.append(total)
+		self._total = total
+
+	def choose(self):
+		"""Return the index of the chosen alternative."""
+		if self.group.missing != self._missing: self._update()
+		return min(bisect_right(self._cumulative, self._rand() * self._total), len(self.weights) - 1)
+
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Merge coverage databases and print the uncovered bins.")
+	parser.add_argument("-o", "--output", default=None, help="write merged coverage database")
+	parser.add_argument("--target", type=int, default=1, help="target count of all bins (default: %(default)s)")
+	parser.add_argument("databases", nargs="+")
+	args = parser.parse_args()
+
+	total = {}
+	for filename in args.databases:
+		with open(filename) as db:
+			merge_counts(total, json.load(db))
+	if args.output:
+		with open(args.output, "w") as db:
+			json.dump(total, db, indent=1, sort_keys=True)
+
+	for group in sorted(total):
+		for point in sorted(total[group]):
+			counts = total[group][point]
+			holes = sorted([bin for bin, count in counts.items() if count < args.target])
+			print("{0}.{1}: {2} of {3} bins covered".format(group, point, len(counts) - len(holes), len(counts)))
+			for bin in holes:
+				print("  missing: {0} ({1})".format(bin, counts[bin]))
@@ -13,7 +13,8 @@
 #
 #	The entries in this dictionary are ordered by the last addition or update
 #	of key:value pairs. The maximum size of the dictionary can be specified
-#	during object creation.
+#	during object creation. Insert, touch, moveLRU, peekLRU and popLRU are
+#	constant-time operations, see lru_dict_bench.py for a microbenchmark.
 #
 # License:
 # ==============================================================================
@@ -41,6 +42,10 @@ class LeastRecentlyUsedDict(OrderedDict):
 	of key:value pairs. The maximum size of the dictionary can be specified
 	during object creation.
 
+	All recency operations (insert, touch, moveLRU, peekLRU and popLRU) are
+	done in constant time by relinking the entry within the underlying
+	ordered dictionary. The least-recently used entry is the first one.
+
 	Based on this StackOverflow answer: http://stackoverflow.com/a/2437645/5466118
 	and the example on: https://docs.python.org/2/library/collections.html#ordereddict-examples-and-recipes
 	"""
@@ -56,20 +61,60 @@ class LeastRecentlyUsedDict(OrderedDict):
 
 	def __setitem__(self, key, value):
 		if key in self:
-			del self[key]
-		OrderedDict.__setitem__(self, key, value)
-		self._check_size_limit()
+			OrderedDict.__setitem__(self, key, value)
+			self._move_to_end(key, True)
+		else:
+			OrderedDict.__setitem__(self, key, value)
+			if (self._size_limit is not None) and (len(self) > self._size_limit):
+				self.popitem(last=False)
 
 	def _check_size_limit(self):
 		if self._size_limit is not None:
 			while len(self) > self._size_limit:
 				self.popitem(last=False)
 
+	if hasattr(OrderedDict, "move_to_end"):
+		def _move_to_end(self, key, last):
+			self.move_to_end(key, last)
+	else:
+		def _move_to_end(self, key, last):
+			# Python 2.7: relink the entry in the doubly linked list of OrderedDict.
+			# Each link is [PREV, NEXT, KEY], the root is a sentinel link.
+			link = self._OrderedDict__map[key]
+			link_prev, link_next = link[0], link[1]
+			link_prev[1] = link_next
+			link_next[0] = link_prev
+			root = self._OrderedDict__root
+			if last:
+				last_link = root[0]
+				link[0] = last_link
+				link[1] = root
+				last_link[1] = root[0] = link
+			else:
+				first_link = root[1]
+				link[0] = root
+				link[1] = first_link
+				root[1] = first_link[0] = link
+
+	if not hasattr(OrderedDict, "iteritems"):
+		# Python 3: provide the iterator methods used by the testbenches.
+		def iterkeys(self):   return iter(self.keys())
+		def itervalues(self): return iter(self.values())
+		def iteritems(self):  return iter(self.items())
+
 	@property
 	def size_limit(self):
 		"""Get the size limit."""
 		return self._size_limit
 
+	def touch(self, key):
+		"""
+		Mark key as most-recently used without changing its value.
+		Does nothing, if key is not within dictionary.
+		"""
+		if key in self:
+			self._move_to_end(key, True)
+
 	def moveLRU(self, key, value=None):
 		"""
 		Mark key as least-recently used.
@@ -77,19 +122,22 @@ class LeastRecentlyUsedDict(OrderedDict):
 		If no value is specified, then the current value of the key is used.
 		"""
 		if key in self:
-			old = self.copy()
-			if value is None:
-				value = self[key]
+			if value is not None:
+				OrderedDict.__setitem__(self, key, value)
+			self._move_to_end(key, False)
 
-			# build new list
-			self.clear()
-			self[key] = value
-			for k, v in old.iteritems():
-				if k == key: continue
-				self[k] = v
+	def peekLRU(self):
+		"""
+		Return the least-recently used (key, value) pair without changing the order.
+		Raises KeyError if dictionary is empty.
+		"""
+		for key in OrderedDict.__iter__(self):
+			return key, OrderedDict.__getitem__(self, key)
+		raise KeyError("peekLRU(): dictionary is empty")
 
-#d = LeastRecentlyUsedDict(size_limit=5)
-#for key in range(4,-1,-1): d[key]=1
-#print "old=%s" % d
-#d.markLRU(2)
-#print "new=%s" % d
+	def popLRU(self):
+		"""
+		Remove and return the least-recently used (key, value) pair.
+		Raises KeyError if dictionary is empty.
+		"""
+		return self.popitem(last=False)
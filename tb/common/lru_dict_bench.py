@@ -0,0 +1,87 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Script:		  Microbenchmark for LeastRecentlyUsedDict
+#
+# Description:
+# ------------------------------------
+#	Measures the cost per operation of LeastRecentlyUsedDict for different
+#	numbers of entries. All operations must have a constant cost, independent
+#	of the size of the dictionary.
+#
+#	Usage: python lru_dict_bench.py [operations_per_size]
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import random
+import sys
+from timeit import default_timer as timer
+
+from lru_dict import LeastRecentlyUsedDict
+
+SIZES = (16, 1024, 65536)
+
+def _filled(size):
+	d = LeastRecentlyUsedDict(size_limit=size)
+	for key in range(size): d[key] = key
+	return d
+
+def bench_insert(d, keys):
+	"""Insert new keys, each insert evicts the oldest entry."""
+	for key in keys: d[key] = key
+
+def bench_touch(d, keys):
+	"""Move existing keys to the most-recently used position without changing their value."""
+	for key in keys: d.touch(key)
+
+def bench_moveLRU(d, keys):
+	for key in keys: d.moveLRU(key)
+
+def bench_peekLRU(d, keys):
+	for _ in keys: d.peekLRU()
+
+def bench_popLRU(d, keys):
+	"""Evict the oldest entry and refill the dictionary."""
+	for key in keys:
+		d.popLRU()
+		d[key] = key
+
+def run(operations):
+	benches = (("insert", bench_insert, True), ("touch", bench_touch, False), ("moveLRU", bench_moveLRU, False),
+						 ("peekLRU", bench_peekLRU, False), ("popLRU", bench_popLRU, True))
+
+	print("{0:>8} | {1}".format("entries", " | ".join(["{0:>10}".format(name) for name, _, _ in benches])))
+	for size in SIZES:
+		existing = [random.randint(0, size-1) for _ in range(operations)]
+		fresh = range(size, size + operations)
+		results = []
+		for _, bench, new_keys in benches:
+			d = _filled(size)
+			start = timer()
+			bench(d, fresh if new_keys else existing)
+			results.append((timer() - start) / operations * 1e9)
+		print("{0:>8} | {1}".format(size, " | ".join(["{0:>7.0f} ns".format(ns) for ns in results])))
+
+if __name__ == "__main__":
+	run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
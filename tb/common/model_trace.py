@@ -0,0 +1,130 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Structured trace events of the reference models
+#
+# Description:
+# ------------------------------------
+#	Trace events of the reference models and stimulus generators are written as
+#	one compact JSON object per line, e.g.,
+#	  {"ev":"predict","seq":42,"set":3,"address":1234,"hit":1}
+#	instead of formatted strings on stdout. The trace file is compressed if its
+#	name ends with ".gz".
+#
+#	The environment variables are:
+#	* POC_TRACE=<file>, write the trace events to this file,
+#	* POC_TRACE_LEVEL=<n>, the maximum level of the written events (default: 1):
+#	  1 = transactions of the model, 2 = model state, e.g., the content of a
+#	  cache set or the LRU order, 3 = stimulus.
+#
+#	A trace event is guarded by the module constant TRACE_LEVEL, which is 0 if
+#	tracing is disabled. The event is only built if the level is enabled:
+#	  if TRACE_LEVEL >= TRACE_STATE: trace("cache_set", set=index, lines=...)
+#
+#	Run this module as script to filter a trace file by event and field values.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import atexit
+import gzip
+import json
+import os
+
+# trace levels
+TRACE_TRANSACTIONS = 1
+TRACE_STATE = 2
+TRACE_STIMULUS = 3
+
+def open_trace_file(filename, mode):
+	"""Open a text file, which is compressed if its name ends with .gz."""
+	if filename.endswith(".gz"):
+		return gzip.open(filename, mode + "t") if str is not bytes else gzip.open(filename, mode)
+	return open(filename, mode)
+
+
+class ModelTrace(object):
+	"""Writes trace events up to level as JSON lines to filename."""
+
+	def __init__(self, filename, level=TRACE_TRANSACTIONS):
+		self.filename = filename
+		self.level = level
+		self.count = 0
+		self._file = open_trace_file(filename, "w")
+		self._encode = json.JSONEncoder(separators=(",", ":")).encode
+
+	def __call__(self, event, **fields):
+		"""Write the event with the given fields and a sequence number."""
+		fields["ev"] = event
+		fields["seq"] = self.count
+		self.count += 1
+		self._file.write(self._encode(fields) + "\n")
+
+	def flush(self):
+		self._file.flush()
+
+	def close(self):
+		if not self._file.closed: self._file.close()
+
+
+def create_trace():
+	"""Return the ModelTrace given by POC_TRACE and POC_TRACE_LEVEL, or None."""
+	filename = os.environ.get("POC_TRACE")
+	level = int(os.environ.get("POC_TRACE_LEVEL", TRACE_TRANSACTIONS))
+	if not filename or level <= 0: return None
+	model_trace = ModelTrace(filename, level)
+	atexit.register(model_trace.close)
+	return model_trace
+
+# the trace of this process, if enabled
+trace = create_trace()
+TRACE_LEVEL = trace.level if trace is not None else 0
+
+
+def parse_field(text):
+	"""Parse a field filter NAME=value, the value is an integer if possible."""
+	name, _, value = text.partition("=")
+	try:
+		return name, int(value, 0)
+	except ValueError:
+		return name, value
+
+
+if __name__ == "__main__":
+	import argparse
+	import sys
+
+	parser = argparse.ArgumentParser(description="Filter a trace file of the reference models.")
+	parser.add_argument("-e", "--event", action="append", default=[], help="keep only this event (repeatable)")
+	parser.add_argument("-w", "--where", type=parse_field, action="append", default=[],
+		help="keep only events with field NAME=value, e.g. set=3 or address=0x1f (repeatable)")
+	parser.add_argument("filename")
+	args = parser.parse_args()
+
+	events = set(args.event)
+	with open_trace_file(args.filename, "r") as f:
+		for line in f:
+			record = json.loads(line)
+			if events and record["ev"] not in events: continue
+			if any([record.get(name) != value for name, value in args.where]): continue
+			sys.stdout.write(line)
@@ -0,0 +1,184 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Offline differential check of Cocotb testbenches
+#
+# Description:
+# ------------------------------------
+#	If the environment variable POC_OFFLINE_CHECK=<prefix> is set, then a
+#	ModelTestbench does not run its reference model within the simulator.
+#	Instead, the monitors only append the sampled inputs and outputs of each
+#	clock cycle to two binary files, which are written in large blocks:
+#
+#	* <prefix>.input.trace: the applied input transactions, a stimulus trace
+#	  file, see stimulus_trace.py. It can also be replayed.
+#	* <prefix>.output.trace: the sampled outputs, each record holds the output
+#	  word followed by the mask of the unknown bits, in the same container
+#	  format. The header names the reference model and its parameters.
+#
+#	Run this module as script afterwards to check the recording. The reference
+#	model is re-created (see reference_model.py) and applied to the recorded
+#	inputs. The outputs are compared against the expected outputs in blocks by
+#	NumPy, and the first diverging clock cycle is reported together with the
+#	model state at this cycle.
+#
+#	Example:
+#	  POC_OFFLINE_CHECK=run1 <simulator command>
+#	  python offline_check.py run1
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import os
+from itertools import chain, islice
+
+from reference_model import create_model
+from stimulus_trace import VERSION, TraceReader, TraceWriter, read_header, to_bytes, write_header
+
+INPUT_SUFFIX = ".input.trace"
+OUTPUT_SUFFIX = ".output.trace"
+
+class OutputWriter(object):
+	"""Writes output transactions (word, unknown) of layout, header holds additional entries."""
+
+	def __init__(self, filename, layout, header=None, buffer_size=1 << 20):
+		self.layout = layout
+		self.word_bytes = max(1, (layout.width + 7) // 8)
+		self.record_bytes = 2 * self.word_bytes
+		header = dict(header or {})
+		header.update({"version": VERSION, "signals": list(zip(layout.names, layout.widths)),
+									 "record_bytes": self.record_bytes, "unknown": True})
+		self._file = open(filename, "wb", buffer_size)
+		write_header(self._file, header)
+		self._shift = 8 * self.word_bytes
+		self.count = 0
+
+	def write(self, transaction):
+		word, unknown = transaction
+		self._file.write(to_bytes(word | (unknown << self._shift), self.record_bytes))
+		self.count += 1
+
+	def close(self):
+		self._file.close()
+
+
+class OfflineRecording(object):
+	"""Input and output files of a test run with the reference model model, see above."""
+
+	def __init__(self, prefix, model):
+		self.prefix = prefix
+		self.inputs = TraceWriter(prefix + INPUT_SUFFIX, model.input_layout)
+		self.outputs = OutputWriter(prefix + OUTPUT_SUFFIX, model.output_layout, {"model": model.name, "parameters": model.parameters})
+
+	def close(self):
+		self.inputs.close()
+		self.outputs.close()
+
+
+def _expected_outputs(model, inputs):
+	"""Yield the expected output of each clock cycle: the initial value, then the prediction of each input."""
+	return chain([model.output_layout.expected(model.init_val)], (model.predict(transaction) for transaction in inputs))
+
+def check(prefix, block=1 << 16):
+	"""
+	Check the recording of prefix. Returns (cycles, divergence), where
+	divergence is None if all checked cycles match, and otherwise a dictionary
+	with the first diverging clock cycle and a description.
+	"""
+	import numpy as np
+
+	filename = prefix + OUTPUT_SUFFIX
+	with open(filename, "rb") as f:
+		header, offset = read_header(f, filename)
+	record_bytes, word_bytes = header["record_bytes"], header["record_bytes"] // 2
+	count = (os.path.getsize(filename) - offset) // record_bytes
+	if count == 0: return 0, None
+	outputs = np.memmap(filename, np.uint8, "r", offset, (count, record_bytes))
+
+	model = create_model(header["model"], header["parameters"])
+	inputs = TraceReader(prefix + INPUT_SUFFIX, model.input_layout)
+	expected = _expected_outputs(model, inputs)
+
+	cycles = 0
+	while cycles < count:
+		exp = list(islice(expected, min(block, count - cycles)))
+		if not exp: break
+		size = len(exp)
+		exp_word = np.frombuffer(b"".join([to_bytes(word, word_bytes) for word, _ in exp]), np.uint8).reshape(size, word_bytes)
+		care = np.frombuffer(b"".join([to_bytes(care, word_bytes) for _, care in exp]), np.uint8).reshape(size, word_bytes)
+		got = outputs[cycles:cycles + size]
+		mismatch = (((got[:, :word_bytes] ^ exp_word) | got[:, word_bytes:]) & care).any(axis=1)
+		if mismatch.any():
+			cycle = cycles + int(np.argmax(mismatch))
+			inputs.close()
+			return cycle, _describe(prefix, header, cycle, exp[cycle - cycles], outputs[cycle])
+		cycles += size
+	inputs.close()
+	return cycles, None
+
+def _describe(prefix, header, cycle, exp, got):
+	"""Re-run a fresh model up to the diverging cycle and describe the divergence."""
+	model = create_model(header["model"], header["parameters"])
+	inputs = TraceReader(prefix + INPUT_SUFFIX, model.input_layout)
+	transaction = None
+	for transaction in islice(inputs, cycle):
+		model.predict(transaction)
+	inputs.close()
+	record = bytearray(got)
+	word_bytes = len(record) // 2
+	word = sum([byte << (8 * i) for i, byte in enumerate(record[:word_bytes])])
+	unknown = sum([byte << (8 * i) for i, byte in enumerate(record[word_bytes:])])
+	layout = model.output_layout
+	return {
+		"cycle":    cycle,
+		"input":    transaction,
+		"expected": layout.format_expected(exp),
+		"received": layout.format_received((word, unknown)),
+		"model":    model.describe_model(transaction) if transaction is not None else None
+	}
+
+
+if __name__ == "__main__":
+	import argparse
+	import sys
+
+	parser = argparse.ArgumentParser(description="Check the recorded outputs of a test run against the reference model.")
+	parser.add_argument("-p", "--path", action="append", default=[],
+		help="directory of the Python modules of the testbench (default: directory of the recording)")
+	parser.add_argument("-b", "--block", type=int, default=1 << 16, help="cycles compared at once (default: %(default)s)")
+	parser.add_argument("prefix", help="prefix of the recording, i.e., the value of POC_OFFLINE_CHECK")
+	args = parser.parse_args()
+
+	for path in reversed(args.path or [os.path.dirname(os.path.abspath(args.prefix))]):
+		sys.path.insert(0, path)
+
+	cycles, divergence = check(args.prefix, args.block)
+	if divergence is None:
+		print("PASSED: {0} clock cycles match the reference model.".format(cycles))
+		sys.exit(0)
+	print("FAILED: first divergence at clock cycle {0}.".format(divergence["cycle"]))
+	print("Input of previous cycle: {0!s}".format(divergence["input"]))
+	print("Expected: {0}".format(divergence["expected"]))
+	print("Received: {0}".format(divergence["received"]))
+	if divergence["model"] is not None: print("Model state: {0}".format(divergence["model"]))
+	sys.exit(1)
@@ -0,0 +1,125 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Packed integer transactions for Cocotb Testbenches
+#
+# Description:
+# ------------------------------------
+#	Transactions of a bus are represented by plain integers instead of one
+#	BinaryValue per signal.
+#
+#	A BusLayout lists the signals of a bus (the _signals list of a driver or
+#	monitor) together with their widths, e.g. derived from generics like
+#	ADDRESS_BITS or DATA_BITS. The first signal is packed into the least
+#	significant bits. The shift and mask of each signal is precomputed.
+#
+#	* Input transactions are tuples of integers in the order of _signals, which
+#	  are driven by PackedBusDriver.
+#	* Received transactions are tuples (word, unknown) created by
+#	  PackedBusMonitor. The bits of unresolvable signals (X, U, ...) are set in
+#	  unknown.
+#	* Expected transactions are tuples (word, care) created by
+#	  BusLayout.expected. Signals with expected value None are don't care.
+#
+#	PackedScoreboard compares a received with an expected transaction by a
+#	single masked integer comparison.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from collections import deque
+
+from cocotb.decorators import coroutine
+from cocotb.triggers import RisingEdge
+from cocotb.monitors import BusMonitor
+from cocotb.drivers import BusDriver
+from cocotb.result import TestFailure
+
+from bus_sampler import BusSampler
+from cocotb_profile import timed
+from stream_scoreboard import StreamingScoreboard
+
+class PackedBusDriver(BusDriver):
+	"""Drives a transaction given as tuple of integers in the order of _signals."""
+
+	def __init__(self, entity, name, clock):
+		BusDriver.__init__(self, entity, name, clock)
+		self._handles = tuple([getattr(self.bus, signal) for signal in self._signals])
+
+	def drive(self, transaction):
+		"""Drive transaction immediately, bypassing the send queue of the Cocotb driver."""
+		for handle, value in zip(self._handles, transaction):
+			handle <= value
+
+	@coroutine
+	def _driver_send(self, transaction, sync=True):
+		if sync:
+			yield RisingEdge(self.clock)
+		self.drive(transaction)
+
+
+class PackedBusMonitor(BusMonitor):
+	"""
+	Samples the signals of _signals at each rising clock edge into a tuple (word, unknown).
+	"""
+
+	def __init__(self, entity, name, clock, layout, reset=None, callback=None, event=None):
+		BusMonitor.__init__(self, entity, name, clock, reset, callback=callback, event=event)
+		self.layout = layout
+		self.sampler = BusSampler(self.bus, self._signals, layout)
+
+	@coroutine
+	def _monitor_recv(self):
+		clkedge = RisingEdge(self.clock)
+		sample = timed("sample", self.sampler.sample_packed)
+
+		while True:
+			# Capture signals at rising-edge of clock.
+			yield clkedge
+			self._recv(sample())
+
+
+class PackedScoreboard(StreamingScoreboard):
+	"""
+	Compares received (word, unknown) against expected (word, care) transactions.
+	The last history_depth pairs (received, expected) are kept in the ring
+	buffer history. on_mismatch(log) is called on the first mismatch.
+	"""
+
+	def __init__(self, dut, layout, history_depth=0, on_mismatch=None, **kwargs):
+		StreamingScoreboard.__init__(self, dut, **kwargs)
+		self.layout = layout
+		self.history = deque(maxlen=history_depth)
+		self.on_mismatch = on_mismatch
+
+	def compare(self, got, exp, log, **_):
+		self.history.append((got, exp))
+		got_word, unknown = got
+		exp_word, care = exp
+		if ((got_word ^ exp_word) | unknown) & care:
+			self.errors += 1
+			log.error("Received transaction differed from expected output.")
+			log.warning("Expected: {0!s}.\nReceived: {1!s}.".format(self.layout.format_expected(exp), self.layout.format_received(got)))
+			if (self.errors == 1) and (self.on_mismatch is not None):
+				self.on_mismatch(log)
+			if self._imm:
+				raise TestFailure("Received transaction differed from expected transaction.")
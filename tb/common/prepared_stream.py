@@ -0,0 +1,81 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Prepared stimulus and expected output streams
+#
+# Description:
+# ------------------------------------
+#	Runs a stimulus generator together with the reference model in a
+#	background thread, so that, the Python cost of the model is not paid in the
+#	simulator callbacks. The simulator releases the Python interpreter while it
+#	simulates, thus, the background thread runs in parallel to the simulation.
+#
+#	The prepared items are passed in chunks through a bounded queue, so that,
+#	the memory usage does not depend on the number of transactions.
+#
+#	The ahead-of-time model mode of the Cocotb testbenches is enabled by the
+#	environment variable POC_AOT_MODEL=1.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import sys
+import threading
+try:
+	from queue import Queue
+except ImportError:
+	from Queue import Queue
+
+
+class PreparedStream(object):
+	"""
+	Iterate over the items of iterable, which are prepared by a background
+	thread. At most depth chunks of chunk_size items are prepared in advance.
+	Exceptions raised by iterable are re-raised by the consumer.
+	"""
+
+	def __init__(self, iterable, chunk_size=1024, depth=16):
+		self._queue = Queue(maxsize=depth)
+		self._thread = threading.Thread(target=self._prepare, args=(iterable, chunk_size), name="PreparedStream")
+		self._thread.daemon = True
+		self._thread.start()
+
+	def _prepare(self, iterable, chunk_size):
+		try:
+			chunk = []
+			for item in iterable:
+				chunk.append(item)
+				if len(chunk) == chunk_size:
+					self._queue.put(chunk)
+					chunk = []
+			if chunk: self._queue.put(chunk)
+			self._queue.put(None)
+		except Exception:
+			self._queue.put(sys.exc_info()[1])
+
+	def __iter__(self):
+		while True:
+			chunk = self._queue.get()
+			if chunk is None: return
+			if isinstance(chunk, Exception): raise chunk
+			for item in chunk:
+				yield item
@@ -0,0 +1,70 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Reference models independent of Cocotb
+#
+# Description:
+# ------------------------------------
+#	Base class of the reference models of the model-based Cocotb testbenches.
+#	A reference model does not depend on Cocotb, so that, the same model code
+#	is used by the testbench within the simulator and by the offline checker,
+#	see offline_check.py.
+#
+#	A model is re-created from its name "<module>.<class>" and its parameters,
+#	i.e., the keyword arguments of its constructor.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import importlib
+
+
+class ReferenceModel(object):
+	"""
+	Reference model of a DUT. A derived class sets input_layout, output_layout
+	and init_val (see ModelTestbench) and implements predict. It passes its
+	constructor arguments as keyword arguments to ReferenceModel.__init__.
+	"""
+
+	# CoverageGroup sampled by predict, if any
+	coverage = None
+
+	def __init__(self, **parameters):
+		self.parameters = parameters
+
+	@property
+	def name(self):
+		return "{0}.{1}".format(type(self).__module__, type(self).__name__)
+
+	def predict(self, transaction):
+		"""Update the model and return the expected output transaction, see BusLayout.expected."""
+		raise NotImplementedError
+
+	def describe_model(self, transaction):
+		"""Return a description of the model state related to the input transaction, or None."""
+		return None
+
+
+def create_model(name, parameters):
+	"""Create the reference model of the given name "<module>.<class>" with the given parameters."""
+	module, _, cls = name.rpartition(".")
+	return getattr(importlib.import_module(module), cls)(**parameters)
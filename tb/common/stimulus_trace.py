@@ -0,0 +1,194 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Record and replay of stimulus traces
+#
+# Description:
+# ------------------------------------
+#	Stores the input transactions of a Cocotb testbench, one per clock cycle, in
+#	a binary trace file, and streams them back from a memory-mapped file.
+#
+#	File format (all integers little-endian):
+#	* 8 bytes magic "POCTRACE",
+#	* 4 bytes length of the header,
+#	* header in JSON: version, the signals of the bus as list of [name, width]
+#	  (the _signals of the input driver) and the bytes per record,
+#	* fixed-width records: the transaction packed by the BusLayout of the
+#	  signals, see bus_layout.py.
+#
+#	The number of records is derived from the file size, a truncated last record
+#	is ignored.
+#
+#	The mode is selected by environment variables:
+#	* POC_STIMULUS_RECORD=<file> records the generated stimulus,
+#	* POC_STIMULUS_REPLAY=<file> replays the stimulus instead of generating it.
+#
+#	Run this module as script to print the header and records of a trace file.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import binascii
+import json
+import mmap
+import os
+import struct
+
+from bus_layout import BusLayout
+
+MAGIC = b"POCTRACE"
+VERSION = 1
+
+if hasattr(int, "from_bytes"):
+	# Python 3
+	def to_bytes(word, length):
+		"""Little-endian representation of a non-negative integer."""
+		return word.to_bytes(length, "little")
+
+	def from_bytes(data):
+		return int.from_bytes(data, "little")
+else:
+	def to_bytes(word, length):
+		"""Little-endian representation of a non-negative integer."""
+		return binascii.unhexlify("{0:0{1}x}".format(word, 2 * length))[::-1]
+
+	def from_bytes(data):
+		return int(binascii.hexlify(data[::-1]), 16)
+
+def write_header(f, header):
+	"""Write the magic, the length and the JSON header to the binary file f."""
+	header = json.dumps(header).encode("utf-8")
+	f.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+def read_header(f, filename):
+	"""Read the header of a trace file, return (header, offset of the first record)."""
+	if f.read(len(MAGIC)) != MAGIC:
+		raise ValueError("{0} is not a stimulus trace file.".format(filename))
+	length, = struct.unpack("<I", f.read(4))
+	header = json.loads(f.read(length).decode("utf-8"))
+	if header["version"] != VERSION:
+		raise ValueError("Unsupported version {0} of trace file {1}.".format(header["version"], filename))
+	return header, len(MAGIC) + 4 + length
+
+
+class TraceWriter(object):
+	"""Writes transactions, i.e., tuples of integers in the order of the layout's signals."""
+
+	def __init__(self, filename, layout, buffer_size=1 << 20):
+		self.layout = layout
+		self.record_bytes = max(1, (layout.width + 7) // 8)
+		self._file = open(filename, "wb", buffer_size)
+		write_header(self._file, {"version": VERSION, "signals": list(zip(layout.names, layout.widths)),
+															"record_bytes": self.record_bytes})
+		self.count = 0
+
+	def write(self, transaction):
+		self._file.write(to_bytes(self.layout.pack(transaction), self.record_bytes))
+		self.count += 1
+
+	def close(self):
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+
+class TraceReader(object):
+	"""
+	Memory-mapped reader of a trace file. If layout is given, then the signals
+	of the file must match the signals of the layout.
+	"""
+
+	def __init__(self, filename, layout=None):
+		self._file = open(filename, "rb")
+		self.header, self._offset = read_header(self._file, filename)
+
+		signals = [tuple(signal) for signal in self.header["signals"]]
+		if (layout is not None) and (signals != list(zip(layout.names, layout.widths))):
+			raise ValueError("Signals {0!s} of trace file {1} do not match the bus {2!s}.".format(
+				signals, filename, list(zip(layout.names, layout.widths))))
+		self.layout = BusLayout(signals)
+		self.record_bytes = self.header["record_bytes"]
+		self._map = None
+		size = os.fstat(self._file.fileno()).st_size
+		if size > self._offset:
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.count = (size - self._offset) // self.record_bytes
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		"""Yield the transactions of the trace file."""
+		if self._map is None: return
+		data, unpack, step = self._map, self.layout.unpack, self.record_bytes
+		for offset in range(self._offset, self._offset + self.count * step, step):
+			yield unpack(from_bytes(data[offset:offset + step]))
+
+	def close(self):
+		if self._map is not None: self._map.close()
+		self._file.close()
+
+
+def record(input_gen, writer):
+	"""Yield the transactions of input_gen and write them to writer."""
+	try:
+		for transaction in input_gen:
+			writer.write(transaction)
+			yield transaction
+	finally:
+		writer.close()
+
+def stimulus_source(layout, input_gen):
+	"""
+	Return the stimulus of a testbench depending on the environment variables
+	POC_STIMULUS_REPLAY and POC_STIMULUS_RECORD: the transactions of a trace
+	file, input_gen while recording it, or just input_gen.
+	"""
+	replay = os.environ.get("POC_STIMULUS_REPLAY")
+	if replay:
+		return iter(TraceReader(replay, layout))
+	filename = os.environ.get("POC_STIMULUS_RECORD")
+	if filename:
+		return record(input_gen, TraceWriter(filename, layout))
+	return input_gen
+
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Print a stimulus trace file.")
+	parser.add_argument("-n", type=int, default=10, help="number of records to print (default: %(default)s, all: -1)")
+	parser.add_argument("trace")
+	args = parser.parse_args()
+
+	reader = TraceReader(args.trace)
+	print("signals: {0}".format(", ".join(["{0}[{1}]".format(name, width) for name, width in reader.header["signals"]])))
+	print("records: {0} of {1} bytes".format(len(reader), reader.record_bytes))
+	for number, transaction in enumerate(reader):
+		if number == args.n: break
+		print("{0:>8}: {1}".format(number, ", ".join(["{0}={1:#x}".format(name, value) for name, value in zip(reader.layout.names, transaction)])))
+	reader.close()
@@ -0,0 +1,137 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Streaming scoreboard for Cocotb Testbenches
+#
+# Description:
+# ------------------------------------
+#	Provides a queue of expected transactions with constant-time append and
+#	pop and a bounded number of in-flight transactions, as well as a Cocotb
+#	scoreboard which consumes this queue.
+#
+#	Expected transactions are released as soon as they are matched, so that,
+#	the memory usage does not depend on the number of transactions. The peak
+#	backlog is reported with the result of the scoreboard.
+#
+#	The maximum in-flight depth can be changed by the environment variable
+#	POC_SCOREBOARD_DEPTH.
+#
+#	If the environment variable POC_COCOTB_REPORT is set, then the result of the
+#	scoreboard is appended as one JSON line to this file, see cocotb_sweep.py.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import logging
+import os
+from collections import deque
+
+from cocotb.monitors import Monitor
+from cocotb.result import TestFailure
+from cocotb.scoreboard import Scoreboard
+
+from utils import append_report, point_generics
+
+# default maximum number of expected transactions in flight
+DEFAULT_DEPTH = int(os.environ.get("POC_SCOREBOARD_DEPTH", 1024))
+
+class ExpectedQueue(object):
+	"""
+	FIFO of expected transactions. Raises TestFailure if more than max_depth
+	transactions are waiting to be matched. The maximum backlog observed is
+	available as peak.
+	"""
+
+	def __init__(self, items=(), max_depth=DEFAULT_DEPTH):
+		self._queue = deque()
+		self.max_depth = max_depth
+		self.peak = 0
+		for item in items: self.append(item)
+
+	def append(self, item):
+		queue = self._queue
+		queue.append(item)
+		depth = len(queue)
+		if depth > self.peak:
+			self.peak = depth
+			if (self.max_depth is not None) and (depth > self.max_depth):
+				raise TestFailure("More than {0} expected transactions are in flight.".format(self.max_depth))
+
+	def popleft(self):
+		return self._queue.popleft()
+
+	def pop(self, index=0):
+		"""Compatibility with the list interface used by cocotb.scoreboard.Scoreboard."""
+		if index != 0: raise IndexError("ExpectedQueue supports only pop(0).")
+		return self._queue.popleft()
+
+	def __len__(self):
+		return len(self._queue)
+
+	def __getitem__(self, index):
+		return self._queue[index]
+
+	def __iter__(self):
+		return iter(self._queue)
+
+
+class StreamingScoreboard(Scoreboard):
+	"""
+	Scoreboard which matches each received transaction against the head of an
+	ExpectedQueue. Reordering is not supported.
+	"""
+
+	def add_interface(self, monitor, expected_output, compare_fn=None, **kwargs):
+		if (compare_fn is not None) or not isinstance(expected_output, ExpectedQueue):
+			return Scoreboard.add_interface(self, monitor, expected_output, compare_fn, **kwargs)
+		if not isinstance(monitor, Monitor):
+			raise TypeError("Expected monitor on the interface but got %s" % (monitor.__class__.__name__))
+
+		self.expected[monitor] = expected_output
+		log = logging.getLogger(self.log.name + '.' + (monitor.name or monitor.__class__.__name__))
+		compare = self.compare
+		popleft = expected_output.popleft
+
+		def check_received_transaction(transaction):
+			if len(expected_output):
+				compare(transaction, popleft(), log)
+			else:
+				self.errors += 1
+				log.error("Received a transaction but wasn't expecting anything")
+				log.info("Got: %s" % (str(transaction)))
+				if self._imm:
+					raise TestFailure("Received a transaction but wasn't expecting anything")
+
+		monitor.add_callback(check_received_transaction)
+		return check_received_transaction
+
+	@property
+	def result(self):
+		peaks = {}
+		for monitor, expected_output in self.expected.items():
+			if isinstance(expected_output, ExpectedQueue):
+				self.log.info("Peak backlog of expected transactions on %s: %d" % (monitor.name, expected_output.peak))
+				peaks[monitor.name or monitor.__class__.__name__] = expected_output.peak
+		result = Scoreboard.result.fget(self)
+		append_report({"testbench": self.dut._name, "errors": self.errors, "peak_backlog": peaks,
+									 "generics": point_generics(self.dut), "passed": not isinstance(result, TestFailure)})
+		return result
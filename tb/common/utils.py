@@ -34,6 +34,9 @@
 # limitations under the License.
 # ==============================================================================
 
+import json
+import os
+
 def log2ceil(arg):
 	"""Calculates: ceil(ld(arg)) for integers."""
 	if arg == 1: return 0
@@ -50,3 +53,41 @@ def log2ceilnz(arg):
 	res = log2ceil(arg)
 	if res == 0: return 1
 	return res
+
+def getenv_flag(name, default=False):
+	"""Returns True, if environment variable name is set to 1, yes, on or true."""
+	value = os.environ.get(name)
+	if value is None: return default
+	return value.strip().lower() in ("1", "yes", "on", "true")
+
+def vector_generic(value):
+	"""Returns the integer value of a vector generic given as bit string."""
+	return int(str(getattr(value, "binstr", value)).strip('"'), 2)
+
+def append_report(record, name="POC_COCOTB_REPORT"):
+	"""
+	Appends record as one JSON line to the file given by environment variable
+	name, if set. The identifier of the sweep point in POC_COCOTB_POINT is added
+	to the record, if set, see cocotb_sweep.py.
+	"""
+	filename = os.environ.get(name)
+	if not filename: return
+	point = os.environ.get("POC_COCOTB_POINT")
+	if point: record = dict(record, point=point)
+	with open(filename, "a") as report:
+		report.write(json.dumps(record, sort_keys=True) + "\n")
+
+def point_generics(dut):
+	"""
+	Returns the values of the generics listed in the environment variable
+	GENERICS (<name>=<value>, space separated) as read back from dut. Generics
+	which are not accessible are skipped.
+	"""
+	values = {}
+	for generic in os.environ.get("GENERICS", "").split():
+		name = generic.partition("=")[0]
+		try:
+			values[name] = str(getattr(dut, name).value)
+		except AttributeError:
+			pass
+	return values
@@ -11,6 +11,21 @@
 # ------------------------------------
 #	Automated testbench for PoC.sort_LeastRecentlyUsed
 #
+# The reference model is called from the input monitor by default. If the
+# environment variable POC_AOT_MODEL=1 is set, then the stimulus and the expected
+# outputs are computed ahead of time in a background thread, and the input
+# monitor only checks that the inputs were applied as planned.
+#
+# The stimulus is written to a trace file if POC_STIMULUS_RECORD=<file> is set,
+# and read back from a trace file if POC_STIMULUS_REPLAY=<file> is set, see
+# stimulus_trace.py.
+#
+# Trace events of the model are written to a file if POC_TRACE=<file> is set,
+# see model_trace.py.
+#
+# The commands and keys are directed towards the holes of the functional
+# coverage if POC_COVERAGE_DIRECTED=1 is set, e.g., a free of each key.
+#
 # License:
 # ==============================================================================
 # Copyright 2007-2016 Technische Universitaet Dresden - Germany
@@ -29,128 +44,30 @@
 # limitations under the License.
 # ==============================================================================
 
-#import traceback
 import random
 
 import cocotb
-from cocotb.decorators import coroutine
-from cocotb.triggers import Timer, RisingEdge
-from cocotb.monitors import BusMonitor
-from cocotb.drivers import BusDriver
-from cocotb.binary import BinaryValue
 from cocotb.regression import TestFactory
-from cocotb.scoreboard import Scoreboard
 
-from lru_dict import LeastRecentlyUsedDict
+from cocotb_testbench import ModelTestbench, transaction_count
+from func_coverage import CoverageDirector, CoverageGroup
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from sort_lru_model import LruCacheModel
+from utils import getenv_flag
 
 # ==============================================================================
-class InputDriver(BusDriver):
-	"""Drives inputs of DUT."""
-	_signals = [ "Insert", "Free", "KeyIn" ]
-
+class Testbench(ModelTestbench):
 	def __init__(self, dut):
-		BusDriver.__init__(self, dut, None, dut.Clock)
-
-class InputTransaction(object):
-	"""Creates transaction to be send by InputDriver"""
-	def __init__(self, insert, invalidate, keyin):
-		self.Insert = BinaryValue(insert, 1)
-		self.Free = BinaryValue(invalidate, 1)
-		self.KeyIn = BinaryValue(keyin, 5, False)
-
-# ==============================================================================
-class InputMonitor(BusMonitor):
-	"""Observes inputs of DUT."""
-	_signals = [ "Insert", "Free", "KeyIn" ]
-
-	def __init__(self, dut, callback=None, event=None):
-		BusMonitor.__init__(self, dut, None, dut.Clock, dut.Reset, callback=callback, event=event)
-		self.name = "in"
-
-	@coroutine
-	def _monitor_recv(self):
-		clkedge = RisingEdge(self.clock)
-
-		while True:
-			# Capture signals at rising-edge of clock.
-			yield clkedge
-			vec = tuple([getattr(self.bus,i).value.integer for i in self._signals])
-			self._recv(vec)
-
-# ==============================================================================
-class OutputMonitor(BusMonitor):
-	"""Observes outputs of DUT."""
-	_signals = [ "KeyOut" ]
-
-	def __init__(self, dut, callback=None, event=None):
-		BusMonitor.__init__(self, dut, None, dut.Clock, dut.Reset, callback=callback, event=event)
-		self.name = "out"
-
-	@coroutine
-	def _monitor_recv(self):
-		clkedge = RisingEdge(self.clock)
-
-		while True:
-			# Capture signals at rising-edge of clock.
-			yield clkedge
-			vec = self.bus.KeyOut.value.integer
-			self._recv(vec)
-
-# ==============================================================================
-class Testbench(object):
-	def __init__(self, dut):
-		self.dut = dut
-		self.stopped = False
-		elements = dut.ELEMENTS.value;
-		self.lru = LeastRecentlyUsedDict(size_limit=elements)
-
-		# initial state of LRU list
-		for keyin in range(elements-1, -1, -1):
-			self.lru[keyin] = 1
-
-		init_val = elements-1
-
-		self.input_drv = InputDriver(dut)
-		self.output_mon = OutputMonitor(dut)
-
-		# Create a scoreboard on the outputs
-		self.expected_output = [ init_val ]
-		self.scoreboard = Scoreboard(dut)
-		self.scoreboard.add_interface(self.output_mon, self.expected_output)
-
-		# Reconstruct the input transactions from the pins
-		# and send them to our 'model'
-		self.input_mon = InputMonitor(dut, callback=self.model)
-
-	def model(self, transaction):
-		'''Model the DUT based on the input transaction.'''
-		insert, free, keyin = transaction
-		#print "=== model called with stopped=%r, Insert=%d, Free=%d, KeyIn=%d" % (self.stopped, insert, free, keyin)
-		if not self.stopped:
-			if insert == 1:
-				self.lru[keyin] = 1
-			elif free == 1:
-				self.lru.moveLRU(keyin)
-
-			#print "=== model: lru=%s" % self.lru.items()
-			keyout = self.lru.iterkeys().next()
-			#print "=== model: KeyOut=%d" % keyout
-			self.expected_output.append(keyout)
-
-	def stop(self):
-		"""
-		Stop generation of expected output transactions.
-		One more clock cycle must be executed afterwards, so that, output of
-		D-FF can be checked.
-		"""
-		self.stopped = True
+		model = LruCacheModel(dut.ELEMENTS.value)
+		self.reference_model = model
+		ModelTestbench.__init__(self, dut, model.input_layout, model.output_layout, model.init_val)
 
 
 # ==============================================================================
 def random_input_gen(n=2000):
 	"""
 	Generate random input data to be applied by InputDriver.
-	Returns up to n instances of InputTransaction.
+	Returns up to n input transactions as tuples in the order of Testbench.input_layout.
 	"""
 	for _ in range(n):
 		command = random.randint(1,100)
@@ -158,41 +75,37 @@ def random_input_gen(n=2000):
 		# 89% insert, 1% free, 10% idle
 		if command > 11: insert = 1
 		elif command > 10: free = 1
-		#print "=== random_input_gen: command=%d, insert=%d, free=%d" % (command, insert, free)
-		yield InputTransaction(insert, free, random.randint(0, 31))
+		keyin = random.randint(0, 31)
+		if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", insert=insert, free=free, key=keyin)
+		yield (insert, free, keyin)
 
-@cocotb.coroutine
-def clock_gen(signal):
-	while True:
-		signal <= 0
-		yield Timer(5000) # ps
-		signal <= 1
-		yield Timer(5000) # ps
+def directed_input_gen(n, elements):
+	"""
+	Like random_input_gen, but the commands and keys are directed towards the
+	holes of the coverage of insert and free per key.
+	"""
+	coverage = CoverageGroup("stimulus")
+	command_key = coverage.cross("command_key", [("insert", "free"), range(elements)])
+	counts, target = command_key.counts, command_key.target
+	# alternatives: idle, insert, free with the weights of random_input_gen
+	director = CoverageDirector(coverage, [10, 89, 1],
+		[[], [(command_key, key) for key in range(elements)], [(command_key, elements + key) for key in range(elements)]])
+
+	for _ in range(n):
+		command = director.choose()
+		key = random.randint(0, elements-1)
+		if command > 0:
+			offset = (command - 1) * elements
+			holes = [key for key in range(elements) if counts[offset + key] < target]
+			if holes: key = random.choice(holes)
+			command_key.sample(command - 1, key)
+		yield (1 if command == 1 else 0, 1 if command == 2 else 0, key)
 
 @cocotb.coroutine
 def run_test(dut):
-	cocotb.fork(clock_gen(dut.Clock))
 	tb = Testbench(dut)
-	dut.Reset <= 0
-
-	input_gen = random_input_gen()
-
-	# Issue first transaction immediately.
-	yield tb.input_drv.send(input_gen.next(), False)
-
-	# Issue next transactions.
-	for t in input_gen:
-		yield tb.input_drv.send(t)
-
-	# Wait for rising-edge of clock to execute last transaction from above.
-	# Apply idle command in following clock cycle, but stop generation of expected output data.
-	# Finish clock cycle to capture the resulting output from the last transaction above.
-	yield tb.input_drv.send(InputTransaction(0, 0, 0))
-	tb.stop()
-	yield RisingEdge(dut.Clock)
-
-	# Print result of scoreboard.
-	raise tb.scoreboard.result
+	n = transaction_count(2000)
+	yield tb.run(directed_input_gen(n, tb.reference_model.elements) if getenv_flag("POC_COVERAGE_DIRECTED") else random_input_gen(n))
 
 factory = TestFactory(run_test)
 factory.generate_tests()
@@ -0,0 +1,136 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Reference models of the LRU sort algorithms
+#
+# Description:
+# ------------------------------------
+#	Reference models of PoC.sort_lru_cache and PoC.sort_lru_list used by the
+#	Cocotb testbenches and the offline checker.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from bus_layout import BusLayout
+from func_coverage import CoverageGroup
+from lru_dict import LeastRecentlyUsedDict
+from model_trace import TRACE_LEVEL, TRACE_STATE, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+from utils import log2ceilnz
+
+
+class LruCacheModel(ReferenceModel):
+	"""Reference model of PoC.sort_lru_cache."""
+
+	def __init__(self, elements):
+		ReferenceModel.__init__(self, elements=elements)
+		self.elements = elements
+		self.lru = LeastRecentlyUsedDict(size_limit=elements)
+
+		# initial state of LRU list
+		for keyin in range(elements-1, -1, -1):
+			self.lru[keyin] = 1
+
+		self.output_layout = BusLayout([("KeyOut", log2ceilnz(elements))])
+		self.input_layout = BusLayout([("Insert", 1), ("Free", 1), ("KeyIn", log2ceilnz(elements))])
+		self.init_val = (elements-1,)
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("lru_cache")
+		self.cover_command = self.coverage.point("command", ("idle", "insert", "free"))
+		self.cover_key = self.coverage.cross("command_key", [("insert", "free"), range(elements)])
+		self.cover_lru = self.coverage.point("lru_key", range(elements))
+
+	def predict(self, transaction):
+		'''Update the LRU list and return the expected output.'''
+		insert, free, keyin = transaction
+		if insert == 1:
+			self.lru[keyin] = 1
+			command = 1
+		elif free == 1:
+			self.lru.moveLRU(keyin)
+			command = 2
+		else:
+			command = 0
+
+		keyout = self.lru.peekLRU()[0]
+		self.cover_command.sample(command)
+		if (command != 0) and (keyin < self.elements): self.cover_key.sample(command - 1, keyin)
+		self.cover_lru.sample(keyout)
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS:
+			trace("predict", insert=insert, free=free, key=keyin, keyOut=keyout)
+			if TRACE_LEVEL >= TRACE_STATE: trace("lru", keys=list(self.lru.keys()))
+		return self.output_layout.expected((keyout,))
+
+	def describe_model(self, transaction):
+		return "LRU list = {0!s}".format(list(self.lru.items()))
+
+
+class LruListModel(ReferenceModel):
+	"""Reference model of PoC.sort_lru_list."""
+
+	def __init__(self, elements, data_bits):
+		ReferenceModel.__init__(self, elements=elements, data_bits=data_bits)
+		self.elements = elements
+		self.lru = LeastRecentlyUsedDict(size_limit=elements)
+
+		# packed output transactions: DataOut is only compared if Valid is 1
+		self.output_layout = BusLayout([("Valid", 1), ("DataOut", data_bits)])
+		self.input_layout = BusLayout([("Insert", 1), ("Remove", 1), ("DataIn", data_bits)])
+		self.init_val = (0, None)
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("lru_list")
+		self.cover_command = self.coverage.point("command", ("idle", "insert_new", "insert_update", "insert_evict", "remove_hit", "remove_miss"))
+		self.cover_fill = self.coverage.point("fill", range(elements + 1))
+
+	def predict(self, transaction):
+		'''Update the LRU list and return the expected output.'''
+		insert, remove, datain = transaction
+		keyin = datain & 0x0f
+		if insert == 1:
+			if keyin in self.lru: command = 2
+			elif len(self.lru) == self.elements: command = 3
+			else: command = 1
+			self.lru[keyin] = datain
+		#elif free == 1:
+		#	self.lru.moveLRU(keyin, datain)
+		elif remove == 1:
+			if keyin in self.lru:
+				del self.lru[keyin]
+				command = 4
+			else:
+				command = 5
+		else:
+			command = 0
+		self.cover_command.sample(command)
+		self.cover_fill.sample(len(self.lru))
+
+		# no valid output while the list is empty
+		dataout = self.lru.peekLRU()[1] if len(self.lru) > 0 else None
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS:
+			trace("predict", insert=insert, remove=remove, key=keyin, dataIn=datain, dataOut=dataout)
+			if TRACE_LEVEL >= TRACE_STATE: trace("lru", items=list(self.lru.items()))
+		return self.output_layout.expected((0 if dataout is None else 1, dataout))
+
+	def describe_model(self, transaction):
+		return "LRU list = {0!s}".format(list(self.lru.items()))
@@ -0,0 +1,209 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Cocotb Testbench:		Sorting Networks: Streaming MergeSort
+#
+# Description:
+# ------------------------------------
+#	Automated testbench for PoC.sortnet_MergeSort_Streamed
+#
+# Test run_stream streams pairs of sorted frames of FIFO_DEPTH words into the
+# DUT and checks each output word against the streaming reference model in
+# sortnet_MergeSort_Streamed_model.py. All input words are key words. The
+# model describes the merge of two sorted frames and not the FSM of the
+# entity. The expected words are computed on demand, so that, the memory usage
+# does not depend on the length of the stream. The length is given in input
+# words by POC_COCOTB_TRANSACTIONS.
+#
+# The test is run for the stream patterns random, sorted (already sorted),
+# reverse (reverse-sorted frames) and duplicates (many equal keys), each with
+# Inverse = 0 and 1, and without and with random throttling of In_Valid and
+# Out_Ack.
+#
+# Each test reports the throughput in words per clock cycle and the
+# distribution of the latency, i.e., the clock cycles from the acceptance of
+# an input word to the acceptance of the same word at the output. If the
+# environment variable POC_COCOTB_REPORT is set, then these numbers are also
+# appended as one JSON line to this file. If a test fails, then the numbers up
+# to the first wrong or missing output word are reported together with the
+# error.
+#
+# Out_IsKey is not checked, because it is undefined while FIFO 0 is empty.
+# The tests which are hit by the known defects of the entity (see its
+# description) are expected to fail: all tests with throttling, and the
+# patterns random and duplicates, where the keys of the two frames of a pair
+# overlap. Such a test is reported as failure, if it passes.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from collections import Counter
+import itertools
+import random
+import sys
+
+import cocotb
+from cocotb.result import TestFailure, TestSuccess
+from cocotb.triggers import ReadOnly, RisingEdge
+
+from clock_source import start_clock
+from cocotb_testbench import transaction_count
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from sortnet_MergeSort_Streamed_model import PATTERNS, merge_frames, stream_gen
+from utils import append_report
+
+# probabilities of In_Valid and Out_Ack per clock cycle, if throttled
+IN_RATE = 0.7
+OUT_RATE = 0.7
+
+def latency_summary(counts):
+	"""Return minimum, percentiles, mean and maximum of the latency histogram counts."""
+	total = sum(counts.values())
+	summary, seen = {"mean": float(sum([latency * count for latency, count in counts.items()])) / total}, 0
+	points = [("min", 0.0), ("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)]
+	for latency in sorted(counts):
+		seen += counts[latency]
+		while points and (seen > points[0][1] * (total - 1)):
+			summary[points.pop(0)[0]] = latency
+	return summary
+
+def format_word(word):
+	return "data=0x{0:x} sof={1} eof={2}".format(*word)
+
+def known_defect(pattern, throttle):
+	"""True, if the test is hit by the known defects of the entity, see above."""
+	return throttle or (pattern in ("random", "duplicates"))
+
+@cocotb.coroutine
+def run_stream(dut, pattern="random", throttle=False, inverse=0):
+	"""Check a stream of the given pattern and measure throughput and latency, see above."""
+	fifo_depth, key_bits, data_bits = dut.FIFO_DEPTH.value, dut.KEY_BITS.value, dut.DATA_BITS.value
+	frame_pairs = max(1, transaction_count(10000) // (2 * fifo_depth))
+	in_rate, out_rate = (IN_RATE, OUT_RATE) if throttle else (1.0, 1.0)
+	timeout = 4 * fifo_depth + 100
+
+	# the driver and the reference model consume the same stream, tee buffers only the words in flight
+	stimulus, reference = itertools.tee(stream_gen(pattern, frame_pairs, fifo_depth, key_bits, data_bits, inverse))
+	expected = merge_frames(reference, key_bits, inverse, fifo_depth)
+	pending = next(expected, None)
+
+	clock = start_clock(dut.Clock)
+	clkedge = RisingEdge(dut.Clock)
+	dut.Reset <= 1
+	dut.Inverse <= inverse
+	dut.In_Valid <= 0
+	dut.Out_Ack <= 0
+	yield clkedge
+	yield clkedge
+	dut.Reset <= 0
+
+	word, position = next(stimulus, None), 0
+	in_valid, out_ack = 0, 0
+	accepted = {}				# acceptance cycle of the input words in flight by position
+	latencies = Counter()
+	cycle, last_output = 0, 0
+	in_words, first_in, last_in = 0, None, None
+	out_words, first_out = 0, None
+
+	while pending is not None:
+		# drive the next clock cycle
+		in_valid = 1 if (word is not None) and (random.random() < in_rate) else 0
+		out_ack = 1 if random.random() < out_rate else 0
+		if in_valid == 1:
+			dut.In_Data <= word[0]
+			dut.In_SOF <= word[1]
+			dut.In_IsKey <= word[2]
+			dut.In_EOF <= word[3]
+			if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", position=position, data=word[0], sof=word[1], isKey=word[2], eof=word[3])
+		dut.In_Valid <= in_valid
+		dut.Out_Ack <= out_ack
+
+		# sample the handshakes when all signals are stable, they take place at the next rising edge
+		yield ReadOnly()
+		in_fire = (in_valid == 1) and (int(dut.In_Ack.value) == 1)
+		out_fire = (out_ack == 1) and (int(dut.Out_Valid.value) == 1)
+		if out_fire:
+			received = (int(dut.Out_Data.value), int(dut.Out_SOF.value), int(dut.Out_EOF.value))
+		yield clkedge
+		cycle += 1
+
+		if in_fire:
+			accepted[position] = cycle
+			if first_in is None: first_in = cycle
+			last_in = cycle
+			in_words += 1
+			word, position = next(stimulus, None), position + 1
+
+		if out_fire:
+			source, output = pending
+			output = (output[0], output[1], output[3])
+			if received != output:
+				error = "Output word {0} ({1} of the input): expected {2}, received {3}.".format(
+					out_words, source, format_word(output), format_word(received))
+				break
+			latencies[cycle - accepted.pop(source)] += 1
+			if first_out is None: first_out = cycle
+			out_words += 1
+			last_output = cycle
+			pending = next(expected, None)
+		elif cycle - last_output > timeout:
+			output = pending[1]
+			error = "No output word for {0} clock cycles, expected {1}.".format(timeout, format_word((output[0], output[1], output[3])))
+			break
+	else:
+		error = None
+
+	dut.In_Valid <= 0
+	dut.Out_Ack <= 0
+	clock.report()
+	clock.stop()
+
+	# sustained throughput from the first to the last handshake on each interface
+	record = {"testbench": dut._name, "pattern": pattern, "throttle": throttle, "inverse": inverse,
+						"words": out_words, "cycles": cycle, "words_per_cycle": float(out_words) / cycle, "error": error}
+	if out_words > 0:
+		latency = latency_summary(latencies)
+		record.update({"input_words_per_cycle": float(in_words) / (last_in - first_in + 1),
+									 "output_words_per_cycle": float(out_words) / (last_output - first_out + 1),
+									 "latency": latency})
+		dut._log.info("Throughput (words/cycle): input {0:.3f}, output {1:.3f}, overall {2:.3f}".format(
+			record["input_words_per_cycle"], record["output_words_per_cycle"], record["words_per_cycle"]))
+		dut._log.info("Latency (cycles): min {min}, p50 {p50}, p90 {p90}, p99 {p99}, max {max}, mean {mean:.1f}".format(**latency))
+	append_report(record)
+	if error is not None:
+		raise TestFailure(error)
+	raise TestSuccess("Merged {0} words of {1} frame pairs.".format(out_words, frame_pairs))
+
+
+def generate_tests():
+	"""Like TestFactory.generate_tests, but the tests hit by the known defects are expected to fail."""
+	module = sys.modules[__name__]
+	options = list(itertools.product(PATTERNS, [False, True], [0, 1]))
+	for index, (pattern, throttle, inverse) in enumerate(options):
+		def _my_test(dut, pattern=pattern, throttle=throttle, inverse=inverse):
+			yield run_stream(dut, pattern, throttle, inverse)
+		_my_test.__name__ = "run_stream_{0:03d}".format(index + 1)
+		_my_test.__doc__ = "pattern={0} throttle={1} inverse={2}".format(pattern, throttle, inverse)
+		_my_test.__module__ = __name__
+		setattr(module, _my_test.__name__, cocotb.test(expect_fail=known_defect(pattern, throttle))(_my_test))
+
+generate_tests()
@@ -0,0 +1,208 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Streaming reference model of PoC.sortnet_MergeSort_Streamed
+#
+# Description:
+# ------------------------------------
+#	Reference model of PoC.sortnet_MergeSort_Streamed used by the Cocotb
+#	testbench. A word is a tuple (data, sof, is_key, eof).
+#
+#	The model describes the function of the entity, not its implementation:
+#	the input frames, each from SOF to EOF, are paired in the order of their
+#	arrival, and each pair of sorted frames is merged into one sorted output
+#	frame. The key is given by the lower KEY_BITS of the data. The output frame
+#	is ascending if Inverse = 0 and descending if Inverse = 1. Words of equal
+#	keys are taken from the first frame of the pair first if Inverse = 0, and
+#	from the second frame first if Inverse = 1, as given by the comparison
+#	Greater XOR Inverse of the entity. Words outside of a frame are discarded.
+#
+#	The merge is done on single key words only, i.e., all input words must have
+#	is_key = 1. The records of a key word followed by data words are not
+#	modeled.
+#
+#	merge_frames is a generator which consumes the input words and yields the
+#	output words incrementally. Only the words of the frame pair being merged
+#	are stored, so that, the memory usage is bounded by the frame length and not
+#	by the length of the stream.
+#
+#	Run this module as script to check that the merged frames of long streams
+#	are sorted permutations of the input frames, e.g.:
+#	  python sortnet_MergeSort_Streamed_model.py -n 1e6 -f 32
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+import random
+
+from model_trace import TRACE_LEVEL, TRACE_TRANSACTIONS, trace
+
+# stream patterns of stream_gen
+PATTERNS = ("random", "sorted", "reverse", "duplicates")
+
+
+def read_frames(words, max_frame=None):
+	"""
+	Split the iterable words into frames. Yields each frame as a list of tuples
+	(position, word), where position is the index of the word in words. Words
+	outside of a frame are discarded. Raises ValueError, if a frame has more
+	than max_frame words.
+	"""
+	frame = None
+	for position, word in enumerate(words):
+		if word[1]:
+			frame = []
+		if frame is None:
+			continue
+		frame.append((position, word))
+		if (max_frame is not None) and (len(frame) > max_frame):
+			raise ValueError("Input frame at word {0} has more than {1} words.".format(frame[0][0], max_frame))
+		if word[3]:
+			yield frame
+			frame = None
+
+
+def merge_frames(words, key_bits, inverse=0, max_frame=None):
+	"""
+	Merge the frame pairs of the iterable words, see above. Yields the output
+	words as tuples (position, word), where position is the index of the word in
+	words. Raises ValueError, if an input frame has more than max_frame words.
+	"""
+	key_mask = (1 << key_bits) - 1
+	frames = read_frames(words, max_frame)
+	while True:
+		first, second = next(frames, None), next(frames, None)
+		if second is None: return
+
+		# merge two sorted lists, ties are resolved by the order of the frames given above
+		i, j, length = 0, 0, len(first) + len(second)
+		for index in range(length):
+			if j == len(second):
+				take_first = True
+			elif i == len(first):
+				take_first = False
+			else:
+				key_0, key_1 = first[i][1][0] & key_mask, second[j][1][0] & key_mask
+				if inverse == 0:
+					take_first = key_0 <= key_1
+				else:
+					take_first = key_0 > key_1
+			if take_first:
+				position, word = first[i]; i += 1
+			else:
+				position, word = second[j]; j += 1
+			output = (word[0], 1 if index == 0 else 0, word[2], 1 if index == length - 1 else 0)
+			if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("predict", position=position, data=output[0], sof=output[1], isKey=output[2], eof=output[3])
+			yield position, output
+
+
+def stream_gen(pattern, frame_pairs, frame_words, key_bits, data_bits, inverse=0, rand=random):
+	"""
+	Generate the input words of frame_pairs pairs of sorted frames of up to
+	frame_words words. All words are key words. pattern is one of:
+	  random:     random keys and frame lengths,
+	  sorted:     the stream is sorted, the first frame of a pair is taken first,
+	  reverse:    the frames are sorted, the second frame of a pair is taken first,
+	  duplicates: random keys from only 4 values.
+	The upper data bits (above KEY_BITS) are random.
+	"""
+	key_max = (1 << key_bits) - 1
+	payload_bits = data_bits - key_bits
+	last = 0
+	for _ in range(frame_pairs):
+		frames = []
+		for _ in range(2):
+			length = rand.randint(1, frame_words) if pattern == "random" else frame_words
+			if pattern == "duplicates":
+				keys = [rand.randint(0, min(3, key_max)) for _ in range(length)]
+			elif pattern == "random":
+				keys = [rand.randint(0, key_max) for _ in range(length)]
+			else:
+				# increasing keys continued over all frames, so that, the stream is sorted
+				if last + length > key_max: last = 0
+				keys = [last + rand.randint(0, 1) for _ in range(length)]
+				last = max(keys) + 1
+			keys.sort(reverse=(inverse == 1))
+			frames.append(keys)
+		if (pattern == "reverse") != (inverse == 1) and (pattern in ("sorted", "reverse")):
+			frames.reverse()
+
+		for keys in frames:
+			for i, key in enumerate(keys):
+				data = (rand.getrandbits(payload_bits) << key_bits | key) if payload_bits > 0 else key
+				yield (data, 1 if i == 0 else 0, 1, 1 if i == len(keys) - 1 else 0)
+
+
+if __name__ == "__main__":
+	import argparse
+	import sys
+	import time
+
+	parser = argparse.ArgumentParser(description="Check the streaming merge model of PoC.sortnet_MergeSort_Streamed.")
+	parser.add_argument("-n", "--words", type=lambda text: int(float(text)), default=10**6, help="input words per pattern (default: %(default)s)")
+	parser.add_argument("-f", "--frame-words", type=int, default=32, help="maximum words per frame (default: %(default)s)")
+	parser.add_argument("-k", "--key-bits", type=int, default=8, help="(default: %(default)s)")
+	parser.add_argument("-d", "--data-bits", type=int, default=16, help="(default: %(default)s)")
+	parser.add_argument("--inverse", action="store_true", help="sort in descending order")
+	parser.add_argument("-s", "--seed", type=int, default=None)
+	args = parser.parse_args()
+
+	inverse = 1 if args.inverse else 0
+	key_mask = (1 << args.key_bits) - 1
+	failed = False
+	for pattern in PATTERNS:
+		rand = random.Random(args.seed)
+		words = list(stream_gen(pattern, max(1, args.words // (2 * args.frame_words)), args.frame_words,
+														args.key_bits, args.data_bits, inverse, rand))
+		start = time.time()
+		merged = list(merge_frames(iter(words), args.key_bits, inverse, args.frame_words))
+		elapsed = time.time() - start
+
+		# split the input and output into frames and compare pairwise
+		frames, frame = [], []
+		for word in words:
+			frame.append(word)
+			if word[3]: frames.append(frame); frame = []
+		outputs, frame = [], []
+		for _, word in merged:
+			frame.append(word)
+			if word[3]: outputs.append(frame); frame = []
+		error = None
+		if (len(outputs) != len(frames) // 2) or frame:
+			error = "{0} output frames from {1} input frames".format(len(outputs), len(frames))
+		for i, output in enumerate(outputs):
+			if error: break
+			pair = frames[2*i] + frames[2*i + 1]
+			keys = [word[0] & key_mask for word in output]
+			if (output[0][1] != 1) or any([word[1] for word in output[1:]]):
+				error = "SOF of output frame {0}".format(i)
+			elif sorted([word[0] for word in output]) != sorted([word[0] for word in pair]):
+				error = "output frame {0} is not a permutation of the input frames".format(i)
+			elif keys != sorted(keys, reverse=(inverse == 1)):
+				error = "output frame {0} is not sorted".format(i)
+		if error:
+			print("FAILED: {0}: {1}.".format(pattern, error))
+			failed = True
+		else:
+			print("PASSED: {0}: {1} words in {2} frames ({3:.0f} words/s).".format(pattern, len(merged), len(outputs), len(merged) / elapsed))
+	sys.exit(1 if failed else 0)
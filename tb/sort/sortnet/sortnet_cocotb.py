@@ -0,0 +1,170 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Cocotb Testbench:		Sorting Networks
+#
+# Description:
+# ------------------------------------
+#	Automated testbench for PoC.sortnet_BitonicSort, PoC.sortnet_OddEvenMergeSort
+#	and PoC.sortnet_OddEvenSort. The toplevel is the flat-port wrapper
+#	sortnet_<topology>_flat or sortnet_<topology>_flat_small (16 inputs) from
+#	sortnet_flat.vhdl, the topology is derived from its name.
+#
+# Test run_test streams one random vector per clock cycle and checks the output
+# in each clock cycle against the reference model in sortnet_model.py.
+#
+# Test run_exhaustive streams all 2^INPUTS binary key vectors (0-1 principle),
+# one per clock cycle. The upper data bits of each input hold the input index.
+# The received vectors are collected and compared in bulk against
+# SortNetwork.sort_batch. For more than 20 inputs, this test is skipped with a
+# warning, use the toplevel sortnet_<topology>_flat_small instead.
+#
+# Both tests are run with Inverse = 0 and Inverse = 1.
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import random
+
+import numpy as np
+
+import cocotb
+from cocotb.regression import TestFactory
+from cocotb.result import TestFailure, TestSuccess
+from cocotb.triggers import RisingEdge
+
+from clock_source import start_clock
+from cocotb_testbench import ModelTestbench, transaction_count
+from model_trace import TRACE_LEVEL, TRACE_STIMULUS, trace
+from sortnet_model import SortNetModel
+from utils import log2ceil
+
+MAX_EXHAUSTIVE_INPUTS = 20
+
+def generic_flag(value):
+	return str(value).strip().upper() not in ("0", "FALSE")
+
+def create_model(dut, inverse):
+	topology = dut._name
+	if topology.startswith("sortnet_"): topology = topology[len("sortnet_"):]
+	topology = topology.split("_flat")[0]
+	return SortNetModel(topology, dut.INPUTS.value, dut.KEY_BITS.value, dut.DATA_BITS.value, dut.META_BITS.value,
+											dut.PIPELINE_STAGE_AFTER.value, generic_flag(dut.ADD_INPUT_REGISTERS.value),
+											generic_flag(dut.ADD_OUTPUT_REGISTERS.value), inverse)
+
+# ==============================================================================
+class Testbench(ModelTestbench):
+	def __init__(self, dut, inverse):
+		model = create_model(dut, inverse)
+		self.reference_model = model
+		ModelTestbench.__init__(self, dut, model.input_layout, model.output_layout, model.init_val)
+
+
+# ==============================================================================
+def random_input_gen(model, n=10000):
+	"""
+	Generate random input data to be applied by InputDriver.
+	Returns up to n input transactions as tuples in the order of model.input_layout.
+	"""
+	meta_bits = model.meta_bits
+	for _ in range(n):
+		command = random.randint(1,100)
+		# 80% key, 10% data, 10% idle
+		valid = 1 if command > 10 else 0
+		is_key = 1 if command > 20 else 0
+		# every 4th vector draws its keys from a small range, so that, equal keys occur
+		key_bits = min(2, model.key_bits) if random.randint(0, 3) == 0 else model.key_bits
+		data = model.pack_data([(random.getrandbits(model.data_bits) & ~model.key_mask) | random.getrandbits(key_bits)
+														for _ in range(model.inputs)])
+		meta = (random.getrandbits(meta_bits),) if meta_bits else ()
+		if TRACE_LEVEL >= TRACE_STIMULUS: trace("stimulus", valid=valid, isKey=is_key, data=data)
+		yield (valid, is_key, data) + meta
+
+@cocotb.coroutine
+def run_test(dut, inverse=0):
+	tb = Testbench(dut, inverse)
+	dut.Inverse <= inverse
+	yield tb.run(random_input_gen(tb.reference_model, transaction_count(10000)))
+
+@cocotb.coroutine
+def run_exhaustive(dut, inverse=0, block=1 << 12):
+	"""Check all binary key vectors in bulk, see above."""
+	model = create_model(dut, inverse)
+	network, inputs = model.network, model.inputs
+	if inputs > MAX_EXHAUSTIVE_INPUTS:
+		dut._log.warning("SKIPPED: 2^{0} binary vectors are too many, see sortnet_{1}_flat_small.".format(
+			inputs, network.topology))
+		return
+
+	# the input index in the upper data bits, only the bits fitting into uint64 are compared
+	index_bits = min(model.data_bits - model.key_bits, log2ceil(inputs))
+	tag_bits = max(0, min(index_bits, 64 - model.key_bits))
+	check_mask = (1 << min(64, model.key_bits + tag_bits)) - 1
+	tags = np.array([(index & ((1 << index_bits) - 1)) << model.key_bits for index in range(inputs)], dtype=object)
+
+	clock = start_clock(dut.Clock)
+	clkedge = RisingEdge(dut.Clock)
+	dut.Reset <= 0
+	dut.Inverse <= inverse
+	dut.In_IsKey <= 1
+	if model.meta_bits > 0: dut.In_Meta <= 0
+
+	total, checked = 1 << inputs, 0
+	for first in range(0, total, block):
+		keys = network.zero_one_vectors(first, min(block, total - first))
+		# the vectors of this block, then idle until the last one left the pipeline
+		received = []
+		for i in range(len(keys) + model.latency):
+			if i < len(keys):
+				dut.In_Valid <= 1
+				dut.In_Data <= model.pack_data(keys[i].astype(object) | tags)
+			else:
+				dut.In_Valid <= 0
+			yield clkedge
+			if i >= model.latency:
+				if int(dut.Out_Valid.value) != 1:
+					raise TestFailure("Binary vector {0}: Out_Valid is not set.".format(first + i - model.latency))
+				received.append([word & check_mask for word in model.unpack_data(int(dut.Out_Data.value))])
+
+		sorted_keys, perm = network.sort_batch(keys, inverse)
+		expected = sorted_keys.astype(np.uint64)
+		if tag_bits > 0: expected |= (perm.astype(np.uint64) & np.uint64((1 << tag_bits) - 1)) << np.uint64(model.key_bits)
+		received = np.array(received, dtype=np.uint64)
+		mismatch = np.flatnonzero((received != expected).any(axis=1))
+		if len(mismatch) > 0:
+			i = int(mismatch[0])
+			raise TestFailure("Binary vector {0:0{1}b}: expected {2!s}, received {3!s}.".format(
+				first + i, inputs, [int(word) for word in expected[i]], [int(word) for word in received[i]]))
+		checked += len(keys)
+		dut._log.info("Checked {0} of {1} binary vectors.".format(checked, total))
+
+	clock.report()
+	clock.stop()
+	raise TestSuccess("Checked all {0} binary vectors.".format(total))
+
+factory = TestFactory(run_test)
+factory.add_option("inverse", [0, 1])
+factory.generate_tests()
+
+factory = TestFactory(run_exhaustive)
+factory.add_option("inverse", [0, 1])
+factory.generate_tests()
@@ -0,0 +1,386 @@
+-- EMACS settings: -*-  tab-width: 2; indent-tabs-mode: t -*-
+-- vim: tabstop=2:shiftwidth=2:noexpandtab
+-- kate: tab-width 2; replace-tabs off; indent-width 2;
+--
+-- ============================================================================
+-- Authors:				 	Martin Zabel
+--
+-- Module:				 	Flat-port wrappers of the sorting networks for Cocotb
+--
+-- Description:
+-- ------------------------------------
+--		The data ports of the sorting networks are matrices (T_SLM), which are
+--		not accessible by all simulator interfaces of Cocotb. These wrappers
+--		flatten the matrices into vectors, input i is at the bits
+--		(i+1)*DATA_BITS-1 downto i*DATA_BITS, see to_slv.
+--
+--		The wrappers sortnet_<topology>_flat_small only change the default of
+--		INPUTS to 16, so that, the exhaustive test of the Cocotb testbench runs.
+--
+-- License:
+-- ============================================================================
+-- Copyright 2007-2016 Technische Universitaet Dresden - Germany
+--										 Chair of VLSI-Design, Diagnostics and Architecture
+--
+-- Licensed under the Apache License, Version 2.0 (the "License");
+-- you may not use this file except in compliance with the License.
+-- You may obtain a copy of the License at
+--
+--		http://www.apache.org/licenses/LICENSE-2.0
+--
+-- Unless required by applicable law or agreed to in writing, software
+-- distributed under the License is distributed on an "AS IS" BASIS,
+-- WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+-- See the License for the specific language governing permissions and
+-- limitations under the License.
+-- ============================================================================
+
+
+library IEEE;
+use			IEEE.STD_LOGIC_1164.all;
+
+library PoC;
+use			PoC.vectors.all;
+
+
+entity sortnet_BitonicSort_flat is
+	generic (
+		INPUTS								: positive	:= 32;
+		KEY_BITS							: positive	:= 32;
+		DATA_BITS							: positive	:= 64;
+		META_BITS							: natural		:= 2;
+		PIPELINE_STAGE_AFTER	: natural		:= 2;
+		ADD_INPUT_REGISTERS		: boolean		:= FALSE;
+		ADD_OUTPUT_REGISTERS	: boolean		:= TRUE
+	);
+	port (
+		Clock				: in	std_logic;
+		Reset				: in	std_logic;
+
+		Inverse			: in	std_logic		:= '0';
+
+		In_Valid		: in	std_logic;
+		In_IsKey		: in	std_logic;
+		In_Data			: in	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		In_Meta			: in	std_logic_vector(META_BITS - 1 downto 0);
+
+		Out_Valid		: out	std_logic;
+		Out_IsKey		: out	std_logic;
+		Out_Data		: out	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		Out_Meta		: out	std_logic_vector(META_BITS - 1 downto 0)
+	);
+end entity;
+
+
+architecture rtl of sortnet_BitonicSort_flat is
+	signal In_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+	signal Out_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+
+begin
+	In_Data_m	<= to_slm(In_Data, INPUTS, DATA_BITS);
+
+	sort : entity PoC.sortnet_BitonicSort
+		generic map (
+			INPUTS								=> INPUTS,
+			KEY_BITS							=> KEY_BITS,
+			DATA_BITS							=> DATA_BITS,
+			META_BITS							=> META_BITS,
+			PIPELINE_STAGE_AFTER	=> PIPELINE_STAGE_AFTER,
+			ADD_INPUT_REGISTERS		=> ADD_INPUT_REGISTERS,
+			ADD_OUTPUT_REGISTERS	=> ADD_OUTPUT_REGISTERS
+		)
+		port map (
+			Clock				=> Clock,
+			Reset				=> Reset,
+
+			Inverse			=> Inverse,
+
+			In_Valid		=> In_Valid,
+			In_IsKey		=> In_IsKey,
+			In_Data			=> In_Data_m,
+			In_Meta			=> In_Meta,
+
+			Out_Valid		=> Out_Valid,
+			Out_IsKey		=> Out_IsKey,
+			Out_Data		=> Out_Data_m,
+			Out_Meta		=> Out_Meta
+		);
+
+	Out_Data	<= to_slv(Out_Data_m);
+end architecture;
+
+
+library IEEE;
+use			IEEE.STD_LOGIC_1164.all;
+
+library PoC;
+use			PoC.vectors.all;
+
+
+entity sortnet_OddEvenMergeSort_flat is
+	generic (
+		INPUTS								: positive	:= 128;
+		KEY_BITS							: positive	:= 32;
+		DATA_BITS							: positive	:= 32;
+		META_BITS							: natural		:= 2;
+		PIPELINE_STAGE_AFTER	: natural		:= 2;
+		ADD_INPUT_REGISTERS		: boolean		:= FALSE;
+		ADD_OUTPUT_REGISTERS	: boolean		:= TRUE
+	);
+	port (
+		Clock				: in	std_logic;
+		Reset				: in	std_logic;
+
+		Inverse			: in	std_logic		:= '0';
+
+		In_Valid		: in	std_logic;
+		In_IsKey		: in	std_logic;
+		In_Data			: in	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		In_Meta			: in	std_logic_vector(META_BITS - 1 downto 0);
+
+		Out_Valid		: out	std_logic;
+		Out_IsKey		: out	std_logic;
+		Out_Data		: out	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		Out_Meta		: out	std_logic_vector(META_BITS - 1 downto 0)
+	);
+end entity;
+
+
+architecture rtl of sortnet_OddEvenMergeSort_flat is
+	signal In_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+	signal Out_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+
+begin
+	In_Data_m	<= to_slm(In_Data, INPUTS, DATA_BITS);
+
+	sort : entity PoC.sortnet_OddEvenMergeSort
+		generic map (
+			INPUTS								=> INPUTS,
+			KEY_BITS							=> KEY_BITS,
+			DATA_BITS							=> DATA_BITS,
+			META_BITS							=> META_BITS,
+			PIPELINE_STAGE_AFTER	=> PIPELINE_STAGE_AFTER,
+			ADD_INPUT_REGISTERS		=> ADD_INPUT_REGISTERS,
+			ADD_OUTPUT_REGISTERS	=> ADD_OUTPUT_REGISTERS
+		)
+		port map (
+			Clock				=> Clock,
+			Reset				=> Reset,
+
+			Inverse			=> Inverse,
+
+			In_Valid		=> In_Valid,
+			In_IsKey		=> In_IsKey,
+			In_Data			=> In_Data_m,
+			In_Meta			=> In_Meta,
+
+			Out_Valid		=> Out_Valid,
+			Out_IsKey		=> Out_IsKey,
+			Out_Data		=> Out_Data_m,
+			Out_Meta		=> Out_Meta
+		);
+
+	Out_Data	<= to_slv(Out_Data_m);
+end architecture;
+
+
+library IEEE;
+use			IEEE.STD_LOGIC_1164.all;
+
+library PoC;
+use			PoC.vectors.all;
+
+
+entity sortnet_OddEvenSort_flat is
+	generic (
+		INPUTS								: positive	:= 8;
+		KEY_BITS							: positive	:= 32;
+		DATA_BITS							: positive	:= 32;
+		META_BITS							: natural		:= 2;
+		PIPELINE_STAGE_AFTER	: natural		:= 2;
+		ADD_INPUT_REGISTERS		: boolean		:= FALSE;
+		ADD_OUTPUT_REGISTERS	: boolean		:= TRUE
+	);
+	port (
+		Clock				: in	std_logic;
+		Reset				: in	std_logic;
+
+		Inverse			: in	std_logic		:= '0';
+
+		In_Valid		: in	std_logic;
+		In_IsKey		: in	std_logic;
+		In_Data			: in	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		In_Meta			: in	std_logic_vector(META_BITS - 1 downto 0);
+
+		Out_Valid		: out	std_logic;
+		Out_IsKey		: out	std_logic;
+		Out_Data		: out	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		Out_Meta		: out	std_logic_vector(META_BITS - 1 downto 0)
+	);
+end entity;
+
+
+architecture rtl of sortnet_OddEvenSort_flat is
+	signal In_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+	signal Out_Data_m		: T_SLM(INPUTS - 1 downto 0, DATA_BITS - 1 downto 0);
+
+begin
+	In_Data_m	<= to_slm(In_Data, INPUTS, DATA_BITS);
+
+	sort : entity PoC.sortnet_OddEvenSort
+		generic map (
+			INPUTS								=> INPUTS,
+			KEY_BITS							=> KEY_BITS,
+			DATA_BITS							=> DATA_BITS,
+			META_BITS							=> META_BITS,
+			PIPELINE_STAGE_AFTER	=> PIPELINE_STAGE_AFTER,
+			ADD_INPUT_REGISTERS		=> ADD_INPUT_REGISTERS,
+			ADD_OUTPUT_REGISTERS	=> ADD_OUTPUT_REGISTERS
+		)
+		port map (
+			Clock				=> Clock,
+			Reset				=> Reset,
+
+			Inverse			=> Inverse,
+
+			In_Valid		=> In_Valid,
+			In_IsKey		=> In_IsKey,
+			In_Data			=> In_Data_m,
+			In_Meta			=> In_Meta,
+
+			Out_Valid		=> Out_Valid,
+			Out_IsKey		=> Out_IsKey,
+			Out_Data		=> Out_Data_m,
+			Out_Meta		=> Out_Meta
+		);
+
+	Out_Data	<= to_slv(Out_Data_m);
+end architecture;
+
+
+library IEEE;
+use			IEEE.STD_LOGIC_1164.all;
+
+
+entity sortnet_BitonicSort_flat_small is
+	generic (
+		INPUTS								: positive	:= 16;
+		KEY_BITS							: positive	:= 32;
+		DATA_BITS							: positive	:= 64;
+		META_BITS							: natural		:= 2;
+		PIPELINE_STAGE_AFTER	: natural		:= 2;
+		ADD_INPUT_REGISTERS		: boolean		:= FALSE;
+		ADD_OUTPUT_REGISTERS	: boolean		:= TRUE
+	);
+	port (
+		Clock				: in	std_logic;
+		Reset				: in	std_logic;
+
+		Inverse			: in	std_logic		:= '0';
+
+		In_Valid		: in	std_logic;
+		In_IsKey		: in	std_logic;
+		In_Data			: in	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		In_Meta			: in	std_logic_vector(META_BITS - 1 downto 0);
+
+		Out_Valid		: out	std_logic;
+		Out_IsKey		: out	std_logic;
+		Out_Data		: out	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		Out_Meta		: out	std_logic_vector(META_BITS - 1 downto 0)
+	);
+end entity;
+
+
+architecture rtl of sortnet_BitonicSort_flat_small is
+begin
+	sort : entity work.sortnet_BitonicSort_flat
+		generic map (
+			INPUTS								=> INPUTS,
+			KEY_BITS							=> KEY_BITS,
+			DATA_BITS							=> DATA_BITS,
+			META_BITS							=> META_BITS,
+			PIPELINE_STAGE_AFTER	=> PIPELINE_STAGE_AFTER,
+			ADD_INPUT_REGISTERS		=> ADD_INPUT_REGISTERS,
+			ADD_OUTPUT_REGISTERS	=> ADD_OUTPUT_REGISTERS
+		)
+		port map (
+			Clock				=> Clock,
+			Reset				=> Reset,
+
+			Inverse			=> Inverse,
+
+			In_Valid		=> In_Valid,
+			In_IsKey		=> In_IsKey,
+			In_Data			=> In_Data,
+			In_Meta			=> In_Meta,
+
+			Out_Valid		=> Out_Valid,
+			Out_IsKey		=> Out_IsKey,
+			Out_Data		=> Out_Data,
+			Out_Meta		=> Out_Meta
+		);
+end architecture;
+
+
+library IEEE;
+use			IEEE.STD_LOGIC_1164.all;
+
+
+entity sortnet_OddEvenMergeSort_flat_small is
+	generic (
+		INPUTS								: positive	:= 16;
+		KEY_BITS							: positive	:= 32;
+		DATA_BITS							: positive	:= 64;
+		META_BITS							: natural		:= 2;
+		PIPELINE_STAGE_AFTER	: natural		:= 2;
+		ADD_INPUT_REGISTERS		: boolean		:= FALSE;
+		ADD_OUTPUT_REGISTERS	: boolean		:= TRUE
+	);
+	port (
+		Clock				: in	std_logic;
+		Reset				: in	std_logic;
+
+		Inverse			: in	std_logic		:= '0';
+
+		In_Valid		: in	std_logic;
+		In_IsKey		: in	std_logic;
+		In_Data			: in	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		In_Meta			: in	std_logic_vector(META_BITS - 1 downto 0);
+
+		Out_Valid		: out	std_logic;
+		Out_IsKey		: out	std_logic;
+		Out_Data		: out	std_logic_vector(INPUTS * DATA_BITS - 1 downto 0);
+		Out_Meta		: out	std_logic_vector(META_BITS - 1 downto 0)
+	);
+end entity;
+
+
+architecture rtl of sortnet_OddEvenMergeSort_flat_small is
+begin
+	sort : entity work.sortnet_OddEvenMergeSort_flat
+		generic map (
+			INPUTS								=> INPUTS,
+			KEY_BITS							=> KEY_BITS,
+			DATA_BITS							=> DATA_BITS,
+			META_BITS							=> META_BITS,
+			PIPELINE_STAGE_AFTER	=> PIPELINE_STAGE_AFTER,
+			ADD_INPUT_REGISTERS		=> ADD_INPUT_REGISTERS,
+			ADD_OUTPUT_REGISTERS	=> ADD_OUTPUT_REGISTERS
+		)
+		port map (
+			Clock				=> Clock,
+			Reset				=> Reset,
+
+			Inverse			=> Inverse,
+
+			In_Valid		=> In_Valid,
+			In_IsKey		=> In_IsKey,
+			In_Data			=> In_Data,
+			In_Meta			=> In_Meta,
+
+			Out_Valid		=> Out_Valid,
+			Out_IsKey		=> Out_IsKey,
+			Out_Data		=> Out_Data,
+			Out_Meta		=> Out_Meta
+		);
+end architecture;
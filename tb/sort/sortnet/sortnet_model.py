@@ -0,0 +1,280 @@
+# EMACS settings: -*-	tab-width: 2; indent-tabs-mode: t; python-indent-offset: 2 -*-
+# vim: tabstop=2:shiftwidth=2:noexpandtab
+# kate: tab-width 2; replace-tabs off; indent-width 2;
+#
+# ==============================================================================
+# Authors:				 		Martin Zabel
+#
+# Python Module:		  Reference model of the sorting networks
+#
+# Description:
+# ------------------------------------
+#	Reference model of PoC.sortnet_BitonicSort, PoC.sortnet_OddEvenMergeSort and
+#	PoC.sortnet_OddEvenSort used by the Cocotb testbench. The comparator
+#	network of each topology is built exactly as by the generate statements of
+#	the VHDL code: a list of stages, each a list of comparators
+#	(input 0, input 1, inverted). A comparator switches its inputs if the key
+#	(the lower KEY_BITS of the data) of input 0 is greater than the key of input
+#	1, XOR the inverted flag, XOR the Inverse input. Thus, equal keys are never
+#	switched. A vector with In_IsKey = 0 is switched like the last key vector.
+#
+#	SortNetwork.sort_batch evaluates the network over a NumPy matrix of key
+#	vectors, one vector per row, and returns the sorted keys and the applied
+#	permutation. Run this module as script to check a network with random
+#	vectors and exhaustively by the 0-1 principle, e.g.:
+#	  python sortnet_model.py -t BitonicSort -i 32 -n 1e6 --zero-one
+#
+# License:
+# ==============================================================================
+# Copyright 2007-2016 Technische Universitaet Dresden - Germany
+#											Chair of VLSI-Design, Diagnostics and Architecture
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#		http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+from __future__ import print_function
+from collections import deque
+
+from bus_layout import BusLayout
+from func_coverage import CoverageGroup
+from model_trace import TRACE_LEVEL, TRACE_TRANSACTIONS, trace
+from reference_model import ReferenceModel
+from utils import log2ceil
+
+
+def _check_power_of_two(topology, inputs):
+	if (inputs < 2) or (inputs & (inputs - 1)):
+		raise ValueError("Unsupported configuration: {0} requires a power of two INPUTS, got {1}.".format(topology, inputs))
+
+def bitonic_sort_network(inputs):
+	"""Stages of comparators of PoC.sortnet_BitonicSort."""
+	_check_power_of_two("BitonicSort", inputs)
+	stages = []
+	for b in range(log2ceil(inputs)):
+		for s in range(b + 1):
+			distance = 2**(b - s)
+			stages.append([(g * 2 * distance + l, g * 2 * distance + l + distance, (g // 2**s) % 2 == 1)
+										 for g in range(inputs // (2 * distance)) for l in range(distance)])
+	return stages
+
+def odd_even_merge_sort_network(inputs):
+	"""Stages of comparators of PoC.sortnet_OddEvenMergeSort."""
+	_check_power_of_two("OddEvenMergeSort", inputs)
+	blocks = log2ceil(inputs)
+	stages = []
+	for b in range(blocks):
+		groups = 2**(blocks - b - 1)
+		for s in range(b + 1):
+			distance = 2**(b - s)
+			start = 0 if s == 0 else distance
+			end = (2**(b + 1) - distance - start - 1) // (2 * distance)
+			stages.append([(g * (inputs // groups) + j * 2 * distance + start + i, g * (inputs // groups) + j * 2 * distance + start + i + distance, False)
+										 for g in range(groups) for j in range(end + 1) for i in range(distance)])
+	return stages
+
+def odd_even_sort_network(inputs):
+	"""Stages of comparators of PoC.sortnet_OddEvenSort."""
+	return [[(2*i + stage % 2, 2*i + stage % 2 + 1, False) for i in range((inputs - stage % 2) // 2)] for stage in range(inputs)]
+
+NETWORKS = {
+	"BitonicSort":      bitonic_sort_network,
+	"OddEvenMergeSort": odd_even_merge_sort_network,
+	"OddEvenSort":      odd_even_sort_network
+}
+
+
+class SortNetwork(object):
+	"""The comparator network of topology with inputs inputs, the keys are the lower key_bits of the data."""
+
+	def __init__(self, topology, inputs, key_bits):
+		if topology not in NETWORKS: raise ValueError("Unknown sorting network: {0}".format(topology))
+		self.topology = topology
+		self.inputs = inputs
+		self.key_mask = (1 << key_bits) - 1
+		self.stages = NETWORKS[topology](inputs)
+		self.comparators = sum([len(stage) for stage in self.stages])
+
+	def latency(self, pipeline_stage_after, add_input_registers=False, add_output_registers=True):
+		"""Return the number of register stages from In_Data to Out_Data."""
+		registers = len([index for index in range(len(self.stages)) if (pipeline_stage_after > 0) and (index % pipeline_stage_after == 0)])
+		return registers + (1 if add_input_registers else 0) + (1 if add_output_registers else 0)
+
+	def sort(self, words, inverse=0, switches=None):
+		"""
+		Apply the network to the list words. If switches is None, the comparators
+		decide by the keys and their decisions are returned, otherwise the given
+		decisions are applied. Returns (output words, decisions).
+		"""
+		words = list(words)
+		key_mask = self.key_mask
+		decisions = []
+		it = iter(switches) if switches is not None else None
+		for stage in self.stages:
+			for src0, src1, inv in stage:
+				if it is None:
+					switch = ((words[src0] & key_mask) > (words[src1] & key_mask)) != (inv != bool(inverse))
+				else:
+					switch = next(it)
+				if switch: words[src0], words[src1] = words[src1], words[src0]
+				decisions.append(switch)
+		return words, decisions
+
+	def sort_batch(self, keys, inverse=0):
+		"""
+		Apply the network to each row of the NumPy matrix keys. Returns the sorted
+		keys and the permutation, i.e., output j of row r is input perm[r, j].
+		"""
+		import numpy as np
+		keys = np.array(keys)
+		perm = np.tile(np.arange(self.inputs, dtype=np.uint16 if self.inputs > 255 else np.uint8), (len(keys), 1))
+		for stage in self.stages:
+			src0 = np.array([src0 for src0, _, _ in stage])
+			src1 = np.array([src1 for _, src1, _ in stage])
+			inv = np.array([inv != bool(inverse) for _, _, inv in stage])
+			key0, key1 = keys[:, src0], keys[:, src1]
+			switch = (key0 > key1) != inv
+			keys[:, src0], keys[:, src1] = np.where(switch, key1, key0), np.where(switch, key0, key1)
+			perm0, perm1 = perm[:, src0], perm[:, src1]
+			perm[:, src0], perm[:, src1] = np.where(switch, perm1, perm0), np.where(switch, perm0, perm1)
+		return keys, perm
+
+	def zero_one_vectors(self, first, count):
+		"""Return the binary key vectors first .. first+count-1, bit j of the vector number is input j."""
+		import numpy as np
+		numbers = np.arange(first, first + count, dtype=np.uint64)
+		return ((numbers[:, None] >> np.arange(self.inputs, dtype=np.uint64)[None, :]) & np.uint64(1)).astype(np.uint8)
+
+	def check_zero_one(self, inverse=0, block=1 << 16):
+		"""
+		Check all 2^inputs binary key vectors (0-1 principle). Returns the first
+		vector number which is not sorted, or None.
+		"""
+		import numpy as np
+		total = 1 << self.inputs
+		for first in range(0, total, block):
+			keys, _ = self.sort_batch(self.zero_one_vectors(first, min(block, total - first)), inverse)
+			steps = np.diff(keys.astype(np.int8), axis=1)
+			unsorted = np.flatnonzero((steps > 0 if inverse else steps < 0).any(axis=1))
+			if len(unsorted) > 0: return first + int(unsorted[0])
+		return None
+
+
+class SortNetModel(ReferenceModel):
+	"""
+	Reference model of a sorting network, see above. The Inverse input is
+	constant during a test run and given by inverse.
+	"""
+
+	def __init__(self, topology, inputs, key_bits, data_bits, meta_bits, pipeline_stage_after,
+							 add_input_registers=False, add_output_registers=True, inverse=0):
+		ReferenceModel.__init__(self, topology=topology, inputs=inputs, key_bits=key_bits, data_bits=data_bits,
+														meta_bits=meta_bits, pipeline_stage_after=pipeline_stage_after,
+														add_input_registers=add_input_registers, add_output_registers=add_output_registers, inverse=inverse)
+		self.network = SortNetwork(topology, inputs, key_bits)
+		self.inputs = inputs
+		self.key_bits = key_bits
+		self.key_mask = self.network.key_mask
+		self.data_bits = data_bits
+		self.meta_bits = meta_bits
+		self.data_mask = (1 << data_bits) - 1
+		self.inverse = inverse
+		self.latency = self.network.latency(pipeline_stage_after, add_input_registers, add_output_registers)
+		if self.latency == 0: raise ValueError("Unsupported configuration: a sorting network without any register.")
+		# decisions of the last key vector, the switch registers are initialized to 0
+		self.switches = [False] * self.network.comparators
+
+		meta = [("In_Meta", meta_bits)] if meta_bits > 0 else []
+		self.input_layout = BusLayout([("In_Valid", 1), ("In_IsKey", 1), ("In_Data", inputs * data_bits)] + meta)
+		meta = [("Out_Meta", meta_bits)] if meta_bits > 0 else []
+		self.output_layout = BusLayout([("Out_Valid", 1), ("Out_IsKey", 1), ("Out_Data", inputs * data_bits)] + meta)
+		# all registers are initialized to 0, Out_Data is only compared if Out_Valid is 1
+		self.init_val = (0, 0, None) + ((0,) if meta_bits > 0 else ())
+		# outputs in the pipeline, the oldest is visible in the next clock cycle
+		self.pipeline = deque([self.init_val] * (self.latency - 1))
+
+		# functional coverage, sampled by predict
+		self.coverage = CoverageGroup("sortnet")
+		self.cover_command = self.coverage.point("command", ("idle", "key", "data"))
+
+	def unpack_data(self, data):
+		return [(data >> (i * self.data_bits)) & self.data_mask for i in range(self.inputs)]
+
+	def pack_data(self, words):
+		return sum([word << (i * self.data_bits) for i, word in enumerate(words)])
+
+	def predict(self, transaction):
+		'''Push the input vector into the pipeline and return the expected output of the next clock cycle.'''
+		valid, is_key, data = transaction[:3]
+		if (valid == 1) and (is_key == 1):
+			words, self.switches = self.network.sort(self.unpack_data(data), self.inverse)
+		else:
+			words, _ = self.network.sort(self.unpack_data(data), switches=self.switches)
+		self.cover_command.sample(0 if valid == 0 else (1 if is_key == 1 else 2))
+
+		output = (valid, is_key, self.pack_data(words) if valid == 1 else None) + tuple(transaction[3:])
+		if TRACE_LEVEL >= TRACE_TRANSACTIONS: trace("predict", valid=valid, isKey=is_key, dataIn=data, dataOut=output[2])
+		self.pipeline.append(output)
+		return self.output_layout.expected(self.pipeline.popleft())
+
+	def describe_model(self, transaction):
+		return "{0} of {1} inputs, latency {2}, last switches = {3}".format(self.network.topology, self.inputs, self.latency,
+			"".join(["1" if switch else "0" for switch in self.switches]))
+
+
+if __name__ == "__main__":
+	import argparse
+	import sys
+	import time
+	import numpy as np
+
+	parser = argparse.ArgumentParser(description="Check a sorting network with random vectors and by the 0-1 principle.")
+	parser.add_argument("-t", "--topology", choices=sorted(NETWORKS), default="BitonicSort")
+	parser.add_argument("-i", "--inputs", type=int, default=32, help="number of inputs (default: %(default)s)")
+	parser.add_argument("-k", "--key-bits", type=int, default=32, help="key bits of at most 64 (default: %(default)s)")
+	parser.add_argument("-n", "--vectors", type=lambda text: int(float(text)), default=10**6, help="random vectors (default: %(default)s)")
+	parser.add_argument("-b", "--block", type=int, default=1 << 16, help="vectors per call of sort_batch (default: %(default)s)")
+	parser.add_argument("--inverse", action="store_true", help="sort in descending order")
+	parser.add_argument("--zero-one", action="store_true", help="check all 2^inputs binary vectors, feasible up to about 24 inputs")
+	parser.add_argument("-s", "--seed", type=int, default=None)
+	args = parser.parse_args()
+
+	network = SortNetwork(args.topology, args.inputs, args.key_bits)
+	rand = np.random.RandomState(args.seed)
+	dtype = np.uint64 if args.key_bits > 32 else np.uint32
+	print("{0} of {1} inputs: {2} stages, {3} comparators.".format(args.topology, args.inputs, len(network.stages), network.comparators))
+
+	start, failed = time.time(), False
+	for first in range(0, args.vectors, args.block):
+		count = min(args.block, args.vectors - first)
+		keys = rand.randint(0, 1 << min(args.key_bits, 32), (count, args.inputs), np.uint64).astype(dtype)
+		if args.key_bits > 32: keys = (keys << np.uint64(args.key_bits - 32)) ^ rand.randint(0, 1 << 32, keys.shape, np.uint64)
+		result, perm = network.sort_batch(keys, args.inverse)
+		expected = np.sort(keys, axis=1)
+		if args.inverse: expected = expected[:, ::-1]
+		wrong = np.flatnonzero((result != expected).any(axis=1) | (np.take_along_axis(keys, perm.astype(np.intp), axis=1) != result).any(axis=1))
+		if len(wrong) > 0:
+			print("FAILED: random vector {0} is not sorted: {1!s}".format(first + int(wrong[0]), list(result[wrong[0]])))
+			failed = True
+			break
+	elapsed = time.time() - start
+	if not failed: print("PASSED: {0} random vectors ({1:.0f} vectors/s).".format(args.vectors, args.vectors / elapsed if elapsed > 0 else 0))
+
+	if args.zero_one and not failed:
+		start = time.time()
+		unsorted = network.check_zero_one(args.inverse, args.block)
+		if unsorted is not None:
+			print("FAILED: binary vector {0:0{1}b} is not sorted.".format(unsorted, args.inputs))
+			failed = True
+		else:
+			print("PASSED: all {0} binary vectors ({1:.1f} s).".format(1 << args.inputs, time.time() - start))
+	sys.exit(1 if failed else 0)